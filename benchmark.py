@@ -0,0 +1,357 @@
+"""Reproducible benchmarks of the app's data paths on synthetic data.
+
+Seeds a separate database with deterministic users and posts, then times the
+same news_service functions the GUI calls and prints the results as JSON.
+
+    python benchmark.py --posts 10000
+    python benchmark.py --posts 1000000 --reuse --output after.json --compare before.json
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+import mysql.connector
+from mysql.connector import Error
+
+import bulk_io
+import db
+import news_service as svc
+import perf
+import schema
+from cache import entities
+
+
+BENCH_DATABASE = "usernews_bench"   # never the app's own database; it is wiped on reseed
+POSTS = 10000                       # default number of seeded posts
+POSTS_PER_USER = 10                 # default users = posts / POSTS_PER_USER
+REPEAT = 20                         # timed runs per benchmark
+PAGES = 20                          # pages walked by the deep paging benchmark
+BULK_ROWS = 1000                    # rows inserted/updated/deleted by the bulk benchmarks
+SEED = 42
+
+WORDS = ("market", "election", "weather", "football", "science", "health", "travel", "music",
+         "economy", "policy", "energy", "climate", "startup", "research", "festival", "review",
+         "report", "update", "storm", "league", "budget", "school", "museum", "satellite")
+
+
+def synthetic_users(count, rng):
+    for i in range(1, count + 1):
+        yield {
+            "username": f"user{i:07d}",
+            "email": f"user{i:07d}@example.com",
+            "age": rng.randint(18, 80),
+            "contact_number": f"+1555{rng.randint(0, 9999999):07d}",
+            "u_occupation": rng.choice(("writer", "editor", "reporter", "student", "")),
+        }
+
+
+def synthetic_text(rng, words):
+    # A rare "topicNNN" token per post gives searches with small result sets too.
+    picked = [rng.choice(WORDS) for _ in range(words)] + [f"topic{rng.randint(0, 999):03d}"]
+    rng.shuffle(picked)
+    return " ".join(picked)
+
+
+def synthetic_news(count, users, rng, start=None):
+    start = start or datetime(2024, 1, 1)
+    span = 365 * 24 * 3600
+    for _ in range(count):
+        yield {
+            "username": f"user{rng.randint(1, users):07d}",
+            "title": synthetic_text(rng, 5).capitalize(),
+            "body": synthetic_text(rng, rng.randint(40, 400)),
+            "created_at": (start + timedelta(seconds=rng.randint(0, span))).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+
+def use_database(name):
+    """Creates the benchmark database if needed and points the shared pool at it."""
+    settings = {k: v for k, v in db.DB_CONFIG.items() if k != "database"}
+    conn = mysql.connector.connect(**settings)
+    try:
+        conn.cursor().execute(f"CREATE DATABASE IF NOT EXISTS `{name}`")
+    finally:
+        conn.close()
+    db.configure(database=name)
+
+
+def table_counts():
+    with db.cursor() as cur:
+        cur.execute("SELECT (SELECT COUNT(*) FROM User), (SELECT COUNT(*) FROM News)")
+        return cur.fetchone()
+
+
+def seed(posts, users, rng, batch_size):
+    """Drops and recreates the tables, then bulk-loads the synthetic data; returns timings."""
+    with db.cursor(commit=True) as cur:
+        cur.execute("DROP TABLE IF EXISTS News")
+        cur.execute("DROP TABLE IF EXISTS User")
+        cur.execute("DROP TABLE IF EXISTS Tombstone")
+        cur.execute("DROP TABLE IF EXISTS change_counter")
+        cur.execute("DROP TABLE IF EXISTS schema_version")
+    svc.ensure_tables_exist()
+    started = time.perf_counter()
+    user_stats = bulk_io.import_users(synthetic_users(users, rng), batch_size=batch_size)
+    users_done = time.perf_counter()
+    news_stats = bulk_io.import_news(synthetic_news(posts, users, rng), batch_size=batch_size)
+    finished = time.perf_counter()
+    return {
+        "users": user_stats["inserted"],
+        "posts": news_stats["inserted"],
+        "users_s": round(users_done - started, 3),
+        "posts_s": round(finished - users_done, 3),
+        "posts_per_s": round(news_stats["inserted"] / max(finished - users_done, 1e-9)),
+    }
+
+
+def summarize(times, rows=None):
+    times_ms = sorted(t * 1000 for t in times)
+    result = {
+        "runs": len(times_ms),
+        "min_ms": round(times_ms[0], 3),
+        "median_ms": round(statistics.median(times_ms), 3),
+        "mean_ms": round(statistics.fmean(times_ms), 3),
+        "p95_ms": round(times_ms[min(len(times_ms) - 1, int(len(times_ms) * 0.95))], 3),
+        "max_ms": round(times_ms[-1], 3),
+    }
+    if rows is not None:
+        result["rows"] = rows
+    return result
+
+
+def measure(fn, repeat, args_for=None, cold=False):
+    """Times fn repeat times; args_for(i) supplies per-run arguments, cold clears the entity cache first."""
+    times, rows = [], 0
+    for i in range(repeat):
+        args = args_for(i) if args_for else ()
+        if cold:
+            entities.clear()
+        started = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - started)
+        rows = perf.row_count(result)
+    return summarize(times, rows)
+
+
+def bench_paging(pages):
+    """Walks the news list newest-first the way on_news_scroll does, timing each page."""
+    times, after, rows = [], None, 0
+    for _ in range(pages):
+        started = time.perf_counter()
+        page, has_more = svc.fetch_news_page(after=after)
+        times.append(time.perf_counter() - started)
+        rows += len(page)
+        if not has_more:
+            break
+        last = page[-1]
+        after = (last[5], last[0])
+    return summarize(times, rows)
+
+
+def bench_crud(repeat, user_ids, rng):
+    """Single-row add/update/delete of posts and users through the GUI handlers' service calls."""
+    results = {}
+    created = []
+
+    def add_post(i):
+        row = svc.fetch_news_row(svc.insert_news(rng.choice(user_ids), f"Bench post {i}", synthetic_text(rng, 100)))
+        created.append(row[0])
+        return row
+
+    def update_post(n_id):
+        svc.update_news_post(n_id, "Edited", synthetic_text(rng, 100))
+        return svc.fetch_news_row(n_id)
+
+    results["add_news"] = measure(add_post, repeat, lambda i: (i,))
+    results["update_news"] = measure(update_post, repeat, lambda i: (created[i],))
+    results["delete_news"] = measure(svc.delete_news_post, repeat, lambda i: (created[i],))
+
+    stamp = int(time.time())
+    new_users = []
+
+    def add_user(i):
+        row = svc.fetch_user_row(svc.insert_user(f"bench{stamp}_{i}", f"bench{stamp}_{i}@example.com", 30, "", ""))
+        new_users.append(row[0])
+        return row
+
+    def edit_user(i):
+        svc.update_user(new_users[i], f"bench{stamp}_{i}x", f"bench{stamp}_{i}x@example.com", 31, "", "")
+        return svc.fetch_user_row(new_users[i])
+
+    results["add_user"] = measure(add_user, repeat, lambda i: (i,))
+    results["update_user"] = measure(edit_user, repeat, lambda i: (i,))
+    results["delete_user"] = measure(svc.delete_user, repeat, lambda i: (new_users[i],))
+    return results
+
+
+def _bytes_sent(cur):
+    cur.execute("SHOW SESSION STATUS LIKE 'Bytes_sent'")
+    return int(cur.fetchone()[1])
+
+
+def bench_wire(rows):
+    """Bytes the server sends for rows full bodies and for rows list previews, without and with protocol compression."""
+    results = {}
+    compress = db.DB_CONFIG.get("compress", False)
+    try:
+        for compressed in (False, True):
+            db.configure(compress=compressed)
+            suffix = "_compressed" if compressed else ""
+            with db.cursor() as cur:
+                for name, column in (("bodies", "body"), ("previews", "preview")):
+                    before = _bytes_sent(cur)
+                    cur.execute(f"SELECT news_id, {column} FROM News ORDER BY news_id LIMIT %s", (rows,))
+                    cur.fetchall()
+                    results[f"{name}_bytes{suffix}"] = _bytes_sent(cur) - before
+    finally:
+        db.configure(compress=compress)
+    return results
+
+
+def bench_bulk(rows, users, rng, batch_size):
+    """Bulk insert via bulk_io, then the GUI's batch reassign, find/replace and delete of the inserted posts."""
+    results = {}
+    started = time.perf_counter()
+    stats = bulk_io.import_news(synthetic_news(rows, users, rng, start=datetime(2030, 1, 1)), batch_size=batch_size)
+    results["bulk_insert_news"] = summarize([time.perf_counter() - started], stats["inserted"])
+    with db.cursor() as cur:
+        cur.execute("SELECT news_id FROM News WHERE created_at >= '2030-01-01'")
+        ids = [r[0] for r in cur.fetchall()]
+        cur.execute("SELECT MIN(user_id) FROM User")
+        target = cur.fetchone()[0]
+    started = time.perf_counter()
+    changed = svc.reassign_news_posts(ids, target)
+    results["bulk_reassign_news"] = summarize([time.perf_counter() - started], changed)
+    started = time.perf_counter()
+    changed = svc.replace_in_news_posts(ids, WORDS[0], WORDS[0].upper())
+    results["bulk_replace_news"] = summarize([time.perf_counter() - started], changed)
+    started = time.perf_counter()
+    deleted = svc.delete_news_posts(ids)
+    results["bulk_delete_news"] = summarize([time.perf_counter() - started], deleted)
+    return results
+
+
+def run(args):
+    use_database(args.database)
+    users = args.users or max(1, args.posts // POSTS_PER_USER)
+
+    seeded = None
+    svc.ensure_tables_exist()
+    if not args.reuse or table_counts() != (users, args.posts):
+        seeded = seed(args.posts, users, random.Random(args.seed), args.batch_size)
+    entities.clear()
+
+    with db.cursor() as cur:
+        cur.execute("SELECT user_id FROM User")
+        user_ids = [r[0] for r in cur.fetchall()]
+        cur.execute("SELECT MIN(news_id), MAX(news_id) FROM News")
+        low, high = cur.fetchone()
+        cur.execute("SELECT VERSION()")
+        server = cur.fetchone()[0]
+
+    # Query arguments come from their own generator so --reuse runs pick the same ones.
+    rng = random.Random(args.seed + 1)
+    repeat = args.repeat
+    news_ids = [rng.randint(low, high) for _ in range(repeat)]
+    version = svc.current_version()
+    results = {
+        "list_news_first_page": measure(svc.fetch_news_page, repeat),
+        "page_news_deep": bench_paging(args.pages),
+        "news_for_user": measure(svc.fetch_news_for_user, repeat, lambda i: (rng.choice(user_ids),)),
+        # search_users itself: fetch_users would answer repeated prefixes from the search cache.
+        "search_users_prefix": measure(svc.search_users, repeat, lambda i: (f"user{rng.randint(1, users):07d}"[:-2],)),
+        "search_news_common": measure(svc.search_news, repeat, lambda i: (WORDS[i % len(WORDS)],)),
+        "search_news_rare": measure(svc.search_news, repeat, lambda i: (f"topic{rng.randint(0, 999):03d}",)),
+        "search_news_two_words": measure(svc.search_news, repeat,
+                                         lambda i: (f"{rng.choice(WORDS)} {rng.choice(WORDS)}",)),
+        "search_news_short": measure(svc.search_news, repeat, lambda i: ("ec",)),
+        "select_news_cold": measure(svc.fetch_news_post, repeat, lambda i: (news_ids[i],), cold=True),
+        "select_news_warm": measure(svc.fetch_news_post, repeat, lambda i: (news_ids[i],)),
+        "fetch_news_row": measure(svc.fetch_news_row, repeat, lambda i: (news_ids[i],)),
+        "list_users_page": measure(svc.fetch_users_page, repeat),
+        "list_users_by_posts": measure(svc.fetch_users_page, repeat, lambda i: (("post_count", True),)),
+        "list_users_age_range": measure(svc.fetch_users_page, repeat,
+                                        lambda i: (("age", False), {"age_min": 20, "age_max": 30})),
+        "list_news_by_title": measure(svc.fetch_news_page, repeat,
+                                      lambda i: (None, None, svc.NEWS_PAGE_SIZE, ("title", False))),
+        "fetch_changes_idle": measure(svc.fetch_changes, repeat, lambda i: (version,)),
+    }
+    storage = schema.storage()
+    storage["wire"] = bench_wire(args.bulk_rows)
+    if not args.skip_writes:
+        results.update(bench_crud(repeat, user_ids, rng))
+        results.update(bench_bulk(args.bulk_rows, users, rng, args.batch_size))
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "server": server,
+            "database": args.database,
+            "users": len(user_ids),
+            "posts": args.posts,
+            "seed": args.seed,
+            "repeat": repeat,
+        },
+        "seed": seeded,
+        "results": results,
+        "storage": storage,
+        "pool": db.get_pool().snapshot(),
+        "cache": entities.snapshot(),
+    }
+
+
+def compare(report, baseline):
+    """Prints each benchmark's median against a previous report to stderr."""
+    old = baseline.get("results", {})
+    for name, stats in report["results"].items():
+        if name not in old:
+            continue
+        before, after = old[name]["median_ms"], stats["median_ms"]
+        ratio = after / before if before else float("inf")
+        print(f"  {name:<24} {before:>10.3f} -> {after:>10.3f} ms  x{ratio:.2f}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the news blog data paths on synthetic data.")
+    parser.add_argument("--database", default=BENCH_DATABASE, help="scratch database to seed (dropped and refilled)")
+    parser.add_argument("--posts", type=int, default=POSTS, help="posts to seed, e.g. 10000 to 1000000")
+    parser.add_argument("--users", type=int, help=f"users to seed (default posts/{POSTS_PER_USER})")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--pages", type=int, default=PAGES)
+    parser.add_argument("--bulk-rows", type=int, default=BULK_ROWS)
+    parser.add_argument("--batch-size", type=int, default=bulk_io.BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--reuse", action="store_true", help="keep existing data when its row counts match")
+    parser.add_argument("--skip-writes", action="store_true", help="only run the read benchmarks")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="previous JSON report to compare medians against")
+    args = parser.parse_args(argv)
+    if args.database == db.DB_CONFIG["database"]:
+        parser.error("refusing to benchmark against the application database")
+
+    try:
+        report = run(args)
+    except Error as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
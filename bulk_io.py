@@ -0,0 +1,300 @@
+"""Headless bulk import/export of the User and News tables as CSV or JSONL.
+
+    python bulk_io.py import users users.csv
+    python bulk_io.py import news posts.jsonl --batch-size 2000 --commit-every 20000
+    python bulk_io.py export news posts.csv
+"""
+import argparse
+import csv
+import json
+import sys
+from datetime import date, datetime
+
+import db
+from news_service import rebuild_user_stats, stamp_unversioned, validate_email
+
+
+BATCH_SIZE = 1000       # rows per executemany / multi-row INSERT
+COMMIT_EVERY = 10000    # rows per transaction during an import
+
+USER_FIELDS = ("username", "email", "age", "contact_number", "u_occupation")
+NEWS_FIELDS = ("username", "title", "body", "created_at")
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    if path.endswith(".jsonl") or path.endswith(".ndjson"):
+        return "jsonl"
+    if path.endswith(".csv"):
+        return "csv"
+    raise ValueError(f"Cannot tell the format of '{path}'; pass --format csv or jsonl.")
+
+
+def read_records(path, fmt=None):
+    """Streams dict records from a CSV (with header) or JSONL file, one at a time."""
+    fmt = detect_format(path, fmt)
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat(sep=" ") if isinstance(value, datetime) else value.isoformat()
+    return value
+
+
+def write_records(path, fields, rows, fmt=None):
+    """Writes row tuples (in fields order) to CSV or JSONL as they arrive; returns the row count."""
+    fmt = detect_format(path, fmt)
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f) if fmt == "csv" else None
+        if writer:
+            writer.writerow(fields)
+        for row in rows:
+            row = [_plain(v) for v in row]
+            if writer:
+                writer.writerow(["" if v is None else v for v in row])
+            else:
+                f.write(json.dumps(dict(zip(fields, row)), ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def _batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and value.strip() == "")
+
+
+def _user_row(record):
+    """Validates one user record; returns an INSERT tuple or None when it must be skipped."""
+    username = (record.get("username") or "").strip()
+    email = (record.get("email") or "").strip()
+    if not username or not validate_email(email):
+        return None
+    age = record.get("age")
+    try:
+        age = None if _blank(age) else int(age)
+    except (TypeError, ValueError):
+        return None
+    contact = None if _blank(record.get("contact_number")) else str(record["contact_number"]).strip()
+    occupation = None if _blank(record.get("u_occupation")) else str(record["u_occupation"]).strip()
+    return (username, email, age, contact, occupation)
+
+
+class _Importer:
+    """Shared batching/transaction loop for the table importers."""
+
+    def __init__(self, batch_size, commit_every, progress):
+        self.batch_size = batch_size
+        self.commit_every = max(commit_every, batch_size)
+        self.progress = progress
+        self.stats = {"read": 0, "inserted": 0, "skipped": 0, "batches": 0, "commits": 0}
+
+    def run(self, records, prepare, sql):
+        """prepare(cur, batch) turns a batch of records into INSERT tuples (None = skip)."""
+        with db.connection() as conn:
+            cur = conn.cursor()
+            uncommitted = 0
+            for batch in _batches(records, self.batch_size):
+                rows = prepare(cur, batch)
+                values = [r for r in rows if r is not None]
+                self.stats["read"] += len(batch)
+                self.stats["skipped"] += len(batch) - len(values)
+                if values:
+                    cur.executemany(sql, values)
+                    # INSERT IGNORE reports only the rows it actually inserted.
+                    inserted = cur.rowcount if cur.rowcount >= 0 else len(values)
+                    self.stats["inserted"] += inserted
+                    self.stats["skipped"] += len(values) - inserted
+                    uncommitted += len(values)
+                self.stats["batches"] += 1
+                if uncommitted >= self.commit_every:
+                    conn.commit()
+                    self.stats["commits"] += 1
+                    uncommitted = 0
+                if self.progress:
+                    self.progress(dict(self.stats))
+            conn.commit()
+            self.stats["commits"] += 1
+        return self.stats
+
+
+def import_users(records, batch_size=BATCH_SIZE, commit_every=COMMIT_EVERY, skip_duplicates=False, progress=None):
+    """Bulk-inserts user records (dicts with USER_FIELDS keys) and returns import counters.
+
+    Invalid records are skipped. Duplicate usernames/emails abort the import
+    unless skip_duplicates is set, in which case they are skipped too.
+    """
+    verb = "INSERT IGNORE" if skip_duplicates else "INSERT"
+    sql = f"{verb} INTO User (username, email, age, contact_number, u_occupation) VALUES (%s, %s, %s, %s, %s)"
+    importer = _Importer(batch_size, commit_every, progress)
+    try:
+        return importer.run(records, lambda cur, batch: [_user_row(r) for r in batch], sql)
+    finally:
+        # Also after an aborted import: the batches committed before it need a change version.
+        stamp_unversioned()
+
+
+def resolve_usernames(cur, usernames, known):
+    """Fills known (username -> user_id, None if absent) for new usernames in one IN (...) query."""
+    missing = sorted({u for u in usernames if u and u not in known})
+    if missing:
+        placeholders = ", ".join(["%s"] * len(missing))
+        cur.execute(f"SELECT username, user_id FROM User WHERE username IN ({placeholders})", tuple(missing))
+        known.update(dict.fromkeys(missing))
+        known.update(cur.fetchall())
+    return known
+
+
+def resolve_user_ids(cur, user_ids, known):
+    """Fills known (user_id -> True if the user exists) for new ids in one IN (...) query."""
+    missing = sorted({i for i in user_ids if i not in known})
+    if missing:
+        placeholders = ", ".join(["%s"] * len(missing))
+        cur.execute(f"SELECT user_id FROM User WHERE user_id IN ({placeholders})", tuple(missing))
+        known.update(dict.fromkeys(missing, False))
+        known.update((row[0], True) for row in cur.fetchall())
+    return known
+
+
+def _record_user_id(record):
+    try:
+        return int(record["user_id"])
+    except (TypeError, ValueError):
+        return None
+
+
+def import_news(records, batch_size=BATCH_SIZE, commit_every=COMMIT_EVERY, progress=None):
+    """Bulk-inserts news records and returns import counters.
+
+    Each record names its author by "username" or by "user_id", both checked
+    in bulk per batch. Records without a title and body, or whose author does
+    not exist, are skipped. A missing created_at defaults to the import time.
+    The authors' post statistics are recomputed and the new rows get a change
+    version (see news_service.fetch_changes) once the import is done, or has
+    stopped on an error after committing some batches.
+    """
+    known, known_ids = {}, {}
+    authors = set()
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def prepare(cur, batch):
+        resolve_usernames(cur, [(r.get("username") or "").strip() for r in batch if _blank(r.get("user_id"))], known)
+        resolve_user_ids(cur, [i for i in (_record_user_id(r) for r in batch if not _blank(r.get("user_id")))
+                               if i is not None], known_ids)
+        rows = []
+        for r in batch:
+            title, body = r.get("title"), r.get("body")
+            if _blank(r.get("user_id")):
+                user_id = known.get((r.get("username") or "").strip())
+            else:
+                user_id = _record_user_id(r)
+                if not known_ids.get(user_id):
+                    user_id = None
+            if user_id is None or _blank(title) or _blank(body):
+                rows.append(None)
+                continue
+            created_at = now if _blank(r.get("created_at")) else r["created_at"]
+            rows.append((user_id, title.strip(), body, created_at))
+            authors.add(user_id)
+        return rows
+
+    sql = "INSERT INTO News (user_id, title, body, created_at) VALUES (%s, %s, %s, %s)"
+    importer = _Importer(batch_size, commit_every, progress)
+    try:
+        return importer.run(records, prepare, sql)
+    finally:
+        # Also after an aborted import, for the batches committed before it.
+        stamp_unversioned()
+        if authors:
+            rebuild_user_stats(authors)
+
+
+def stream_query(query, batch_size=BATCH_SIZE, progress=None):
+    """Yields rows of query with an unbuffered (server-side) cursor, batch_size at a time."""
+    with db.connection() as conn:
+        cur = conn.cursor(buffered=False)
+        cur.execute(query)
+        seen = 0
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+            seen += len(rows)
+            if progress:
+                progress({"exported": seen})
+
+
+def export_users(path, fmt=None, batch_size=BATCH_SIZE, progress=None):
+    query = f"SELECT {', '.join(USER_FIELDS)} FROM User ORDER BY user_id"
+    return write_records(path, USER_FIELDS, stream_query(query, batch_size, progress), fmt)
+
+
+def export_news(path, fmt=None, batch_size=BATCH_SIZE, progress=None):
+    query = """
+        SELECT U.username, N.title, N.body, N.created_at
+        FROM News N
+        JOIN User U ON N.user_id = U.user_id
+        ORDER BY N.news_id
+    """
+    return write_records(path, NEWS_FIELDS, stream_query(query, batch_size, progress), fmt)
+
+
+def _print_progress(stats):
+    print("  " + ", ".join(f"{k}={v}" for k, v in stats.items()), file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import/export for the news blog database.")
+    parser.add_argument("action", choices=("import", "export"))
+    parser.add_argument("table", choices=("users", "news"))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("csv", "jsonl"))
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--commit-every", type=int, default=COMMIT_EVERY)
+    parser.add_argument("--skip-duplicates", action="store_true", help="skip users whose username/email already exist")
+    parser.add_argument("--quiet", action="store_true", help="do not report progress")
+    parser.add_argument("--sqlite", metavar="PATH", help="use the SQLite database at PATH instead of MySQL")
+    args = parser.parse_args(argv)
+    if args.sqlite:
+        db.use_backend("sqlite", args.sqlite)
+    progress = None if args.quiet else _print_progress
+
+    try:
+        if args.action == "import":
+            records = read_records(args.path, args.format)
+            if args.table == "users":
+                stats = import_users(records, args.batch_size, args.commit_every, args.skip_duplicates, progress)
+            else:
+                stats = import_news(records, args.batch_size, args.commit_every, progress)
+            print(f"Imported {stats['inserted']} {args.table}, skipped {stats['skipped']}.")
+        else:
+            export = export_users if args.table == "users" else export_news
+            count = export(args.path, args.format, args.batch_size, progress)
+            print(f"Exported {count} {args.table} to {args.path}.")
+    except (db.Error, OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+CACHE_MAX_BYTES = 32 * 1024 * 1024  # approximate memory budget for cached records
+CACHE_TTL = 60                      # seconds before a record is re-read, to pick up other admins' edits
+SEARCH_CACHE_ENTRIES = 64           # recent search terms whose results are kept
+RESPONSE_CACHE_BYTES = 16 * 1024 * 1024  # memory budget for rendered API responses
+
+
+def record_size(record):
+    """Rough in-memory size of a record dict, used for the memory bound."""
+    return sys.getsizeof(record) + sum(sys.getsizeof(v) for v in record.values())
+
+
+class EntityCache:
+    """In-process LRU cache of User and News records keyed by (kind, integer id).
+
+    Records are plain dicts with "user_id"/"news_id" keys. User records also
+    feed a username -> user_id index. Entries expire after ttl seconds and the
+    least recently used ones are evicted once max_bytes is exceeded. All
+    methods are thread-safe so background workers can fill the cache.
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._usernames = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    def get(self, kind, key):
+        """Returns the cached record, or None when it is missing or expired."""
+        key = int(key)
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            record, _, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                self._drop((kind, key))
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end((kind, key))
+            self.stats["hits"] += 1
+            return record
+
+    def put(self, kind, key, record):
+        key = int(key)
+        size = record_size(record)
+        with self._lock:
+            if (kind, key) in self._entries:
+                self._drop((kind, key))
+            if size > self.max_bytes:
+                return
+            self._entries[(kind, key)] = (record, size, time.monotonic())
+            self._bytes += size
+            if kind == "user":
+                self._usernames[record["username"]] = key
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.stats["evictions"] += 1
+
+    def user_id_for(self, username):
+        """Returns the cached user_id for username, or None if that user is not cached."""
+        with self._lock:
+            key = self._usernames.get(username)
+        if key is None:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        return key if self.get("user", key) is not None else None
+
+    def invalidate(self, kind, key):
+        with self._lock:
+            self._drop((kind, int(key)))
+
+    def invalidate_where(self, kind, predicate):
+        """Drops every record of kind for which predicate(record) is true."""
+        with self._lock:
+            doomed = [k for k, (record, _, _) in self._entries.items()
+                      if k[0] == kind and predicate(record)]
+            for k in doomed:
+                self._drop(k)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._usernames.clear()
+            self._bytes = 0
+
+    def snapshot(self):
+        """Returns the hit/miss counters plus current entry count and size."""
+        with self._lock:
+            data = dict(self.stats)
+            data["entries"] = len(self._entries)
+            data["bytes"] = self._bytes
+        return data
+
+    def _drop(self, k):
+        entry = self._entries.pop(k, None)
+        if entry is None:
+            return
+        record, size, _ = entry
+        self._bytes -= size
+        if k[0] == "user" and self._usernames.get(record["username"]) == k[1]:
+            del self._usernames[record["username"]]
+
+
+class SearchCache:
+    """LRU cache of recent search results keyed by (kind, term).
+
+    Each entry records whether the search returned every match (fewer rows
+    than its limit), since only a complete result can stand in for a longer,
+    narrower term. Entries expire after ttl seconds and the whole cache is
+    cleared on any write, so results never outlive the data they came from.
+    """
+
+    def __init__(self, max_entries=SEARCH_CACHE_ENTRIES, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "narrowed": 0, "misses": 0}
+
+    def _lookup(self, kind, term):
+        entry = self._entries.get((kind, term))
+        if entry is None:
+            return None
+        if time.monotonic() - entry[2] > self.ttl:
+            del self._entries[(kind, term)]
+            return None
+        self._entries.move_to_end((kind, term))
+        return entry
+
+    def get(self, kind, term):
+        """Returns the cached rows for exactly this term, or None."""
+        with self._lock:
+            entry = self._lookup(kind, term)
+            self.stats["hits" if entry else "misses"] += 1
+            return entry[0] if entry else None
+
+    def superset(self, kind, term, usable):
+        """Returns (prefix, rows) for the longest cached, complete prefix of term, or None.
+
+        usable(prefix, term) decides whether the prefix's matches are
+        guaranteed to contain every match of term.
+        """
+        with self._lock:
+            for end in range(len(term) - 1, 0, -1):
+                prefix = term[:end]
+                entry = self._lookup(kind, prefix)
+                if entry and entry[1] and usable(prefix, term):
+                    self.stats["narrowed"] += 1
+                    return prefix, entry[0]
+        return None
+
+    def put(self, kind, term, rows, complete):
+        with self._lock:
+            self._entries[(kind, term)] = (rows, complete, time.monotonic())
+            self._entries.move_to_end((kind, term))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self.stats)
+            data["entries"] = len(self._entries)
+        return data
+
+
+class ResponseCache:
+    """LRU cache of rendered HTTP responses (body, etag) keyed by request path.
+
+    Entries are tied to the change version they were rendered at: sync()
+    empties the cache as soon as a newer version is seen, and put() ignores a
+    response rendered at an older version, so a slow request cannot store data
+    that was overwritten while it ran.
+    """
+
+    def __init__(self, max_bytes=RESPONSE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.version = None
+        self.changed_at = None
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def sync(self, version, now):
+        """Empties the cache if version differs from the cached one; returns when the version last changed."""
+        with self._lock:
+            if version != self.version:
+                if self._entries:
+                    self.stats["invalidations"] += 1
+                self._entries.clear()
+                self._bytes = 0
+                self.version = version
+                self.changed_at = now
+            return self.changed_at
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            self.stats["hits" if entry else "misses"] += 1
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body, etag, version):
+        size = len(body) + len(key)
+        with self._lock:
+            if version != self.version or size > self.max_bytes:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0]) + len(key)
+            self._entries[key] = (body, etag)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest, (old_body, _) = self._entries.popitem(last=False)
+                self._bytes -= len(old_body) + len(oldest)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self.stats)
+            data["entries"] = len(self._entries)
+            data["bytes"] = self._bytes
+            data["version"] = self.version
+        return data
+
+
+entities = EntityCache()
+searches = SearchCache()
@@ -0,0 +1,558 @@
+import functools
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import perf
+
+
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "password": "",
+    "database": "usernews",
+    # NEWS_DB_COMPRESS=1 compresses the client/server protocol (worth it for a server on another host).
+    "compress": os.environ.get("NEWS_DB_COMPRESS", "") not in ("", "0"),
+}
+
+POOL_SIZE = 5          # maximum open connections
+POOL_TIMEOUT = 10      # seconds to wait for a free connection before giving up
+POOL_PING_AFTER = 30   # idle seconds after which a borrowed connection is pinged
+SQLITE_TIMEOUT = 10    # seconds an SQLite connection waits for a lock held by another one
+UNREACHABLE_ERRNOS = {1040, 1053}  # too many connections, server shutting down (client errors are 2000-2999)
+
+# NEWS_BACKEND=sqlite keeps the whole database in the SQLite file NEWS_SQLITE_PATH
+# instead of on a MySQL server (see use_backend).
+BACKEND = os.environ.get("NEWS_BACKEND", "mysql")
+SQLITE_PATH = os.environ.get("NEWS_SQLITE_PATH", "usernews.db")
+
+
+# mysql.connector is the slowest import of the app, so it is loaded on first use
+# (a connection, or db.Error / db.PoolTimeout / db.Offline being looked up) and
+# the GUI can draw its window before paying for it.
+_driver_lock = threading.Lock()
+
+
+def load_driver():
+    """Imports mysql.connector and defines Error, PoolTimeout and Offline in this module.
+
+    With the SQLite backend the driver is optional; Error is then a plain
+    Exception subclass taking the same msg= keyword.
+    """
+    global mysql, Error, PoolTimeout, Offline
+    with _driver_lock:
+        if "Error" in globals():
+            return
+        try:
+            import mysql.connector
+            from mysql.connector import Error as error
+        except ImportError:
+            if BACKEND != "sqlite":
+                raise
+            mysql = None
+
+            class error(Exception):
+                def __init__(self, msg=None, errno=None, values=None, sqlstate=None):
+                    super().__init__(msg)
+                    self.msg = msg
+                    self.errno = errno
+                    self.sqlstate = sqlstate
+
+        class PoolTimeout(error):
+            """Raised when no pooled connection became free within POOL_TIMEOUT."""
+
+        class Offline(error):
+            """Raised for writes while the app reads from the local snapshot instead of MySQL."""
+
+        Error = error
+
+
+def unreachable(error):
+    """True if error means MySQL could not be reached or had no free connection, so retrying later may work.
+
+    Errors the server answered with (duplicate keys, bad foreign keys, SQL
+    errors) are not; running the same statement again fails the same way.
+    """
+    load_driver()
+    if isinstance(error, PoolTimeout):
+        return True
+    if mysql is None:
+        return False
+    if isinstance(error, (mysql.connector.errors.InterfaceError, mysql.connector.errors.OperationalError)):
+        return True
+    # The C extension raises client errors such as "can't connect" (CR_* codes) as plain DatabaseError.
+    return (error.errno or 0) in UNREACHABLE_ERRNOS or 2000 <= (error.errno or 0) < 3000
+
+
+def __getattr__(name):
+    if name in ("Error", "PoolTimeout", "Offline", "mysql"):
+        load_driver()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class TimedCursor:
+    """Cursor proxy that records execute and fetch timings, row counts and bytes in perf."""
+
+    def __init__(self, cur):
+        self._cur = cur
+
+    def execute(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cur.execute(*args, **kwargs)
+        finally:
+            perf.record("db.execute", time.perf_counter() - started)
+
+    def executemany(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cur.executemany(*args, **kwargs)
+        finally:
+            perf.record("db.executemany", time.perf_counter() - started)
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        result = getattr(self._cur, method)(*args)
+        elapsed = time.perf_counter() - started
+        rows = result if method != "fetchone" else ([result] if result is not None else [])
+        perf.record("db.fetch", elapsed, len(rows), perf.payload_size(rows))
+        return result
+
+    def fetchone(self):
+        return self._fetch("fetchone")
+
+    def fetchmany(self, *args):
+        return self._fetch("fetchmany", *args)
+
+    def fetchall(self):
+        return self._fetch("fetchall")
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+class PooledConnection:
+    """Wraps a borrowed connection; close() hands it back to the pool instead of closing it."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self._cursors = []
+
+    def cursor(self, *args, **kwargs):
+        cur = self._conn.cursor(*args, **kwargs)
+        self._cursors.append(cur)
+        return TimedCursor(cur) if perf.enabled else cur
+
+    def close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        self._pool._release(conn, self._cursors)
+        self._cursors = []
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise Error("Connection already returned to the pool.")
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self._conn is not None:
+            try:
+                self._conn.rollback()
+            except Error:
+                pass
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """A small thread-safe pool of MySQL connections built on DB_CONFIG."""
+
+    def __init__(self, config=None, size=POOL_SIZE, timeout=POOL_TIMEOUT, ping_after=POOL_PING_AFTER):
+        self.config = dict(config or DB_CONFIG)
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open = 0
+        self._closed = False
+        self.stats = {"checkouts": 0, "waits": 0, "reconnects": 0, "created": 0, "discarded": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _connect(self):
+        started = perf.start()
+        conn = mysql.connector.connect(**self.config)
+        perf.finish("db.connect", started)
+        self._count("created")
+        return conn
+
+    def _discard(self, conn):
+        with self._lock:
+            self._open -= 1
+            self.stats["discarded"] += 1
+        try:
+            conn.close()
+        except Error:
+            pass
+
+    def _healthy(self, conn, idle_since):
+        """Pings connections that sat idle too long and reconnects the stale ones."""
+        if time.monotonic() - idle_since < self.ping_after:
+            return conn
+        try:
+            conn.ping(reconnect=False)
+            return conn
+        except Error:
+            pass
+        self._count("reconnects")
+        try:
+            conn.reconnect(attempts=2, delay=0)
+            return conn
+        except Error:
+            self._discard(conn)
+            raise
+
+    def acquire(self):
+        """Borrows a connection, opening a new one while the pool is below its size."""
+        started = perf.start()
+        conn = self._acquire()
+        perf.finish("db.acquire", started)
+        return conn
+
+    def _acquire(self):
+        load_driver()
+        if self._closed:
+            raise Error("Connection pool is closed.")
+        self._count("checkouts")
+        try:
+            conn, idle_since = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._open < self.size
+                if can_open:
+                    self._open += 1
+            if can_open:
+                try:
+                    return PooledConnection(self, self._connect())
+                except Error:
+                    with self._lock:
+                        self._open -= 1
+                    raise
+            self._count("waits")
+            try:
+                conn, idle_since = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise PoolTimeout(msg=f"No database connection free after {self.timeout}s.")
+        return PooledConnection(self, self._healthy(conn, idle_since))
+
+    def _release(self, conn, cursors):
+        for cur in cursors:
+            try:
+                cur.close()
+            except Error:
+                pass
+        try:
+            # Ends any open transaction so the next borrower never sees a stale snapshot.
+            if conn.in_transaction:
+                conn.rollback()
+        except Error:
+            self._discard(conn)
+            return
+        if self._closed:
+            self._discard(conn)
+            return
+        self._idle.put((conn, time.monotonic()))
+
+    @contextmanager
+    def connection(self):
+        """Context manager yielding a pooled connection, always returned on exit."""
+        conn = self.acquire()
+        with conn:
+            yield conn
+
+    @contextmanager
+    def cursor(self, commit=False, **cursor_args):
+        """Context manager yielding a cursor; commits on success when commit=True, rolls back on error."""
+        with self.connection() as conn:
+            cur = conn.cursor(**cursor_args)
+            yield cur
+            if commit:
+                conn.commit()
+
+    def snapshot(self):
+        """Returns the pool counters plus current open/idle connection counts."""
+        with self._lock:
+            data = dict(self.stats)
+            data["open"] = self._open
+        data["idle"] = self._idle.qsize()
+        return data
+
+    def close(self):
+        """Closes every idle connection; borrowed ones are closed when returned."""
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+# --- SQLite ----------------------------------------------------------------
+# The app's queries are written for MySQL with %s placeholders; SqliteCursor
+# rewrites the placeholders and the few MySQL-only spellings below, and the
+# functions registered by open_sqlite fill in LEFT/CHAR_LENGTH, so the same
+# queries run on an SQLite database (the snapshot, or the SQLite backend).
+
+_SQLITE_REWRITES = [
+    (re.compile(r"\bLEFT\("), "LEFT_CHARS("),            # LEFT is a keyword in SQLite
+    (re.compile(r"\bINSERT IGNORE\b"), "INSERT OR IGNORE"),
+    (re.compile(r"\bGREATEST\("), "MAX("),                # multi-argument MAX() is a scalar in SQLite
+    (re.compile(r"\bBINARY\s+"), ""),                     # INSTR/REPLACE are case-sensitive already
+    (re.compile(r"\s+FOR UPDATE\b"), ""),                 # writers hold the database lock (BEGIN IMMEDIATE)
+    # MySQL's LENGTH() counts bytes, SQLite's counts characters of text.
+    (re.compile(r"\bLENGTH\(([\w.]+)\)"), r"LENGTH(CAST(\1 AS BLOB))"),
+]
+
+sqlite3.register_adapter(datetime, lambda value: value.strftime("%Y-%m-%d %H:%M:%S"))
+sqlite3.register_converter("DATETIME", lambda raw: datetime.fromisoformat(raw.decode()))
+
+
+def _left(text, count):
+    return None if text is None else text[:count]
+
+
+def _char_length(text):
+    return None if text is None else len(text)
+
+
+def open_sqlite(path, readonly=False):
+    """Opens an SQLite database with DATETIME conversion and the MySQL functions the app's queries use."""
+    conn = sqlite3.connect(path, timeout=SQLITE_TIMEOUT, detect_types=sqlite3.PARSE_DECLTYPES,
+                           check_same_thread=False)
+    conn.create_function("LEFT_CHARS", 2, _left, deterministic=True)
+    conn.create_function("CHAR_LENGTH", 1, _char_length, deterministic=True)
+    # REPLACE conflicts then fire the delete triggers that keep News_fts in step.
+    conn.execute("PRAGMA recursive_triggers = ON")
+    if readonly:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+class SqliteCursor:
+    """Cursor over an SQLite connection that accepts %s placeholders and can return dict rows."""
+
+    def __init__(self, cur, dictionary=False):
+        self._cur = cur
+        self._dictionary = dictionary
+
+    def execute(self, sql, params=()):
+        try:
+            return self._cur.execute(self.translate(sql), tuple(params))
+        except sqlite3.Error as e:
+            raise _sqlite_error(e) from e
+
+    def executemany(self, sql, rows):
+        try:
+            return self._cur.executemany(self.translate(sql), rows)
+        except sqlite3.Error as e:
+            raise _sqlite_error(e) from e
+
+    @staticmethod
+    @functools.lru_cache(maxsize=512)
+    def translate(sql):
+        sql = sql.replace("%s", "?")
+        for pattern, replacement in _SQLITE_REWRITES:
+            sql = pattern.sub(replacement, sql)
+        return sql
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip([d[0] for d in self._cur.description], row))
+
+    def fetchone(self):
+        return self._row(self._cur.fetchone())
+
+    def fetchmany(self, size=None):
+        return [self._row(r) for r in self._cur.fetchmany(size or self._cur.arraysize)]
+
+    def fetchall(self):
+        return [self._row(r) for r in self._cur.fetchall()]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+def _sqlite_error(e):
+    """Re-raises sqlite3 errors as Error so callers catch one exception type for either backend."""
+    load_driver()
+    return Error(msg=str(e))
+
+
+class SqliteConnection:
+    """Wraps an sqlite3 connection with the cursor(dictionary=..., buffered=...) signature of mysql.connector."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, dictionary=False, buffered=None, **_):
+        return SqliteCursor(self._conn.cursor(), dictionary)
+
+    def start_transaction(self, consistent_snapshot=False, isolation_level=None, readonly=None):
+        """Opens a transaction now; with WAL its reads share one snapshot, as with MySQL's consistent_snapshot."""
+        self._conn.execute("BEGIN")
+
+    def close(self):
+        self._conn.close()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._conn.rollback()
+        self.close()
+        return False
+
+
+class SqlitePool(ConnectionPool):
+    """ConnectionPool over connections to one SQLite file, used when BACKEND is "sqlite".
+
+    Connections run in WAL mode, so readers never wait for the writer, and
+    cursor(commit=True) starts with BEGIN IMMEDIATE so writes are serialized the
+    way MySQL's row locks serialize them.
+    """
+
+    def __init__(self, path=None, size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        super().__init__({}, size=size, timeout=timeout)
+        self.path = path or SQLITE_PATH
+
+    def _connect(self):
+        started = perf.start()
+        conn = open_sqlite(self.path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        perf.finish("db.connect", started)
+        self._count("created")
+        return SqliteConnection(conn)
+
+    def _healthy(self, conn, idle_since):
+        return conn
+
+    @contextmanager
+    def cursor(self, commit=False, **cursor_args):
+        with self.connection() as conn:
+            cur = conn.cursor(**cursor_args)
+            if commit:
+                cur.execute("BEGIN IMMEDIATE")
+            yield cur
+            if commit:
+                conn.commit()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_snapshot_path = None
+
+
+def get_pool():
+    """Returns the process-wide pool, creating it from DB_CONFIG (or SQLITE_PATH) on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SqlitePool() if BACKEND == "sqlite" else ConnectionPool()
+        return _pool
+
+
+def configure(**settings):
+    """Updates DB_CONFIG (e.g. database="usernews_bench") and drops the current pool so the next call reconnects."""
+    global _pool
+    with _pool_lock:
+        DB_CONFIG.update(settings)
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def use_backend(backend, sqlite_path=None):
+    """Switches between "mysql" and "sqlite" (stored at sqlite_path, default SQLITE_PATH); the next call reconnects."""
+    global _pool, BACKEND, SQLITE_PATH
+    if backend not in ("mysql", "sqlite"):
+        raise ValueError(f"Unknown backend: {backend}")
+    with _pool_lock:
+        BACKEND = backend
+        SQLITE_PATH = sqlite_path or SQLITE_PATH
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def use_snapshot(path):
+    """Serves connection()/cursor() from the read-only SQLite snapshot at path, or from MySQL again with None."""
+    global _snapshot_path
+    _snapshot_path = path
+
+
+def offline():
+    return _snapshot_path is not None
+
+
+def snapshot_path():
+    return _snapshot_path
+
+
+def dialect():
+    """"sqlite" with the SQLite backend or while reading from the snapshot, else "mysql"."""
+    return "sqlite" if BACKEND == "sqlite" or _snapshot_path is not None else "mysql"
+
+
+@contextmanager
+def _snapshot_connection():
+    with SqliteConnection(open_sqlite(_snapshot_path, readonly=True)) as conn:
+        yield conn
+
+
+@contextmanager
+def _snapshot_cursor(commit=False, **cursor_args):
+    if commit:
+        load_driver()
+        raise Offline(msg="The database server is unreachable; the local snapshot is read-only.")
+    with _snapshot_connection() as conn:
+        yield conn.cursor(**cursor_args)
+
+
+def connection():
+    if _snapshot_path is not None:
+        return _snapshot_connection()
+    return get_pool().connection()
+
+
+def cursor(commit=False, **cursor_args):
+    if _snapshot_path is not None:
+        return _snapshot_cursor(commit=commit, **cursor_args)
+    return get_pool().cursor(commit=commit, **cursor_args)
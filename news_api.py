@@ -0,0 +1,289 @@
+"""Read-only JSON API over the news posts, for the public site.
+
+    python news_api.py --port 8080
+    python news_api.py --sqlite blog.db
+
+    GET /news?limit=20&after=<cursor>&user=alice&from=2024-01-01&to=2024-01-31&sort=title&direction=asc
+    GET /news/<news_id>
+    GET /users/<username>/news?limit=20&after=<cursor>
+
+Lists are keyset-paged with the same news_service queries as the GUI; pass a
+response's "next" cursor as after= to get the following page. Rendered
+responses are cached in memory until the change version moves (see
+news_service.fetch_changes), so the database is read once per page per change,
+not once per visitor.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import sys
+import threading
+import time
+from datetime import date, datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import db
+import news_service as svc
+import perf
+from cache import ResponseCache
+
+
+API_HOST = "127.0.0.1"
+API_PORT = 8080
+API_PAGE_SIZE = 20          # posts per list response unless limit= says otherwise
+API_MAX_LIMIT = 100         # most posts one list response returns
+VERSION_CHECK_SECONDS = 1.0 # how long a read of the change version is trusted before asking again
+CACHE_MAX_AGE = 5           # seconds browsers and proxies may reuse a response without asking
+
+responses = ResponseCache()
+perf.register_source("response_cache", responses.snapshot)
+
+_version = {"value": None, "checked": 0.0}
+_version_lock = threading.Lock()
+
+
+class ApiError(Exception):
+    """An error answered with its HTTP status and a JSON {"error": message} body."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def data_version():
+    """Returns (version, last modified) of the data, re-reading change_counter at most every VERSION_CHECK_SECONDS.
+
+    Any write, from the GUI, the CLI or another server, bumps the version and
+    so empties the response and record caches; last modified is when this
+    server first saw it.
+    """
+    with _version_lock:
+        if time.monotonic() - _version["checked"] >= VERSION_CHECK_SECONDS:
+            version = svc.current_version()
+            if version != _version["value"]:
+                # The service's own record caches only expire after CACHE_TTL otherwise.
+                svc.entities.clear()
+                svc.searches.clear()
+            _version["value"] = version
+            _version["checked"] = time.monotonic()
+        version = _version["value"]
+    return version, responses.sync(version, datetime.now(timezone.utc).replace(microsecond=0))
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(key):
+    """Opaque URL-safe form of a (sort value, news_id) keyset key."""
+    raw = json.dumps([_plain(key[0]), key[1]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(text, column):
+    """Inverse of encode_cursor; column is the sort column, to restore datetimes.
+
+    Anything encode_cursor could not have made for column, down to a value of
+    the wrong type, is answered with 400 before it reaches a query.
+    """
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(text + "=" * (-len(text) % 4)))
+        if column == "created_at":
+            value = datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        raise ApiError(400, "Invalid cursor.")
+    if type(row_id) is not int or not (value is None or isinstance(value, (str, datetime))):
+        raise ApiError(400, "Invalid cursor.")
+    return value, row_id
+
+
+def _limit(query):
+    try:
+        limit = int(query.get("limit", API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError(400, "limit must be a whole number.")
+    if limit < 1:
+        raise ApiError(400, "limit must be at least 1.")
+    return min(limit, API_MAX_LIMIT)
+
+
+def news_item(row):
+    news_id, user_id, username, title, preview, created_at = row
+    return {"news_id": news_id, "user_id": user_id, "username": username, "title": title,
+            "preview": preview, "created_at": _plain(created_at)}
+
+
+def list_news(query):
+    sort = query.get("sort", svc.NEWS_DEFAULT_ORDER[0])
+    if sort not in svc.NEWS_SORTS:
+        raise ApiError(400, f"sort must be one of: {', '.join(sorted(svc.NEWS_SORTS))}.")
+    direction = query.get("direction", "desc")
+    if direction not in ("asc", "desc"):
+        raise ApiError(400, "direction must be asc or desc.")
+    order = (sort, direction == "desc")
+    filters = svc.clean_news_filters(query.get("user", ""), query.get("from", ""), query.get("to", ""))
+    after = decode_cursor(query["after"], sort) if query.get("after") else None
+    rows, has_more = svc.fetch_news_page(after=after, limit=_limit(query), order=order, filters=filters)
+    return {"items": [news_item(r) for r in rows],
+            "next": encode_cursor(svc.sort_key(rows[-1], svc.NEWS_SORTS, order)) if has_more else None}
+
+
+def show_news(news_id):
+    news = svc.get_news(news_id)
+    if news is None:
+        raise ApiError(404, f"News post {news_id} does not exist.")
+    user = svc.get_user(news["user_id"])
+    item = {k: _plain(v) for k, v in news.items()}
+    item["username"] = user["username"] if user else None
+    return item
+
+
+def user_news(username, query):
+    user_id = svc.get_user_id_by_username(username)
+    if user_id is None:
+        raise ApiError(404, f"User '{username}' does not exist.")
+    after = decode_cursor(query["after"], "created_at") if query.get("after") else None
+    rows, has_more = svc.fetch_news_for_user(user_id, after=after, limit=_limit(query))
+    items = [news_item((news_id, user_id, username, title, preview, created_at))
+             for news_id, title, preview, created_at in rows]
+    return {"items": items, "next": encode_cursor((rows[-1][3], rows[-1][0])) if has_more else None}
+
+
+def route(path, query):
+    """Runs the request for path and returns the response document."""
+    parts = [unquote(p) for p in path.strip("/").split("/")]
+    if parts == ["news"]:
+        return list_news(query)
+    if len(parts) == 2 and parts[0] == "news":
+        if not parts[1].isdigit():
+            raise ApiError(404, "Not found.")
+        return show_news(int(parts[1]))
+    if len(parts) == 3 and parts[0] == "users" and parts[2] == "news":
+        return user_news(parts[1], query)
+    raise ApiError(404, "Not found.")
+
+
+def render(target):
+    """Returns (status, body, etag, last modified) for a request target, from the response cache when possible."""
+    version, modified = data_version()
+    cached = responses.get(target)
+    if cached is not None:
+        return 200, cached[0], cached[1], modified
+    url = urlsplit(target)
+    query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+    try:
+        document = route(url.path, query)
+    except ApiError as e:
+        return e.status, _json({"error": str(e)}), None, None
+    except LookupError as e:
+        return 404, _json({"error": str(e)}), None, None
+    except ValueError as e:
+        return 400, _json({"error": str(e)}), None, None
+    body = _json(document)
+    etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+    responses.put(target, body, etag, version)
+    return 200, body, etag, modified
+
+
+def _json(document):
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def not_modified(headers, etag, modified):
+    """True if the client's If-None-Match / If-Modified-Since show its copy is current."""
+    if_none_match = headers.get("If-None-Match")
+    if if_none_match is not None:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = headers.get("If-Modified-Since")
+    if if_modified_since:
+        try:
+            return modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class NewsApiHandler(BaseHTTPRequestHandler):
+    server_version = "NewsBlogAPI/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        started = perf.start()
+        try:
+            status, body, etag, modified = render(self.path)
+        except db.PoolTimeout:
+            status, body, etag, modified = 503, _json({"error": "The database is busy, try again."}), None, None
+        except db.Error as e:
+            self.log_error("database error: %s", e)
+            status, body, etag, modified = 503, _json({"error": "The database is unavailable."}), None, None
+        if status == 200 and not_modified(self.headers, etag, modified):
+            status, body = 304, b""
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", format_datetime(modified, usegmt=True))
+            self.send_header("Cache-Control", f"public, max-age={CACHE_MAX_AGE}")
+        if status != 304:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+        if status == 503:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        if send_body and body:
+            self.wfile.write(body)
+        perf.finish(f"api.{status}", started, nbytes=len(body))
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(host=API_HOST, port=API_PORT, quiet=False):
+    server = ThreadingHTTPServer((host, port), NewsApiHandler)
+    server.daemon_threads = True
+    server.quiet = quiet
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the news posts as a read-only JSON API.")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--sqlite", metavar="PATH", help="use the SQLite database at PATH instead of MySQL")
+    parser.add_argument("--quiet", action="store_true", help="do not log each request")
+    args = parser.parse_args(argv)
+    if args.sqlite:
+        db.use_backend("sqlite", args.sqlite)
+
+    try:
+        data_version()
+    except db.Error as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    server = make_server(args.host, args.port, args.quiet)
+    print(f"Serving the news API on http://{args.host}:{server.server_port}/news", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,30 @@
-import mysql.connector
-from mysql.connector import Error
-import tkinter as tk
-from tkinter import ttk, messagebox
-from datetime import datetime
-import re
+import time
 
+STARTED = time.perf_counter()   # zero point of the startup timing report (see mark)
 
-DB_CONFIG = {
-    "host": "localhost",
-    "user": "root",
-    "password": "",
-    "database": "usernews"
-}
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog, simpledialog
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import atexit
+import itertools
+import os
+import queue
+import sys
+
+import db
+import perf
+import snapshot
+from cache import entities, searches
+from news_service import (
+    ensure_tables_exist, find_news, cached_news_search, cached_user_search, fetch_users, fetch_user_profile, fetch_news_for_user,
+    fetch_news_page, fetch_news_post, fetch_user_row, fetch_news_row, insert_user, update_user,
+    delete_user, insert_news, update_news_post, require_user_id,
+    fetch_news_rows, delete_news_posts, reassign_news_posts, replace_in_news_posts, delete_users,
+    fetch_user_rows, fetch_users_page, current_version, fetch_changes, order_rows, sort_key, user_matches, news_matches,
+    clean_user_filters, clean_news_filters, USER_SORTS, NEWS_SORTS, USER_DEFAULT_ORDER, NEWS_DEFAULT_ORDER,
+    clean_user_fields, clean_news_fields,
+)
 
 WINDOW_SIZE = "1200x700" 
 BG_COLOR = "#f0f4f8"
@@ -22,144 +35,301 @@ HEADER_BG = "#2c3e50"
 HEADER_FG = "#ffffff"
 ACCENT_COLOR = "#3498db"
 
+NEWS_WINDOW_PAGES = 3       # pages kept in the news table before the far end is dropped
+NEWS_PREFETCH_MARGIN = 0.1  # scroll fraction from either edge that triggers the next page
 
+DB_WORKERS = 3              # background threads running queries; keep <= db.POOL_SIZE
+RESULT_POLL_MS = 25         # how often the Tk loop collects finished background work
+SEARCH_DEBOUNCE_MS = 250    # typing pause before the live search runs
+PERF_REFRESH_MS = 1000      # refresh interval of the diagnostics window
+SNAPSHOT_SYNC_MS = 60000    # how often the local snapshot is refreshed (or MySQL retried while offline)
+AUTO_REFRESH_MS = 15000     # how often the views pull other admins' changes (news_service.fetch_changes)
 
-def get_conn():
-    """Establishes and returns a database connection."""
-    try:
-        return mysql.connector.connect(**DB_CONFIG)
-    except Error as e:
-        messagebox.showerror("DB Connection Error", str(e))
-        return None
+FILL_FIRST_CHUNK = 50       # rows inserted at once when a table is refilled (about one screenful)
+FILL_CHUNK = 400            # rows inserted per later batch
+FILL_DELAY_MS = 1           # pause between batches so Tk can redraw and handle input
+FILL_HIDDEN_MS = 250        # how often a paused fill checks whether its table is shown again
+
+
+class BackgroundRunner:
+    """Runs database work on worker threads and hands results back to the Tk loop.
+
+    Tk is not thread-safe, so workers only put results on a queue; the main loop
+    polls it with root.after and calls on_done/on_error there. Work submitted
+    under a key supersedes earlier work with the same key: a queued job is
+    cancelled, and a job already running has its result dropped.
+    """
+
+    def __init__(self, widget, workers=DB_WORKERS, on_busy=None):
+        self.widget = widget
+        self.on_busy = on_busy
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db")
+        self._results = queue.Queue()
+        self._latest = {}
+        self._tokens = itertools.count()
+        self._polling = False
+
+    def submit(self, work, *args, key=None, on_done=None, on_error=None):
+        """Runs work(*args) in the background; on_done(result) or on_error(exc) runs on the Tk thread."""
+        if key is not None:
+            self.cancel(key)
+        token = next(self._tokens)
+        future = self._executor.submit(self._run, token, key, work, args, on_done, on_error)
+        if key is not None:
+            self._latest[key] = (token, future)
+        self.pending += 1
+        self._set_busy()
+        if not self._polling:
+            self._polling = True
+            self.widget.after(RESULT_POLL_MS, self._poll)
+        return token
+
+    def cancel(self, key):
+        """Drops the outstanding job for key, whether it is still queued or already running."""
+        latest = self._latest.pop(key, None)
+        if latest and latest[1].cancel():
+            self.pending -= 1
+            self._set_busy()
+
+    def _run(self, token, key, work, args, on_done, on_error):
+        try:
+            self._results.put((token, key, on_done, on_error, work(*args), None))
+        except Exception as e:
+            self._results.put((token, key, on_done, on_error, None, e))
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    token, key, on_done, on_error, result, error = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                self.pending -= 1
+                if key is not None:
+                    latest = self._latest.get(key)
+                    if latest is None or latest[0] != token:
+                        continue
+                    del self._latest[key]
+                if error is None:
+                    if on_done:
+                        on_done(result)
+                else:
+                    (on_error or show_db_error)(error)
+        finally:
+            self._set_busy()
+            if self.pending > 0:
+                self.widget.after(RESULT_POLL_MS, self._poll)
+            else:
+                self._polling = False
+
+    def _set_busy(self):
+        if self.on_busy:
+            self.on_busy(self.pending > 0)
+
+
+def show_db_error(error, title="DB Error", prefix="", parent=None):
+    """Reports a failed background job; LookupError carries a validation message."""
+    if parent is not None and not parent.winfo_exists():
+        parent = None
+    if isinstance(error, LookupError):
+        messagebox.showerror("Validation", str(error), parent=parent)
+    elif isinstance(error, db.Offline):
+        messagebox.showinfo("Offline", str(error), parent=parent)
+        show_offline_status()
+    else:
+        messagebox.showerror(title, f"{prefix}{error}", parent=parent)
+
+def alive(widget):
+    """Returns widget if it still exists, else None (used as a messagebox parent after a modal closed)."""
+    return widget if widget.winfo_exists() else None
+
+
+
+def set_busy(busy):
+    if busy and not busy_bar.winfo_ismapped():
+        busy_label.config(text="Loading…")
+        busy_bar.pack(side="left", padx=6)
+        busy_bar.start(15)
+        root.config(cursor="watch")
+    elif not busy and busy_bar.winfo_ismapped():
+        busy_label.config(text="")
+        busy_bar.stop()
+        busy_bar.pack_forget()
+        root.config(cursor="")
+
+
+# --- Offline snapshot ---------------------------------------------------------
+# A local SQLite copy of the tables (snapshot.py) is refreshed in the background.
+# When MySQL is unreachable the app reads from it and queues writes until the
+# server answers again.
 
-def ensure_tables_exist():
-    """Creates the User and News tables with updated schema and foreign key."""
-    conn = get_conn()
-    if not conn:
+def snapshot_enabled():
+    # NEWS_SNAPSHOT= (empty) turns the snapshot off; the SQLite backend is local already.
+    return bool(snapshot.SNAPSHOT_PATH) and db.BACKEND == "mysql"
+
+
+def show_offline_status():
+    synced = snapshot.last_sync(snapshot.SNAPSHOT_PATH)
+    queued = snapshot.pending_count(snapshot.SNAPSHOT_PATH)
+    sync_label.config(text=f"Offline: showing data from {synced:%Y-%m-%d %H:%M}, {queued} change(s) queued",
+                      fg="#e74c3c")
+
+
+def reload_views():
+    """Reloads both tables, first noting the change version that auto_refresh continues from."""
+    entities.clear()
+    searches.clear()
+    changes_view["version"] = None
+
+    def start(version):
+        changes_view["version"] = version
+        # Tabs never shown yet load when they are first opened.
+        if users_view["loaded"]:
+            load_users(users_view["search"])
+        if news_view["loaded"]:
+            load_news(news_view["search"])
+
+    if db.offline():
+        start(None)
         return
-    cur = conn.cursor()
-    
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS User (
-        user_id INT PRIMARY KEY AUTO_INCREMENT,
-        username VARCHAR(100) UNIQUE NOT NULL, 
-        email VARCHAR(100) UNIQUE NOT NULL,
-        age INT,
-        contact_number VARCHAR(20),
-        u_occupation VARCHAR(100)
-    ) ENGINE=InnoDB
-    """)
-   
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS News (
-        news_id INT PRIMARY KEY AUTO_INCREMENT,
-        user_id INT NOT NULL,
-        title VARCHAR(200),
-        body TEXT,
-        created_at DATETIME,
-        FOREIGN KEY (user_id) REFERENCES User(user_id) ON DELETE CASCADE
-    ) ENGINE=InnoDB
-    """)
-    conn.commit()
-    cur.close()
-    conn.close()
-
-def get_user_id_by_username(username):
-    """Utility to look up user_id based on username."""
-    conn = get_conn()
-    if not conn: return None
-    cur = conn.cursor()
-    cur.execute("SELECT user_id FROM User WHERE username = %s", (username,))
-    result = cur.fetchone()
-    cur.close()
-    conn.close()
-    return result[0] if result else None
-
-
-def validate_email(email):
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
-
-
-ensure_tables_exist()
-
-root = tk.Tk()
-root.title("News Blog Management System")
-root.geometry(WINDOW_SIZE)
-root.configure(bg=BG_COLOR)
-
-
-style = ttk.Style()
-style.theme_use('clam')
-style.configure('TFrame', background=BG_COLOR)
-style.configure('TLabelframe', background=FRAME_BG, borderwidth=2, relief='solid')
-style.configure('TLabelframe.Label', background=FRAME_BG, foreground=HEADER_BG, font=('Arial', 10, 'bold'))
-style.configure('TLabel', background=FRAME_BG, foreground='#2c3e50', font=('Arial', 9))
-style.configure('TButton', background=BUTTON_COLOR, foreground='white', font=('Arial', 9, 'bold'), borderwidth=1)
-style.map('TButton', background=[('active', BUTTON_HOVER)])
-style.configure('TEntry', fieldbackground='white', borderwidth=1)
-style.configure('Treeview', background='white', foreground='#2c3e50', fieldbackground='white', font=('Arial', 9))
-style.configure('Treeview.Heading', background=HEADER_BG, foreground=HEADER_FG, font=('Arial', 9, 'bold'))
-style.map('Treeview.Heading', background=[('active', ACCENT_COLOR)])
-style.configure('Danger.TButton', background='#e74c3c', foreground='white') # Define Danger style here
-
-
-main_container = ttk.Frame(root)
-main_container.pack(expand=1, fill="both", padx=6, pady=6)
-
-
-front_page = ttk.Frame(main_container)
-front_page.pack(expand=1, fill="both")
-
-front_label = tk.Label(front_page, text="News Blog Management System", 
-                       font=('Arial', 28, 'bold'), bg=BG_COLOR, fg=HEADER_BG)
-front_label.pack(pady=80)
-
-button_frame = tk.Frame(front_page, bg=BG_COLOR)
-button_frame.pack(pady=20)
+
+    runner.submit(current_version, key="version", on_done=start)
+
+
+def sync_snapshot():
+    """Refreshes the snapshot, or while offline retries MySQL and replays queued writes; reschedules itself."""
+    was_offline = db.offline()
+
+    def done(stats):
+        if was_offline:
+            reload_views()
+            if stats["failures"]:
+                messagebox.showwarning("Offline Changes", "These queued changes could not be saved:\n"
+                                       + "\n".join(stats["failures"]))
+        sync_label.config(text=f"Snapshot synced {datetime.now():%H:%M:%S}", fg=HEADER_BG)
+
+    def failed(error):
+        if not isinstance(error, db.Error):
+            sync_label.config(text=f"Snapshot sync failed: {error}", fg="#e74c3c")
+            return
+        if not db.unreachable(error):
+            # The server answered, so reading the snapshot instead would not help.
+            sync_label.config(text=f"Snapshot sync failed: {error}", fg="#e74c3c")
+            show_db_error(error, prefix="Error syncing the snapshot: ")
+            return
+        if not was_offline and snapshot.exists(snapshot.SNAPSHOT_PATH):
+            db.use_snapshot(snapshot.SNAPSHOT_PATH)
+            reload_views()
+        if db.offline():
+            show_offline_status()
+
+    sync_runner.submit(snapshot.reconnect if was_offline else snapshot.sync, snapshot.SNAPSHOT_PATH,
+                       key="snapshot", on_done=done, on_error=failed)
+    root.after(SNAPSHOT_SYNC_MS, sync_snapshot)
+
+
+# --- Startup -------------------------------------------------------------------
+# The window is drawn before anything touches the database: the schema check
+# runs in the background and each tab loads its data the first time it is shown.
+
+startup_view = {"ready": False, "waiting": [], "times": {}}
+perf.register_source("startup", lambda: dict(startup_view["times"]))
+
+
+def mark(phase):
+    """Records when phase was first reached, in ms since this module started importing."""
+    times = startup_view["times"]
+    if phase not in times:
+        times[phase] = round((time.perf_counter() - STARTED) * 1000, 1)
+
+
+def startup_report():
+    """Returns one line per startup phase: when it was reached and how long it took after the previous one."""
+    lines, previous = [], 0.0
+    for phase, at in startup_view["times"].items():
+        lines.append(f"{phase:<22}{at:>9.1f} ms  (+{at - previous:.1f} ms)")
+        previous = at
+    return lines
+
+
+def when_ready(action):
+    """Runs action now if the startup schema check is done, otherwise as soon as it is."""
+    if startup_view["ready"]:
+        action()
+    else:
+        startup_view["waiting"].append(action)
+
+
+def check_schema():
+    """Worker: applies pending migrations (one query when there are none) and returns the change version."""
+    ensure_tables_exist()
+    return current_version()
+
+
+def startup_done(version):
+    mark("schema_ready")
+    changes_view["version"] = version
+    finish_startup()
+
+
+def startup_failed(error):
+    if not (isinstance(error, db.Error) and db.unreachable(error)
+            and snapshot_enabled() and snapshot.exists(snapshot.SNAPSHOT_PATH)):
+        messagebox.showerror("DB Connection Error", f"Error connecting to MySQL: {error}")
+        root.destroy()
+        return
+    # Browse the last snapshot read-only until the server is reachable again.
+    mark("snapshot_fallback")
+    db.use_snapshot(snapshot.SNAPSHOT_PATH)
+    finish_startup()
+
+
+def finish_startup():
+    """Runs the tab loads that waited for the schema check and starts the background loops."""
+    startup_view["ready"] = True
+    waiting, startup_view["waiting"] = startup_view["waiting"], []
+    for action in waiting:
+        action()
+    root.after(AUTO_REFRESH_MS, auto_refresh)
+    if snapshot_enabled():
+        if db.offline():
+            show_offline_status()
+            root.after(SNAPSHOT_SYNC_MS, sync_snapshot)
+        else:
+            root.after_idle(sync_snapshot)
+    # NEWS_STARTUP_REPORT=1 prints where launch time went.
+    if os.environ.get("NEWS_STARTUP_REPORT"):
+        print("\n".join(startup_report()), file=sys.stderr)
+
 
 def show_users_tab():
     front_page.pack_forget()
     tab_users.pack(expand=1, fill="both")
-    load_users()
+    if not users_view["loaded"]:
+        # Only on first display; auto_refresh keeps the table current afterwards.
+        mark("users_tab_opened")
+        when_ready(lambda: users_view["loaded"] or load_users())
     back_button_users.pack(side="bottom", pady=10)
 
+
 def show_news_tab():
-   
     front_page.pack_forget()
     tab_news.pack(expand=1, fill="both")
-    load_news() 
+    if not news_view["loaded"]:
+        mark("news_tab_opened")
+        when_ready(lambda: news_view["loaded"] or load_news())
     back_button_news.pack(side="bottom", pady=10)
 
+
 def show_front_page():
+    # Running fills pause while their tab is hidden and finish when it is shown again (see fill_treeview).
     tab_users.pack_forget()
     tab_news.pack_forget()
     back_button_users.pack_forget()
     back_button_news.pack_forget()
     front_page.pack(expand=1, fill="both")
 
-users_btn = tk.Button(button_frame, text="Manage Users", font=('Arial', 16, 'bold'),
-                      bg=BUTTON_COLOR, fg='white', width=20, height=3,
-                      relief='raised', borderwidth=3, cursor='hand2',
-                      command=show_users_tab)
-users_btn.grid(row=0, column=0, padx=20, pady=10)
-
-news_btn = tk.Button(button_frame, text="Manage News", font=('Arial', 16, 'bold'),
-                     bg='#27ae60', fg='white', width=20, height=3,
-                     relief='raised', borderwidth=3, cursor='hand2',
-                     command=show_news_tab)
-news_btn.grid(row=0, column=1, padx=20, pady=10)
-
-tab_users = ttk.Frame(main_container)
-tab_news = ttk.Frame(main_container)
-
-back_button_users = tk.Button(tab_users, text="← Back to Home", font=('Arial', 10, 'bold'),
-                              bg='#e74c3c', fg='white', command=show_front_page,
-                              relief='raised', borderwidth=2, cursor='hand2')
-
-back_button_news = tk.Button(tab_news, text="← Back to Home", font=('Arial', 10, 'bold'),
-                             bg='#e74c3c', fg='white', command=show_front_page,
-                             relief='raised', borderwidth=2, cursor='hand2')
 
 
 
@@ -167,203 +337,739 @@ back_button_news = tk.Button(tab_news, text="← Back to Home", font=('Arial', 1
 def search_data(search_term):
     """Unified search for Username, News Title, and News Content."""
     term = search_term.strip()
-    load_users(term)
-    load_news(term)
+    when_ready(lambda: [load_users(term), load_news(term)])
 
 
-search_query_var = tk.StringVar()
+def on_search_typed(*_):
+    """Runs the live search once typing pauses for SEARCH_DEBOUNCE_MS."""
+    if search_view["after"] is not None:
+        root.after_cancel(search_view["after"])
+    search_view["after"] = root.after(SEARCH_DEBOUNCE_MS, run_live_search)
 
- 
-frm_global_search = ttk.LabelFrame(tab_users, text="Search")
-frm_global_search.pack(fill="x", padx=8, pady=6)
-ttk.Label(frm_global_search, text="Search:").grid(row=0, column=0, padx=6, pady=6, sticky="w")
-ttk.Entry(frm_global_search, textvariable=search_query_var, width=50).grid(row=0, column=1, padx=6)
-ttk.Button(frm_global_search, text="Search", command=lambda: search_data(search_query_var.get())).grid(row=0, column=2, padx=8)
-ttk.Button(frm_global_search, text="Clear Search", command=lambda: [search_query_var.set(""), load_users(), load_news()]).grid(row=0, column=3, padx=8)
+
+def run_live_search():
+    search_view["after"] = None
+    term = search_query_var.get().strip()
+    # Skip keystrokes that leave the effective term unchanged (e.g. a trailing space).
+    if term != (users_view["search"] or "") or term != (news_view["search"] or ""):
+        search_data(term)
+
+
+users_view = {"search": None, "order": USER_DEFAULT_ORDER, "filters": {}, "stale": set(), "stats_pending": False,
+              "last": None, "more": False, "loading": False, "loaded": False}
+search_view = {"after": None}
 
 
+# --- Chunked table fills -----------------------------------------------------
+# Large result sets are inserted a batch at a time between Tk events, so the
+# first screenful shows as soon as the query returns and the window stays
+# responsive while the rest goes in.
 
-frm_user_table = ttk.Frame(tab_users)
-frm_user_table.pack(fill="both", expand=1, padx=8, pady=6)
-user_cols = ("username", "email", "age", "contact_number")
-user_table = ttk.Treeview(frm_user_table, columns=user_cols, show="headings", selectmode="browse")
-for c in user_cols:
-    user_table.heading(c, text=c.replace('_', ' ').title())
-    user_table.column(c, width=200, anchor="w")
-user_table.pack(side="left", fill="both", expand=1)
+fills = {}
 
-user_table.bind("<Double-1>", lambda e: open_user_management_modal())
-scr_u = ttk.Scrollbar(frm_user_table, orient="vertical", command=user_table.yview)
-user_table.configure(yscrollcommand=scr_u.set)
-scr_u.pack(side="right", fill="y")
 
-ttk.Button(tab_users, text="Add New User", command=lambda: open_user_management_modal(is_new=True)).pack(pady=10)
+def fill_treeview(key, treeview, rows, values_for, tags_for, on_first=None, on_chunk=None, on_done=None):
+    """Replaces treeview's items with rows: FILL_FIRST_CHUNK at once, then FILL_CHUNK per after() step.
 
+    A new fill under the same key cancels the old one. While the table is not
+    viewable (its tab was left for the front page) the fill pauses instead of
+    writing into it, and goes on when the tab is shown again. on_chunk(items)
+    gets the item ids of every inserted batch; on_first/on_done run after the
+    first and last batch.
+    """
+    cancel_fill(key)
+    children = treeview.get_children()
+    if children:
+        treeview.delete(*children)
+    state = {"widget": treeview, "rows": list(rows), "position": 0, "after": None}
+    fills[key] = state
+
+    def step(count, first=False):
+        state["after"] = None
+        if not treeview.winfo_exists():
+            fills.pop(key, None)
+            return
+        if not treeview.winfo_viewable():
+            state["after"] = treeview.after(FILL_HIDDEN_MS, step, count, first)
+            return
+        start = state["position"]
+        batch = state["rows"][start:start + count]
+        state["position"] = start + len(batch)
+        # Rows dropped by update_pending while they waited are None.
+        items = [treeview.insert("", tk.END, values=values_for(r), tags=tags_for(r))
+                 for r in batch if r is not None]
+        if on_chunk:
+            on_chunk(items)
+        if first and on_first:
+            on_first()
+        if state["position"] < len(state["rows"]):
+            state["after"] = treeview.after(FILL_DELAY_MS, step, FILL_CHUNK)
+        else:
+            if fills.get(key) is state:
+                del fills[key]
+            if on_done:
+                on_done()
+
+    step(FILL_FIRST_CHUNK, first=True)
+
+
+def cancel_fill(key):
+    """Stops a running fill, leaving the rows inserted so far."""
+    state = fills.pop(key, None)
+    if state and state["after"] is not None and state["widget"].winfo_exists():
+        state["widget"].after_cancel(state["after"])
+
+
+def update_pending(key, row_id, row):
+    """Replaces (row) or drops (None) a row a running fill has not inserted yet; True if it was pending."""
+    state = fills.get(key)
+    if state is None:
+        return False
+    rows = state["rows"]
+    for i in range(state["position"], len(rows)):
+        if rows[i] is not None and str(rows[i][0]) == str(row_id):
+            rows[i] = row
+            return True
+    return False
+
+
+def map_pending(key, change):
+    """Applies change(row) -> row or None to every row a running fill has not inserted yet."""
+    state = fills.get(key)
+    if state is None:
+        return
+    rows = state["rows"]
+    for i in range(state["position"], len(rows)):
+        if rows[i] is not None:
+            rows[i] = change(rows[i])
 
 
 def load_users(search_term=None):
-    """Loads all users, optionally filtered by search_term (username)."""
-    for r in user_table.get_children():
-        user_table.delete(r)
-    conn = get_conn()
-    if not conn: return
-    cur = conn.cursor()
-    query = "SELECT user_id, username, email, age, contact_number FROM User"
-    params = []
-    if search_term:
-        query += " WHERE username LIKE %s"
-        params.append("%" + search_term + "%")
-    
-    cur.execute(query, tuple(params))
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    for r in rows:
-        
-        user_table.insert("", tk.END, values=r[1:], tags=(r[0],))
-
-def load_news_for_user(user_id, treeview):
-    """Load news for a specific user into a given Treeview widget (used by modal)."""
-    for r in treeview.get_children():
-        treeview.delete(r)
-    conn = get_conn()
-    if not conn: return
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT N.news_id, N.title, N.body, N.created_at 
-        FROM News N
-        WHERE N.user_id = %s
-        ORDER BY created_at DESC
-    """, (user_id,))
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    for r in rows:
-        n_id, title, body, created_at = r
-        fixed_body = " ".join(body.splitlines())
+    """Loads the first page of users in users_view's order and filters, or the matches for search_term.
+
+    Further pages are appended by on_users_scroll; search results are a single
+    bounded list, sorted and filtered as fetched.
+    """
+    users_view.update(search=search_term or None, loading=True, more=False, loaded=True)
+    order, filters = users_view["order"], users_view["filters"]
+    # Repeated and narrowed terms are answered from the search cache without a query.
+    started = perf.start()
+    rows = cached_user_search(search_term) if search_term else None
+    if rows is not None:
+        runner.cancel("users")
+        rows = order_rows([r for r in rows if user_matches(r, filters)], USER_SORTS, order)
+        show_users((rows, False), started)
+    elif search_term:
+        runner.submit(lambda: (fetch_users(search_term, order, filters), False), key="users",
+                      on_done=lambda result: show_users(result, started), on_error=users_page_failed)
+    else:
+        runner.submit(fetch_users_page, order, filters, key="users",
+                      on_done=lambda result: show_users(result, started), on_error=users_page_failed)
+
+
+def users_page_failed(error):
+    users_view["loading"] = False
+    show_db_error(error)
+
+
+def load_users_page():
+    """Appends the next keyset page of users below the last loaded row."""
+    started = perf.start()
+
+    def show(result):
+        rows, has_more = result
+        users_view.update(more=has_more, loading=False)
+        if rows:
+            users_view["last"] = sort_key(rows[-1], USER_SORTS, users_view["order"])
+        for r in rows:
+            user_table.insert("", tk.END, values=_user_values(r), tags=(r[0],))
+        perf.finish("ui.users_page", started, len(rows))
+
+    runner.submit(fetch_users_page, users_view["order"], users_view["filters"], users_view["last"],
+                  key="users", on_done=show, on_error=users_page_failed)
+
+
+def on_users_scroll(first, last):
+    """Scrollbar callback for user_table that pages in more users near the bottom."""
+    scr_u.set(first, last)
+    if users_view["more"] and not users_view["loading"] and float(last) >= 1 - NEWS_PREFETCH_MARGIN:
+        users_view["loading"] = True
+        root.after_idle(load_users_page)
+
+
+# Sortable headings and their labels; the sort arrow is appended to the label.
+USER_HEADINGS = {"username": "Username", "email": "Email", "age": "Age",
+                 "post_count": "Posts", "last_post_at": "Last Post", "body_bytes": "Text Bytes"}
+NEWS_HEADINGS = {"title": "Title", "created_at": "Created At"}
+DESCENDING_FIRST = {"post_count", "last_post_at", "body_bytes", "created_at"}  # first click shows most/newest first
+
+
+def next_order(order, column):
+    """The order after clicking column's heading: the same column flips, another starts at its natural end."""
+    if order[0] == column:
+        return (column, not order[1])
+    return (column, column in DESCENDING_FIRST)
+
+
+def show_sort_arrows(treeview, headings, order):
+    for column, text in headings.items():
+        arrow = (" ▼" if order[1] else " ▲") if column == order[0] else ""
+        treeview.heading(column, text=text + arrow)
+
+
+def sort_users(column):
+    users_view["order"] = next_order(users_view["order"], column)
+    show_sort_arrows(user_table, USER_HEADINGS, users_view["order"])
+    load_users(users_view["search"])
+
+
+def sort_news(column):
+    news_view["order"] = next_order(news_view["order"], column)
+    show_sort_arrows(news_table, NEWS_HEADINGS, news_view["order"])
+    load_news(news_view["search"])
+
+
+def apply_user_filters(username_var, age_min_var, age_max_var):
+    """Reloads user_table with the filter bar's username/age range (WHERE clauses on indexed columns)."""
+    try:
+        users_view["filters"] = clean_user_filters(username_var.get(), age_min_var.get(), age_max_var.get())
+    except ValueError as e:
+        messagebox.showerror("Validation", str(e))
+        return
+    load_users(users_view["search"])
+
+
+def reset_user_filters(*variables):
+    for var in variables:
+        var.set("")
+    users_view.update(filters={}, order=USER_DEFAULT_ORDER)
+    show_sort_arrows(user_table, USER_HEADINGS, USER_DEFAULT_ORDER)
+    load_users(users_view["search"])
+
+
+def apply_news_filters(username_var, date_from_var, date_to_var):
+    """Reloads news_table with the filter bar's author/date range (WHERE clauses on indexed columns)."""
+    try:
+        news_view["filters"] = clean_news_filters(username_var.get(), date_from_var.get(), date_to_var.get())
+    except ValueError as e:
+        messagebox.showerror("Validation", str(e))
+        return
+    load_news(news_view["search"])
+
+
+def reset_news_filters(*variables):
+    for var in variables:
+        var.set("")
+    news_view.update(filters={}, order=NEWS_DEFAULT_ORDER)
+    show_sort_arrows(news_table, NEWS_HEADINGS, NEWS_DEFAULT_ORDER)
+    load_news(news_view["search"])
+
+
+def refresh_user_stats(user_ids=()):
+    """Re-reads the rows of users whose posts changed so their post statistics stay current.
+
+    One read runs at a time; users whose posts change meanwhile wait in
+    users_view["stale"] and are read together once it is back. The set is
+    only touched on the Tk thread.
+    """
+    stale = users_view["stale"]
+    stale.update(str(u) for u in user_ids if u not in (None, ""))
+    if users_view["stats_pending"] or not stale:
+        return
+    ids = sorted(stale)
+    stale.clear()
+    users_view["stats_pending"] = True
+
+    def done(rows):
+        users_view["stats_pending"] = False
+        for row in rows:
+            apply_user_change(row[0], row)
+        refresh_user_stats()
+
+    def failed(error):
+        users_view["stats_pending"] = False
+        stale.update(ids)  # read again with the next change
+        show_db_error(error)
+
+    runner.submit(fetch_user_rows, ids, on_done=done, on_error=failed)
+
+
+def show_users(result, started=None):
+    rows, has_more = result
+    filling = perf.start()
+    users_view.update(more=has_more, last=sort_key(rows[-1], USER_SORTS, users_view["order"]) if rows else None)
+
+    def done():
+        # Paging stays blocked until the whole page is in the table.
+        users_view["loading"] = False
+        perf.finish("ui.fill_users", filling, len(rows))
+
+    fill_treeview("users", user_table, rows, _user_values, lambda r: (r[0],),
+                  on_first=lambda: [perf.finish("ui.load_users", started, len(rows)), mark("users_shown")],
+                  on_done=done)
+
+
+def _user_values(row):
+    """user_table values for a full user row; the hidden u_occupation column feeds the modal."""
+    return tuple("" if v is None else v for v in row[1:])
+
+
+def _user_news_values(row):
+    n_id, title, body, created_at = row
+    return (title, " ".join(body.splitlines()), created_at)
+
+
+user_news_views = {}
+
+
+def load_news_for_user(user_id, treeview, after=None, on_missing=None):
+    """Loads a page of a user's posts (previews only) into a modal's Treeview.
+
+    The first page arrives together with the user's record in one query
+    (fetch_user_profile); on_missing runs instead if the user no longer exists.
+    Later pages continue after the (created_at, news_id) key of the last row.
+    """
+    key = str(treeview)
+    view = user_news_views.setdefault(key, {"user_id": user_id, "last": None, "more": False, "loading": False})
+    view["loading"] = True
+    started = perf.start()
+
+    def show(result):
+        if not treeview.winfo_exists():
+            user_news_views.pop(key, None)
+            return
+        if after is None:
+            user, (rows, has_more) = result
+            if user is None:
+                if on_missing:
+                    on_missing()
+                return
+        else:
+            rows, has_more = result
+        view.update(more=has_more, loading=False)
+        if rows:
+            view["last"] = (rows[-1][3], rows[-1][0])
         # n_id (hidden) in tags[0]
-        treeview.insert("", tk.END, values=(title, fixed_body, created_at), tags=(n_id,))
+        if after is None:
+            fill_treeview(("user_news", key), treeview, rows, _user_news_values, lambda r: (r[0],),
+                          on_first=lambda: perf.finish("ui.load_news_for_user", started, len(rows)))
+        else:
+            for r in rows:
+                treeview.insert("", tk.END, values=_user_news_values(r), tags=(r[0],))
+            perf.finish("ui.load_news_for_user", started, len(rows))
+
+    def failed(error):
+        view["loading"] = False
+        show_db_error(error, parent=treeview.winfo_toplevel() if treeview.winfo_exists() else None)
+
+    if after is None:
+        runner.submit(fetch_user_profile, user_id, key=("user_news", key), on_done=show, on_error=failed)
+    else:
+        runner.submit(fetch_news_for_user, user_id, after, key=("user_news", key), on_done=show, on_error=failed)
+
+
+def on_user_news_scroll(treeview, scrollbar, first, last):
+    """Scrollbar callback for a modal's news list that pages in older posts near the bottom."""
+    scrollbar.set(first, last)
+    view = user_news_views.get(str(treeview))
+    if view and view["more"] and not view["loading"] and float(last) >= 1 - NEWS_PREFETCH_MARGIN:
+        view["loading"] = True
+        treeview.after_idle(load_news_for_user, view["user_id"], treeview, view["last"])
+
+
+def _news_key(row):
+    return sort_key(row, NEWS_SORTS, news_view["order"])
+
+
+def _news_values(row):
+    n_id, u_id, u_name, title, body, created_at = row
+    return (u_name, title, " ".join(body.splitlines()), created_at)
+
+
+def _news_tags(row):
+    return (row[0], row[1])
+
+
+def _insert_news_rows(rows, index):
+    items = []
+    for r in rows:
+        items.append(news_table.insert("", index, values=_news_values(r), tags=_news_tags(r)))
+        if index != tk.END:
+            index += 1
+    return items
+
 
 def load_news(search_term=None):
-    """Loads all news posts, filtered by search_term (title/body/username)."""
-    for r in news_table.get_children():
-        news_table.delete(r)
-    conn = get_conn()
-    if not conn: return
-    cur = conn.cursor()
-    
-    query = """
-        SELECT N.news_id, N.user_id, U.username, N.title, N.body, N.created_at 
-        FROM News N
-        LEFT JOIN User U ON N.user_id = U.user_id
+    """Loads the newest page of news posts, or the ranked matches for search_term (title/body/username).
+
+    Further pages are fetched by on_news_scroll as the user scrolls the table;
+    search results are a single bounded page and are not paged.
     """
-    params = []
-    
-    if search_term:
-        query += " WHERE N.title LIKE %s OR N.body LIKE %s OR U.username LIKE %s"
-        params.extend(["%" + search_term + "%"] * 3)
-    
-    # Order by creation date descending
-    query += " ORDER BY N.created_at DESC"
+    news_view.update(loading=True, loaded=True, search=search_term or None)
+    order, filters = news_view["order"], news_view["filters"]
+    started = perf.start()
+
+    def arrange(rows):
+        # Search results are one bounded list, so they are filtered and sorted here.
+        return order_rows([r for r in rows if news_matches(r, filters)], NEWS_SORTS, order), False
+
+    def done(result):
+        show_news(result, started)
+
+    rows = cached_news_search(search_term) if search_term else None
+    if rows is not None:
+        runner.cancel("news")
+        done(arrange(rows))
+    elif search_term:
+        runner.submit(lambda: arrange(find_news(search_term)), key="news",
+                      on_done=done, on_error=news_page_failed)
+    else:
+        runner.submit(lambda: fetch_news_page(order=order, filters=filters), key="news",
+                      on_done=done, on_error=news_page_failed)
 
-    cur.execute(query, tuple(params))
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    for r in rows:
-        n_id, u_id, u_name, title, body, created_at = r
-        fixed_body = " ".join(body.splitlines())
-      
-        news_table.insert("", tk.END, values=(u_name, title, fixed_body, created_at), tags=(n_id, u_id))
 
+def show_news(result, started=None):
+    rows, has_more = result
+    filling = perf.start()
+    news_view.update(pages=[], more_before=False, more_after=has_more)
+    page = {"items": [], "first": None, "last": None}
+    if rows:
+        page.update(first=_news_key(rows[0]), last=_news_key(rows[-1]))
+        news_view["pages"].append(page)
 
+    def done():
+        # Paging stays blocked until the whole page is in the table.
+        news_view["loading"] = False
+        perf.finish("ui.fill_news", filling, len(rows))
 
+    fill_treeview("news", news_table, rows, _news_values, _news_tags,
+                  on_first=lambda: [perf.finish("ui.load_news", started, len(rows)), mark("news_shown")],
+                  on_chunk=page["items"].extend, on_done=done)
 
-def add_user_modal(modal, name_var, email_var, age_var, contact_var, occ_var):
-    name = name_var.get().strip()
-    email = email_var.get().strip()
-    age_text = age_var.get().strip()
-    occ = occ_var.get().strip()
-    contact = contact_var.get().strip()
-    
-    if not name or not email:
-        messagebox.showerror("Validation", "Name and Email are required.", parent=modal)
+
+def load_news_page(direction):
+    """Extends the news window by one page past its bottom ("after") or top ("before").
+
+    Once more than NEWS_WINDOW_PAGES pages are loaded, the page at the opposite end
+    is dropped, so the table holds a bounded window around the viewport.
+    """
+    news_view["pending"] = False
+    pages = news_view["pages"]
+    if news_view["loading"] or not pages:
         return
-    if not validate_email(email):
-        messagebox.showerror("Validation", "Invalid email address.", parent=modal)
+    news_view["loading"] = True
+    started = perf.start()
+    keys = {"after": pages[-1]["last"]} if direction == "after" else {"before": pages[0]["first"]}
+    order, filters = news_view["order"], news_view["filters"]
+    runner.submit(lambda: fetch_news_page(order=order, filters=filters, **keys), key="news",
+                  on_done=lambda result: show_news_page(direction, result, started),
+                  on_error=news_page_failed)
+
+
+def news_page_failed(error):
+    news_view["loading"] = False
+    show_db_error(error)
+
+
+def show_news_page(direction, result, started=None):
+    rows, has_more = result
+    pages = news_view["pages"]
+    news_view["loading"] = False
+    count = len(news_table.get_children())
+    top_index = round(news_table.yview()[0] * count)
+    if direction == "after":
+        news_view["more_after"] = has_more
+        if not rows:
+            return
+        pages.append({"items": _insert_news_rows(rows, tk.END),
+                      "first": _news_key(rows[0]), "last": _news_key(rows[-1])})
+        if len(pages) > NEWS_WINDOW_PAGES:
+            dropped = pages.pop(0)
+            news_table.delete(*dropped["items"])
+            news_view["more_before"] = True
+            top_index -= len(dropped["items"])
+    else:
+        news_view["more_before"] = has_more
+        if not rows:
+            return
+        pages.insert(0, {"items": _insert_news_rows(rows, 0),
+                         "first": _news_key(rows[0]), "last": _news_key(rows[-1])})
+        top_index += len(rows)
+        if len(pages) > NEWS_WINDOW_PAGES:
+            dropped = pages.pop()
+            news_table.delete(*dropped["items"])
+            news_view["more_after"] = True
+    # Keep the rows the user was looking at in place after the window shifted.
+    count = len(news_table.get_children())
+    if count:
+        news_table.yview_moveto(max(top_index, 0) / count)
+    perf.finish("ui.news_page", started, len(rows))
+
+
+def on_news_scroll(first, last):
+    """Scrollbar callback for news_table that pages in rows near either edge of the window."""
+    scr_n.set(first, last)
+    if news_view["loading"] or news_view["pending"]:
         return
-    try:
-        age_val = int(age_text) if age_text != "" else None
-    except ValueError:
-        messagebox.showerror("Validation", "Age must be an integer.", parent=modal)
+    if float(last) >= 1 - NEWS_PREFETCH_MARGIN and news_view["more_after"]:
+        direction = "after"
+    elif float(first) <= NEWS_PREFETCH_MARGIN and news_view["more_before"]:
+        direction = "before"
+    else:
         return
-        
-    conn = get_conn()
-    if not conn: return
-    cur = conn.cursor()
-    try:
-        cur.execute("INSERT INTO User (username, email, age, u_occupation, contact_number) VALUES (%s, %s, %s, %s, %s)",
-                    (name, email, age_val, occ, contact))
-        conn.commit()
-        messagebox.showinfo("Success", "User added successfully.", parent=modal)
-    except Error as e:
-        messagebox.showerror("DB Error", f"Error adding user: {e}", parent=modal)
-    finally:
-        cur.close()
-        conn.close()
-        load_users()
+    news_view["pending"] = True
+    root.after_idle(load_news_page, direction)
 
-def update_user_modal(modal, u_id, name_var, email_var, age_var, contact_var, occ_var):
-    name = name_var.get().strip()
-    email = email_var.get().strip()
-    age_text = age_var.get().strip()
-    occ = occ_var.get().strip()
-    contact = contact_var.get().strip()
-    
-    if not name or not email:
-        messagebox.showerror("Validation", "Name and Email are required.", parent=modal)
+
+
+# --- Incremental updates -----------------------------------------------------
+# After a single-row write, only the affected Treeview items are touched; the
+# ids stored in item tags (news_id/user_id) locate them.
+
+def find_items(treeview, value, position=0):
+    """Returns the items whose tags[position] equals value (tags double as an id index)."""
+    return [iid for iid in treeview.tag_has(str(value))
+            if str(treeview.item(iid, "tags")[position]) == str(value)]
+
+
+def _forget_news_items(items):
+    """Removes news_table items and drops them from the paging window bookkeeping."""
+    if not items:
         return
-    if not validate_email(email):
-        messagebox.showerror("Validation", "Invalid email address.", parent=modal)
+    gone = set(items)
+    for page in news_view["pages"]:
+        # In place: a page still being filled keeps extending this same list (see show_news).
+        page["items"][:] = [iid for iid in page["items"] if iid not in gone]
+    if not news_view["loading"]:
+        news_view["pages"] = [page for page in news_view["pages"] if page["items"]]
+    news_table.delete(*items)
+
+
+def apply_news_change(news_id, row, authors=()):
+    """Reflects one inserted, updated (row) or deleted (row=None) post in news_table.
+
+    The post's old and new authors, plus any extra authors given, get their
+    user_table statistics refreshed.
+    """
+    items = find_items(news_table, news_id)
+    refresh_user_stats([news_table.item(iid, "tags")[1] for iid in items] + [row and row[1], *authors])
+    _apply_news_row(news_id, row, items)
+
+
+def _apply_news_row(news_id, row, items):
+    if not items and update_pending("news", news_id, row):
         return
-    try:
-        age_val = int(age_text) if age_text != "" else None
-    except ValueError:
-        messagebox.showerror("Validation", "Age must be an integer.", parent=modal)
+    if row is None:
+        _forget_news_items(items)
+    elif items:
+        news_table.item(items[0], values=_news_values(row), tags=_news_tags(row))
+    elif (news_view["search"] is None and not news_view["more_before"]
+          and news_view["order"] == NEWS_DEFAULT_ORDER and news_matches(row, news_view["filters"])):
+        # A new post is the newest one, so it belongs at the top of the first page.
+        iid = _insert_news_rows([row], 0)[0]
+        pages = news_view["pages"]
+        if pages:
+            pages[0]["items"].insert(0, iid)
+            pages[0]["first"] = _news_key(row)
+        else:
+            pages.append({"items": [iid], "first": _news_key(row), "last": _news_key(row)})
+
+
+def apply_user_news_change(treeview, news_id, row):
+    """Reflects one post change in a user modal's news list; row is a news_table-shaped row or None."""
+    if not treeview.winfo_exists():
         return
+    items = find_items(treeview, news_id)
+    n_id, u_id, u_name, title, body, created_at = row or (news_id, None, None, None, None, None)
+    if not items and update_pending(("user_news", str(treeview)), news_id,
+                                    row and (n_id, title, body, created_at)):
+        return
+    if row is None:
+        if items:
+            treeview.delete(*items)
+        return
+    values = (title, " ".join(body.splitlines()), created_at)
+    if items:
+        treeview.item(items[0], values=values)
+    else:
+        treeview.insert("", 0, values=values, tags=(n_id,))
+
+
+def apply_user_change(user_id, row):
+    """Reflects one inserted, updated (row) or deleted (row=None) user in user_table and news_table."""
+    items = find_items(user_table, user_id)
+    authored = find_items(news_table, user_id, position=1)
+    pending = not items and update_pending("users", user_id, row)
+    # Rows a running news fill has yet to insert follow the same change.
+    map_pending("news", lambda r: r if str(r[1]) != str(user_id) else
+                (None if row is None else r[:2] + (row[1],) + r[3:]))
+    if row is None:
+        if items:
+            user_table.delete(*items)
+        # ON DELETE CASCADE removed the user's posts as well.
+        _forget_news_items(authored)
+        return
+    if items:
+        user_table.item(items[0], values=_user_values(row))
+    elif (users_view["search"] is None and not pending and not users_view["more"]
+          and users_view["order"] == USER_DEFAULT_ORDER and user_matches(row, users_view["filters"])):
+        # New users have the highest user_id, so they belong after the last page.
+        user_table.insert("", tk.END, values=_user_values(row), tags=(row[0],))
+    for iid in authored:
+        values = list(news_table.item(iid, "values"))
+        values[0] = row[1]
+        news_table.item(iid, values=values)
+
+
+def selected_ids(treeview):
+    """Returns the ids (tags[0]) of every selected item."""
+    return [treeview.item(iid, "tags")[0] for iid in treeview.selection() if treeview.item(iid, "tags")]
+
+
+def apply_news_batch(news_ids, rows, authors=()):
+    """Reflects a batch write in news_table: ids with a row in rows are updated, the rest removed."""
+    by_id = {str(r[0]): r for r in rows}
+    gone = []
+    touched = set(authors) | {r[1] for r in rows}
+    for n_id in news_ids:
+        row = by_id.get(str(n_id))
+        items = find_items(news_table, n_id)
+        touched.update(news_table.item(iid, "tags")[1] for iid in items)
+        if not items:
+            update_pending("news", n_id, row)
+        elif row is None:
+            gone.extend(items)
+        else:
+            news_table.item(items[0], values=_news_values(row), tags=_news_tags(row))
+    _forget_news_items(gone)
+    refresh_user_stats(touched)
+
+
+def apply_user_news_batch(treeview, user_id, news_ids, rows):
+    """Reflects a batch write in a user modal's news list; posts moved to another user leave it."""
+    if not treeview.winfo_exists():
+        return
+    by_id = {str(r[0]): r for r in rows}
+    for n_id in news_ids:
+        row = by_id.get(str(n_id))
+        if row is not None and str(row[1]) != str(user_id):
+            row = None
+        apply_user_news_change(treeview, n_id, row)
+
+
+
+
 
-    conn = get_conn()
-    if not conn: return
-    cur = conn.cursor()
+# --- Auto-refresh -------------------------------------------------------------
+# Every AUTO_REFRESH_MS the rows changed since the last seen version (by anyone,
+# including this window) are fetched and applied like local edits.
+
+changes_view = {"version": None}
+
+
+def apply_changes(changes):
+    """Applies a news_service.fetch_changes result to user_table and news_table."""
+    if changes["reset"]:
+        reload_views()
+        return
+    changed = False
+    for row in changes["users"]:
+        entities.invalidate("user", row[0])
+        apply_user_change(row[0], row)
+        changed = True
+    for user_id in changes["deleted_users"]:
+        entities.invalidate("user", user_id)
+        apply_user_change(user_id, None)
+        changed = True
+    pages = news_view["pages"]
+    for row in changes["news"]:
+        entities.invalidate("news", row[0])
+        changed = True
+        items = find_items(news_table, row[0])
+        if (not items and pages and news_view["order"] == NEWS_DEFAULT_ORDER
+                and _news_key(row) <= pages[0]["first"]):
+            # An edit to a post outside the loaded window; only newer posts go on top.
+            update_pending("news", row[0], row)
+            continue
+        _apply_news_row(row[0], row, items)
+    for news_id in changes["deleted_news"]:
+        entities.invalidate("news", news_id)
+        _apply_news_row(news_id, None, find_items(news_table, news_id))
+        changed = True
+    if changed:
+        searches.clear()
+    changes_view["version"] = changes["version"]
+
+
+def auto_refresh():
+    """Pulls the changes since changes_view["version"] in the background; reschedules itself."""
+    root.after(AUTO_REFRESH_MS, auto_refresh)
+    if db.offline() or changes_view["version"] is None:
+        return
+    since = changes_view["version"]
+
+    def done(changes):
+        # A reload started meanwhile owns the version now.
+        if changes_view["version"] == since:
+            apply_changes(changes)
+
+    # Connection problems are reported by sync_snapshot; a failed pull is simply retried.
+    refresh_runner.submit(fetch_changes, since, key="changes", on_done=done, on_error=lambda error: None)
+
+
+def read_user_form(modal, name_var, email_var, age_var, contact_var, occ_var):
+    """Validates the user form; returns (name, email, age, occupation, contact) or None."""
     try:
-        cur.execute("UPDATE User SET username=%s, email=%s, age=%s, u_occupation=%s, contact_number=%s WHERE user_id=%s",
-                    (name, email, age_val, occ, contact, u_id))
-        conn.commit()
-        messagebox.showinfo("Success", "User updated successfully.", parent=modal)
-    except Error as e:
-        messagebox.showerror("DB Error", f"Error updating user: {e}", parent=modal)
-    finally:
-        cur.close()
-        conn.close()
-        load_users()
+        return clean_user_fields(name_var.get(), email_var.get(), age_var.get(),
+                                 occ_var.get(), contact_var.get())
+    except ValueError as e:
+        messagebox.showerror("Validation", str(e), parent=modal)
+        return None
+
+def add_user_modal(modal, name_var, email_var, age_var, contact_var, occ_var):
+    fields = read_user_form(modal, name_var, email_var, age_var, contact_var, occ_var)
+    if fields is None:
+        return
+        
+    def work():
+        return fetch_user_row(insert_user(*fields))
+
+    def done(row):
+        apply_user_change(row[0], row)
+        messagebox.showinfo("Success", "User added successfully.", parent=alive(modal))
+
+    runner.submit(work, on_done=done,
+                  on_error=lambda e: show_db_error(e, prefix="Error adding user: ", parent=modal))
+
+
+def update_user_modal(modal, u_id, name_var, email_var, age_var, contact_var, occ_var):
+    fields = read_user_form(modal, name_var, email_var, age_var, contact_var, occ_var)
+    if fields is None:
+        return
+
+    def work():
+        update_user(u_id, *fields)
+        return fetch_user_row(u_id)
+
+    def done(row):
+        apply_user_change(u_id, row)
+        messagebox.showinfo("Success", "User updated successfully.", parent=alive(modal))
+
+    runner.submit(work, on_done=done,
+                  on_error=lambda e: show_db_error(e, prefix="Error updating user: ", parent=modal))
+
 
 def delete_user_modal(u_id):
     if not messagebox.askyesno("Confirm Deletion", "Are you sure you want to delete this user and ALL their news posts?"):
         return
-    conn = get_conn()
-    if not conn: return
-    cur = conn.cursor()
-    try:
-        cur.execute("DELETE FROM User WHERE user_id=%s", (u_id,))
-        conn.commit()
+
+    def done(_):
+        apply_user_change(u_id, None)
         messagebox.showinfo("Success", "User and associated news deleted.")
-    except Error as e:
-        messagebox.showerror("DB Error", f"Error deleting user: {e}")
-    finally:
-        cur.close()
-        conn.close()
-        load_users()
-        load_news()
+
+    runner.submit(delete_user, u_id, on_done=done,
+                  on_error=lambda e: show_db_error(e, prefix="Error deleting user: "))
+
 
 def open_user_management_modal(is_new=False):
     """Opens the Toplevel window for user management (CRUD & News by User)."""
@@ -396,18 +1102,8 @@ def open_user_management_modal(is_new=False):
     m_email_var = tk.StringVar(value=initial_data[1] if not is_new else "")
     m_age_var = tk.StringVar(value=str(initial_data[2]) if initial_data[2] else "")
     m_contact_var = tk.StringVar(value=initial_data[3] if not is_new else "")
-    
- 
-    m_occ_var = tk.StringVar()
-    if not is_new:
-        conn = get_conn()
-        if conn:
-            cur = conn.cursor()
-            cur.execute("SELECT u_occupation FROM User WHERE user_id = %s", (u_id,))
-            full_data = cur.fetchone()
-            m_occ_var.set(full_data[0] if full_data and full_data[0] else "")
-            cur.close()
-            conn.close()
+    # user_table rows carry the full record, so nothing needs re-reading here.
+    m_occ_var = tk.StringVar(value=initial_data[4] if not is_new else "")
 
     
     frm_container = ttk.Frame(modal)
@@ -451,7 +1147,7 @@ def open_user_management_modal(is_new=False):
 
        
         news_cols_modal = ("title", "body", "created_at")
-        user_news_table = ttk.Treeview(frm_user_news, columns=news_cols_modal, show="headings", selectmode="browse")
+        user_news_table = ttk.Treeview(frm_user_news, columns=news_cols_modal, show="headings", selectmode="extended")
         
         for c in news_cols_modal:
             user_news_table.heading(c, text=c.replace('_', ' ').title())
@@ -462,7 +1158,8 @@ def open_user_management_modal(is_new=False):
 
         
         scr_u_news = ttk.Scrollbar(frm_user_news, orient="vertical", command=user_news_table.yview)
-        user_news_table.configure(yscrollcommand=scr_u_news.set)
+        user_news_table.configure(
+            yscrollcommand=lambda first, last: on_user_news_scroll(user_news_table, scr_u_news, first, last))
 
        
         user_news_table.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
@@ -471,7 +1168,11 @@ def open_user_management_modal(is_new=False):
         frm_user_news.grid_rowconfigure(0, weight=1)
         frm_user_news.grid_columnconfigure(0, weight=1)
         
-        load_news_for_user(u_id, user_news_table)
+        def user_missing():
+            messagebox.showerror("Not Found", "This user no longer exists.", parent=modal)
+            modal.destroy()
+
+        load_news_for_user(u_id, user_news_table, on_missing=user_missing)
         
        
         btn_news_modal = ttk.Frame(frm_container)
@@ -490,6 +1191,12 @@ def open_user_management_modal(is_new=False):
         
         ttk.Button(btn_sub_frame, text="Delete Selected News", 
                    command=lambda: delete_news_modal(user_news_table, u_id)).grid(row=0, column=2, padx=5, pady=5) 
+
+        ttk.Button(btn_sub_frame, text="Reassign Selected…",
+                   command=lambda: reassign_selected_news(user_news_table, u_id)).grid(row=0, column=3, padx=5, pady=5)
+
+        ttk.Button(btn_sub_frame, text="Find & Replace…",
+                   command=lambda: replace_in_selected_news(user_news_table, u_id)).grid(row=0, column=4, padx=5, pady=5)
         
       
         modal.update_idletasks() 
@@ -500,6 +1207,7 @@ def open_user_management_modal(is_new=False):
 
 
 
+
 def open_news_form_modal(user_news_table, u_id, username, is_edit=False):
     """Opens a sub-modal for adding/editing news within the User Management Modal."""
     
@@ -523,17 +1231,11 @@ def open_news_form_modal(user_news_table, u_id, username, is_edit=False):
         item = user_news_table.item(sel[0])
         n_id = item["tags"][0]
         
-       
-        conn = get_conn()
-        if conn:
-            cur = conn.cursor()
-            cur.execute("SELECT title, body FROM News WHERE news_id = %s", (n_id,))
-            data = cur.fetchone()
-            cur.close()
-            conn.close()
-            if data:
+        def fill(data):
+            if data and news_modal.winfo_exists():
                 news_m_title_var.set(data[0])
                 news_m_body_text.insert("1.0", data[1])
+        runner.submit(fetch_news_post, n_id, on_done=fill)
     
     ttk.Label(news_modal, text=f"User: {username}").pack(padx=10, pady=5, anchor="w")
     ttk.Label(news_modal, text="Title").pack(padx=10, pady=2, anchor="w")
@@ -546,115 +1248,138 @@ def open_news_form_modal(user_news_table, u_id, username, is_edit=False):
     else:
         ttk.Button(news_modal, text="Add Post", command=lambda: [add_news_modal(news_modal, user_news_table, u_id, news_m_title_var, news_m_body_text), news_modal.destroy()]).pack(pady=10)
 
+
 def add_news_modal(modal, treeview, u_id, title_var, body_text):
-    """Adds news from the sub-modal and REFRESHES DISPLAY (Modal and Main)."""
-    title = title_var.get().strip()
-    body = body_text.get("1.0", "end").rstrip("\n")
-    if not title or not body:
-        messagebox.showerror("Validation", "Title and body are required.", parent=modal)
-        return
-    conn = get_conn()
-    if not conn: return
-    cur = conn.cursor()
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    cur.execute("INSERT INTO News (user_id, title, body, created_at) VALUES (%s, %s, %s, %s)",
-                (u_id, title, body, now))
-    conn.commit()
-    cur.close()
-    conn.close()
-    load_news_for_user(u_id, treeview) 
-    load_news()                        
+    """Adds news from the sub-modal and UPDATES THE AFFECTED ROWS (Modal and Main)."""
+    try:
+        title, body = clean_news_fields(title_var.get(), body_text.get("1.0", "end"))
+    except ValueError as e:
+        messagebox.showerror("Validation", str(e), parent=modal)
+        return
+    def work():
+        return fetch_news_row(insert_news(u_id, title, body))
+
+    def done(row):
+        apply_user_news_change(treeview, row[0], row)
+        apply_news_change(row[0], row)
+
+    runner.submit(work, on_done=done)
+
 
 def update_news_modal(modal, treeview, n_id, u_id, title_var, body_text):
-    """Updates news from the sub-modal and REFRESHES DISPLAY (Modal and Main)."""
-    title = title_var.get().strip()
-    body = body_text.get("1.0", "end").rstrip("\n")
-    if not title or not body:
-        messagebox.showerror("Validation", "Title and body are required.", parent=modal)
-        return
-    conn = get_conn()
-    if not conn: return
-    cur = conn.cursor()
-    cur.execute("UPDATE News SET title=%s, body=%s WHERE news_id=%s",
-                (title, body, n_id))
-    conn.commit()
-    cur.close()
-    conn.close()
-    load_news_for_user(u_id, treeview) 
-    load_news()                        
+    """Updates news from the sub-modal and UPDATES THE AFFECTED ROWS (Modal and Main)."""
+    try:
+        title, body = clean_news_fields(title_var.get(), body_text.get("1.0", "end"))
+    except ValueError as e:
+        messagebox.showerror("Validation", str(e), parent=modal)
+        return
+    def work():
+        update_news_post(n_id, title, body)
+        return fetch_news_row(n_id)
+
+    def done(row):
+        apply_user_news_change(treeview, n_id, row)
+        apply_news_change(n_id, row)
+
+    runner.submit(work, on_done=done)
+
 
 def delete_news_modal(treeview, u_id):
-    """Deletes news from the modal's news list and REFRESHES DISPLAY (Modal and Main)."""
-    sel = treeview.selection()
-    if not sel:
+    """Deletes the selected news from the modal's news list and REMOVES ITS ROWS (Modal and Main)."""
+    ids = selected_ids(treeview)
+    if not ids:
         messagebox.showerror("Select", "Select news to delete.")
         return
-    item = treeview.item(sel[0])
-    n_id = item["tags"][0]
             
-    if not messagebox.askyesno("Confirm", "Delete selected news?"):
-        return
-    conn = get_conn()
-    if not conn: return
-    cur = conn.cursor()
-    cur.execute("DELETE FROM News WHERE news_id=%s", (n_id,))
-    conn.commit()
-    cur.close()
-    conn.close()
-    
-    load_news_for_user(u_id, treeview)
-    load_news()
+    if not messagebox.askyesno("Confirm", confirm_text("Delete", ids, "news post")):
+        return
+    runner.submit(delete_news_posts, ids,
+                  on_done=lambda _: [apply_user_news_batch(treeview, u_id, ids, []), apply_news_batch(ids, [], (u_id,))])
 
 
+def confirm_text(verb, ids, noun):
+    return f"{verb} selected {noun}?" if len(ids) == 1 else f"{verb} the {len(ids)} selected {noun}s?"
 
-news_username_var = tk.StringVar()
-news_title_var = tk.StringVar()
-news_body_text = tk.Text(tab_news, height=12, wrap="word", bg='white', fg='#2c3e50', 
-                         font=('Arial', 9), borderwidth=2, relief='solid')
 
-frm_news_form = ttk.LabelFrame(tab_news, text="News Form")
-frm_news_form.pack(fill="x", padx=8, pady=6)
-ttk.Label(frm_news_form, text="Username").grid(row=0, column=0, padx=6, pady=4, sticky="w") 
-ttk.Label(frm_news_form, text="Title").grid(row=0, column=2, padx=6, pady=4, sticky="w")
-ttk.Entry(frm_news_form, textvariable=news_username_var, width=16).grid(row=0, column=1, padx=6)
+def reassign_selected_news(treeview, u_id=None):
+    """Moves the selected posts to another user in one statement; u_id is set for a user modal's list."""
+    ids = selected_ids(treeview)
+    if not ids:
+        messagebox.showerror("Select", "Select news to reassign.")
+        return
+    parent = treeview.winfo_toplevel()
+    username = simpledialog.askstring("Reassign", f"Move {len(ids)} post(s) to username:", parent=parent)
+    if not username or not username.strip():
+        return
 
-ttk.Entry(frm_news_form, textvariable=news_title_var, width=70).grid(row=0, column=3, padx=6) 
+    def work():
+        reassign_news_posts(ids, require_user_id(username.strip()))
+        return fetch_news_rows(ids)
 
-news_body_label = tk.Label(tab_news, text="News Body", bg=FRAME_BG, fg='#2c3e50', font=('Arial', 9))
-news_body_label.pack(anchor="w", padx=12)
-news_body_text.pack(fill="x", padx=12, pady=6)
+    def done(rows):
+        apply_news_batch(ids, rows, (u_id,))
+        if u_id is not None:
+            apply_user_news_batch(treeview, u_id, ids, rows)
 
+    runner.submit(work, on_done=done,
+                  on_error=lambda e: show_db_error(e, prefix="Error reassigning news: ", parent=parent))
 
-btn_frame_n = ttk.Frame(frm_news_form)
-btn_frame_n.grid(row=1, column=0, columnspan=4, pady=8)
-ttk.Button(btn_frame_n, text="Add News", command=lambda: add_news()).grid(row=0, column=0, padx=6)
-ttk.Button(btn_frame_n, text="Update", command=lambda: update_news()).grid(row=0, column=1, padx=6)
-ttk.Button(btn_frame_n, text="Delete", command=lambda: delete_news()).grid(row=0, column=2, padx=6)
-ttk.Button(btn_frame_n, text="Show All News", command=lambda: [load_news(), clear_news_form()]).grid(row=0, column=3, padx=6)
 
-# News Table (List all news posts)
-frm_news_table = ttk.Frame(tab_news)
-frm_news_table.pack(fill="both", expand=1, padx=8, pady=6)
-news_cols = ("username", "title", "body", "created_at")
-news_table = ttk.Treeview(frm_news_table, columns=news_cols, show="headings", selectmode="browse")
-for c in news_cols:
-    news_table.heading(c, text=c.replace('_', ' ').title())
-    if c == "body":
-        news_table.column(c, width=400)
-    else:
-        news_table.column(c, width=150, anchor="w")
+def replace_in_selected_news(treeview, u_id=None):
+    """Find & replace across the selected posts' titles and bodies in one statement."""
+    ids = selected_ids(treeview)
+    if not ids:
+        messagebox.showerror("Select", "Select news to edit.")
+        return
+    parent = treeview.winfo_toplevel()
+    find = simpledialog.askstring("Find & Replace", f"Text to find in {len(ids)} post(s):", parent=parent)
+    if not find:
+        return
+    replace = simpledialog.askstring("Find & Replace", f"Replace \"{find}\" with:", parent=parent)
+    if replace is None:
+        return
+
+    def work():
+        replace_in_news_posts(ids, find, replace)
+        return fetch_news_rows(ids)
+
+    def done(rows):
+        apply_news_batch(ids, rows, (u_id,))
+        if u_id is not None:
+            apply_user_news_batch(treeview, u_id, ids, rows)
+
+    runner.submit(work, on_done=done,
+                  on_error=lambda e: show_db_error(e, prefix="Error editing news: ", parent=parent))
+
+
+def delete_selected_users():
+    """Deletes every selected user (and their posts) in one transaction."""
+    ids = selected_ids(user_table)
+    if not ids:
+        messagebox.showerror("Select", "Select users to delete.")
+        return
+    if not messagebox.askyesno("Confirm Deletion", confirm_text("Delete", ids, "user") + " All their news posts are deleted too."):
+        return
+
+    def done(_):
+        for u_id in ids:
+            apply_user_change(u_id, None)
+
+    runner.submit(delete_users, ids, on_done=done,
+                  on_error=lambda e: show_db_error(e, prefix="Error deleting users: "))
+
+
+# News Table (windowed list of news posts, paged in while scrolling)
+news_view = {"search": None, "pages": [], "more_before": False, "more_after": False,
+             "loading": False, "pending": False, "order": NEWS_DEFAULT_ORDER, "filters": {}, "loaded": False}
 
-news_table.pack(side="left", fill="both", expand=1)
-news_table.bind("<<TreeviewSelect>>", lambda e: on_news_select())
-scr_n = ttk.Scrollbar(frm_news_table, orient="vertical", command=news_table.yview)
-news_table.configure(yscrollcommand=scr_n.set)
-scr_n.pack(side="right", fill="y")
 
 def clear_news_form():
     news_username_var.set("")
     news_title_var.set("")
     news_body_text.delete("1.0", "end")
 
+
 def add_news():
     """Handles adding news from the main News tab using username lookup."""
     username = news_username_var.get().strip()
@@ -665,33 +1390,26 @@ def add_news():
         messagebox.showerror("Validation", "Please enter username, title, and body.")
         return
         
-    u_id = get_user_id_by_username(username)
-    if u_id is None:
-        messagebox.showerror("Validation", f"User '{username}' does not exist.")
-        return
-        
-    conn = get_conn()
-    if not conn: return
-    cur = conn.cursor()
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    try:
-        cur.execute("INSERT INTO News (user_id, title, body, created_at) VALUES (%s, %s, %s, %s)",
-                    (u_id, title, body, now))
-        conn.commit()
-    except Error as e:
-        messagebox.showerror("DB Error", f"Error adding news: {e}")
-    finally:
-        cur.close()
-        conn.close()
-    
-   
-    load_news() 
-    clear_news_form()
+    def work():
+        return fetch_news_row(insert_news(require_user_id(username), title, body))
+
+    def done(row):
+        apply_news_change(row[0], row)
+        clear_news_form()
+
+    runner.submit(work, on_done=done,
+                  on_error=lambda e: show_db_error(e, prefix="Error adding news: "))
+
 
 def on_news_select():
     """Populates the News Form when an item is selected in the main news table."""
     sel = news_table.selection()
     if not sel: return
+    if len(sel) > 1:
+        # Several posts selected: the form edits one post at a time.
+        runner.cancel("news_select")
+        clear_news_form()
+        return
     item = news_table.item(sel[0])
     values = item["values"]
     u_name, title, body_preview, created_at = values
@@ -702,19 +1420,21 @@ def on_news_select():
     
     news_username_var.set(u_name)
     news_title_var.set(title)
+    started = perf.start()
     
-   
-    conn = get_conn()
-    if conn:
-        cur = conn.cursor()
-        cur.execute("SELECT body FROM News WHERE news_id = %s", (n_id,))
-        full_body = cur.fetchone()
-        cur.close()
-        conn.close()
-        
+    def show_body(data):
         news_body_text.delete("1.0", "end")
-        if full_body:
-            news_body_text.insert("1.0", full_body[0])
+        if data:
+            news_body_text.insert("1.0", data[1])
+        perf.finish("ui.news_select", started, 1 if data else 0)
+
+    cached = entities.get("news", n_id)
+    if cached is not None:
+        runner.cancel("news_select")
+        show_body((cached["title"], cached["body"]))
+    else:
+        runner.submit(fetch_news_post, n_id, key="news_select", on_done=show_body)
+
 
 def update_news():
     """Handles updating news from the main News tab."""
@@ -722,6 +1442,9 @@ def update_news():
     if not sel:
         messagebox.showerror("Select", "Select news to update.")
         return
+    if len(sel) > 1:
+        messagebox.showerror("Select", "Select a single post to update, or use Reassign / Find & Replace.")
+        return
     item = news_table.item(sel[0])
     
    
@@ -736,59 +1459,304 @@ def update_news():
          messagebox.showerror("Validation", "All fields are required.")
          return
     
-    u_id = get_user_id_by_username(username)
-    if u_id is None:
-        messagebox.showerror("Validation", f"User '{username}' does not exist.")
-        return
-        
-    conn = get_conn()
-    if not conn: return
-    cur = conn.cursor()
-    try:
-        cur.execute("UPDATE News SET user_id=%s, title=%s, body=%s WHERE news_id=%s",
-                    (u_id, title_val, body_val, n_id))
-        conn.commit()
-    except Error as e:
-        messagebox.showerror("DB Error", f"Error updating news: {e}")
-    finally:
-        cur.close()
-        conn.close()
-    
-    load_news()
-    clear_news_form()
+    def work():
+        update_news_post(n_id, title_val, body_val, user_id=require_user_id(username))
+        return fetch_news_row(n_id)
+
+    def done(row):
+        apply_news_change(n_id, row)
+        clear_news_form()
+
+    runner.submit(work, on_done=done,
+                  on_error=lambda e: show_db_error(e, prefix="Error updating news: "))
+
 
 def delete_news():
-    """Handles deleting news from the main News tab."""
-    sel = news_table.selection()
-    if not sel:
+    """Handles deleting the selected news from the main News tab."""
+    ids = selected_ids(news_table)
+    if not ids:
         messagebox.showerror("Select", "Select news to delete.")
         return
-    item = news_table.item(sel[0])
     
-   
-    if not item["tags"]: return 
-    n_id = item["tags"][0]
-    
-    if not messagebox.askyesno("Confirm", "Delete selected news?"):
+    if not messagebox.askyesno("Confirm", confirm_text("Delete", ids, "news post")):
         return
-    conn = get_conn()
-    if not conn: return
-    cur = conn.cursor()
-    try:
-        cur.execute("DELETE FROM News WHERE news_id=%s", (n_id,))
-        conn.commit()
-    except Error as e:
-        messagebox.showerror("DB Error", f"Error deleting news: {e}")
-    finally:
-        cur.close()
-        conn.close()
     
-    
-    load_news()
-    clear_news_form()
+    def done(_):
+        apply_news_batch(ids, [])
+        clear_news_form()
+
+    runner.submit(delete_news_posts, ids, on_done=done,
+                  on_error=lambda e: show_db_error(e, prefix="Error deleting news: "))
+
+
+def open_perf_panel():
+    """Opens the diagnostics window: live timing histograms plus pool and cache counters."""
+    panel = tk.Toplevel(root)
+    panel.title("Diagnostics")
+    panel.geometry("900x460")
+    panel.configure(bg=BG_COLOR)
+
+    enabled_var = tk.BooleanVar(value=perf.enabled)
+    controls = ttk.Frame(panel)
+    controls.pack(fill="x", padx=8, pady=6)
+    ttk.Checkbutton(controls, text="Record timings", variable=enabled_var,
+                    command=lambda: perf.enable(enabled_var.get())).pack(side="left", padx=4)
+    ttk.Button(controls, text="Reset", command=lambda: [perf.reset(), refresh()]).pack(side="left", padx=4)
+    ttk.Button(controls, text="Save JSON…", command=lambda: save_perf_dump(panel)).pack(side="left", padx=4)
+
+    cols = ("metric", "count", "mean_ms", "p50_ms", "p95_ms", "max_ms", "rows", "bytes")
+    table = ttk.Treeview(panel, columns=cols, show="headings")
+    for c in cols:
+        table.heading(c, text=c.replace('_', ' '))
+        table.column(c, width=220 if c == "metric" else 85, anchor="w" if c == "metric" else "e")
+    table.pack(fill="both", expand=1, padx=8)
+    sources_label = tk.Label(panel, text="", bg=BG_COLOR, fg=HEADER_BG, font=('Arial', 9),
+                             justify="left", anchor="w")
+    sources_label.pack(fill="x", padx=8, pady=6)
+
+    def refresh():
+        if not panel.winfo_exists():
+            return
+        data = perf.snapshot()
+        table.delete(*table.get_children())
+        for name, stats in data["metrics"].items():
+            table.insert("", tk.END, values=(name,) + tuple(stats[c] for c in cols[1:]))
+        sources_label.config(text="\n".join(
+            f"{name}: " + ", ".join(f"{k}={v}" for k, v in counters.items())
+            for name, counters in data["sources"].items()))
+
+    def tick():
+        if panel.winfo_exists():
+            refresh()
+            panel.after(PERF_REFRESH_MS, tick)
+
+    tick()
+
+
+def save_perf_dump(parent):
+    path = filedialog.asksaveasfilename(parent=parent, defaultextension=".json",
+                                        filetypes=[("JSON", "*.json"), ("JSON lines log", "*.log")])
+    if path:
+        try:
+            perf.dump(path)
+        except OSError as e:
+            messagebox.showerror("Diagnostics", f"Could not save: {e}", parent=parent)
+
+
+def build_main_window():
+    """Creates the root window, its styles and both management tabs."""
+    global root, runner, busy_label, busy_bar, front_page, tab_users, tab_news
+    global back_button_users, back_button_news, user_table, news_table, scr_n, scr_u, sync_runner, sync_label
+    global refresh_runner
+    global news_username_var, news_title_var, news_body_text, search_query_var
+
+    root = tk.Tk()
+    root.title("News Blog Management System")
+    root.geometry(WINDOW_SIZE)
+    root.configure(bg=BG_COLOR)
+
+
+    style = ttk.Style()
+    style.theme_use('clam')
+    style.configure('TFrame', background=BG_COLOR)
+    style.configure('TLabelframe', background=FRAME_BG, borderwidth=2, relief='solid')
+    style.configure('TLabelframe.Label', background=FRAME_BG, foreground=HEADER_BG, font=('Arial', 10, 'bold'))
+    style.configure('TLabel', background=FRAME_BG, foreground='#2c3e50', font=('Arial', 9))
+    style.configure('TButton', background=BUTTON_COLOR, foreground='white', font=('Arial', 9, 'bold'), borderwidth=1)
+    style.map('TButton', background=[('active', BUTTON_HOVER)])
+    style.configure('TEntry', fieldbackground='white', borderwidth=1)
+    style.configure('Treeview', background='white', foreground='#2c3e50', fieldbackground='white', font=('Arial', 9))
+    style.configure('Treeview.Heading', background=HEADER_BG, foreground=HEADER_FG, font=('Arial', 9, 'bold'))
+    style.map('Treeview.Heading', background=[('active', ACCENT_COLOR)])
+    style.configure('Danger.TButton', background='#e74c3c', foreground='white') # Define Danger style here
+
+
+    # Status bar with a busy indicator while background work is pending
+    status_bar = tk.Frame(root, bg=BG_COLOR)
+    status_bar.pack(side="bottom", fill="x", padx=6)
+    busy_label = tk.Label(status_bar, text="", bg=BG_COLOR, fg=HEADER_BG, font=('Arial', 9))
+    busy_label.pack(side="left")
+    busy_bar = ttk.Progressbar(status_bar, mode="indeterminate", length=120)
+    tk.Button(status_bar, text="Diagnostics", font=('Arial', 8), bg=BG_COLOR, fg=HEADER_BG,
+              relief='flat', cursor='hand2', command=open_perf_panel).pack(side="right")
+    root.bind("<F12>", lambda e: open_perf_panel())
+    sync_label = tk.Label(status_bar, text="", bg=BG_COLOR, fg=HEADER_BG, font=('Arial', 9))
+    sync_label.pack(side="right", padx=8)
+
+    runner = BackgroundRunner(root, on_busy=set_busy)
+    # Snapshot syncs get their own thread so a long copy never holds up the views.
+    sync_runner = BackgroundRunner(root, workers=1)
+    refresh_runner = BackgroundRunner(root, workers=1)
+
+
+    main_container = ttk.Frame(root)
+    main_container.pack(expand=1, fill="both", padx=6, pady=6)
+
+
+    front_page = ttk.Frame(main_container)
+    front_page.pack(expand=1, fill="both")
+
+    front_label = tk.Label(front_page, text="News Blog Management System", 
+                           font=('Arial', 28, 'bold'), bg=BG_COLOR, fg=HEADER_BG)
+    front_label.pack(pady=80)
+
+    button_frame = tk.Frame(front_page, bg=BG_COLOR)
+    button_frame.pack(pady=20)
+
+    users_btn = tk.Button(button_frame, text="Manage Users", font=('Arial', 16, 'bold'),
+                          bg=BUTTON_COLOR, fg='white', width=20, height=3,
+                          relief='raised', borderwidth=3, cursor='hand2',
+                          command=show_users_tab)
+    users_btn.grid(row=0, column=0, padx=20, pady=10)
+
+    news_btn = tk.Button(button_frame, text="Manage News", font=('Arial', 16, 'bold'),
+                         bg='#27ae60', fg='white', width=20, height=3,
+                         relief='raised', borderwidth=3, cursor='hand2',
+                         command=show_news_tab)
+    news_btn.grid(row=0, column=1, padx=20, pady=10)
 
+    tab_users = ttk.Frame(main_container)
+    tab_news = ttk.Frame(main_container)
 
-load_users()
-load_news()
+    back_button_users = tk.Button(tab_users, text="← Back to Home", font=('Arial', 10, 'bold'),
+                                  bg='#e74c3c', fg='white', command=show_front_page,
+                                  relief='raised', borderwidth=2, cursor='hand2')
 
-root.mainloop()
\ No newline at end of file
+    back_button_news = tk.Button(tab_news, text="← Back to Home", font=('Arial', 10, 'bold'),
+                                 bg='#e74c3c', fg='white', command=show_front_page,
+                                 relief='raised', borderwidth=2, cursor='hand2')
+
+
+    search_query_var = tk.StringVar()
+
+ 
+    frm_global_search = ttk.LabelFrame(tab_users, text="Search")
+    frm_global_search.pack(fill="x", padx=8, pady=6)
+    ttk.Label(frm_global_search, text="Search:").grid(row=0, column=0, padx=6, pady=6, sticky="w")
+    ttk.Entry(frm_global_search, textvariable=search_query_var, width=50).grid(row=0, column=1, padx=6)
+    ttk.Button(frm_global_search, text="Search", command=lambda: search_data(search_query_var.get())).grid(row=0, column=2, padx=8)
+    ttk.Button(frm_global_search, text="Clear Search", command=lambda: [search_query_var.set(""), load_users(), load_news()]).grid(row=0, column=3, padx=8)
+    search_query_var.trace_add("write", on_search_typed)
+
+
+
+    # Filters become WHERE clauses on indexed columns; headings sort with an indexed ORDER BY.
+    frm_user_filter = ttk.LabelFrame(tab_users, text="Filter Users")
+    frm_user_filter.pack(fill="x", padx=8, pady=4)
+    f_username_var, f_age_min_var, f_age_max_var = tk.StringVar(), tk.StringVar(), tk.StringVar()
+    ttk.Label(frm_user_filter, text="Username").grid(row=0, column=0, padx=6, pady=4)
+    ttk.Entry(frm_user_filter, textvariable=f_username_var, width=20).grid(row=0, column=1, padx=6)
+    ttk.Label(frm_user_filter, text="Age from").grid(row=0, column=2, padx=6)
+    ttk.Entry(frm_user_filter, textvariable=f_age_min_var, width=5).grid(row=0, column=3, padx=6)
+    ttk.Label(frm_user_filter, text="to").grid(row=0, column=4, padx=6)
+    ttk.Entry(frm_user_filter, textvariable=f_age_max_var, width=5).grid(row=0, column=5, padx=6)
+    ttk.Button(frm_user_filter, text="Apply",
+               command=lambda: apply_user_filters(f_username_var, f_age_min_var, f_age_max_var)).grid(row=0, column=6, padx=6)
+    ttk.Button(frm_user_filter, text="Reset",
+               command=lambda: reset_user_filters(f_username_var, f_age_min_var, f_age_max_var)).grid(row=0, column=7, padx=6)
+
+    frm_user_table = ttk.Frame(tab_users)
+    frm_user_table.pack(fill="both", expand=1, padx=8, pady=6)
+    user_cols = ("username", "email", "age", "contact_number", "u_occupation", "post_count", "last_post_at", "body_bytes")
+    user_table = ttk.Treeview(frm_user_table, columns=user_cols,
+                              displaycolumns=user_cols[:4] + ("post_count", "last_post_at", "body_bytes"),
+                              show="headings", selectmode="extended")
+    for c in user_cols:
+        user_table.heading(c, text=c.replace('_', ' ').title())
+        user_table.column(c, width=200, anchor="w")
+    for column, text in USER_HEADINGS.items():
+        user_table.heading(column, text=text, command=lambda column=column: sort_users(column))
+    user_table.column("post_count", width=100, anchor="e")
+    user_table.column("last_post_at", width=140)
+    user_table.column("body_bytes", width=100, anchor="e")
+    user_table.pack(side="left", fill="both", expand=1)
+
+    user_table.bind("<Double-1>", lambda e: open_user_management_modal())
+    scr_u = ttk.Scrollbar(frm_user_table, orient="vertical", command=user_table.yview)
+    user_table.configure(yscrollcommand=on_users_scroll)
+    scr_u.pack(side="right", fill="y")
+
+    btn_frame_u = ttk.Frame(tab_users)
+    btn_frame_u.pack(pady=10)
+    ttk.Button(btn_frame_u, text="Add New User", command=lambda: open_user_management_modal(is_new=True)).grid(row=0, column=0, padx=6)
+    ttk.Button(btn_frame_u, text="Delete Selected Users", style='Danger.TButton',
+               command=lambda: delete_selected_users()).grid(row=0, column=1, padx=6)
+
+
+
+    news_username_var = tk.StringVar()
+    news_title_var = tk.StringVar()
+    news_body_text = tk.Text(tab_news, height=12, wrap="word", bg='white', fg='#2c3e50', 
+                             font=('Arial', 9), borderwidth=2, relief='solid')
+
+    frm_news_form = ttk.LabelFrame(tab_news, text="News Form")
+    frm_news_form.pack(fill="x", padx=8, pady=6)
+    ttk.Label(frm_news_form, text="Username").grid(row=0, column=0, padx=6, pady=4, sticky="w") 
+    ttk.Label(frm_news_form, text="Title").grid(row=0, column=2, padx=6, pady=4, sticky="w")
+    ttk.Entry(frm_news_form, textvariable=news_username_var, width=16).grid(row=0, column=1, padx=6)
+
+    ttk.Entry(frm_news_form, textvariable=news_title_var, width=70).grid(row=0, column=3, padx=6) 
+
+    news_body_label = tk.Label(tab_news, text="News Body", bg=FRAME_BG, fg='#2c3e50', font=('Arial', 9))
+    news_body_label.pack(anchor="w", padx=12)
+    news_body_text.pack(fill="x", padx=12, pady=6)
+
+
+    btn_frame_n = ttk.Frame(frm_news_form)
+    btn_frame_n.grid(row=1, column=0, columnspan=4, pady=8)
+    ttk.Button(btn_frame_n, text="Add News", command=lambda: add_news()).grid(row=0, column=0, padx=6)
+    ttk.Button(btn_frame_n, text="Update", command=lambda: update_news()).grid(row=0, column=1, padx=6)
+    ttk.Button(btn_frame_n, text="Delete", command=lambda: delete_news()).grid(row=0, column=2, padx=6)
+    ttk.Button(btn_frame_n, text="Reassign…", command=lambda: reassign_selected_news(news_table)).grid(row=0, column=3, padx=6)
+    ttk.Button(btn_frame_n, text="Find & Replace…", command=lambda: replace_in_selected_news(news_table)).grid(row=0, column=4, padx=6)
+    ttk.Button(btn_frame_n, text="Show All News", command=lambda: [load_news(), clear_news_form()]).grid(row=0, column=5, padx=6)
+    frm_news_filter = ttk.LabelFrame(tab_news, text="Filter News")
+    frm_news_filter.pack(fill="x", padx=8, pady=4)
+    f_author_var, f_from_var, f_to_var = tk.StringVar(), tk.StringVar(), tk.StringVar()
+    ttk.Label(frm_news_filter, text="Author").grid(row=0, column=0, padx=6, pady=4)
+    ttk.Entry(frm_news_filter, textvariable=f_author_var, width=16).grid(row=0, column=1, padx=6)
+    ttk.Label(frm_news_filter, text="From (YYYY-MM-DD)").grid(row=0, column=2, padx=6)
+    ttk.Entry(frm_news_filter, textvariable=f_from_var, width=11).grid(row=0, column=3, padx=6)
+    ttk.Label(frm_news_filter, text="To").grid(row=0, column=4, padx=6)
+    ttk.Entry(frm_news_filter, textvariable=f_to_var, width=11).grid(row=0, column=5, padx=6)
+    ttk.Button(frm_news_filter, text="Apply",
+               command=lambda: apply_news_filters(f_author_var, f_from_var, f_to_var)).grid(row=0, column=6, padx=6)
+    ttk.Button(frm_news_filter, text="Reset",
+               command=lambda: reset_news_filters(f_author_var, f_from_var, f_to_var)).grid(row=0, column=7, padx=6)
+
+    frm_news_table = ttk.Frame(tab_news)
+    frm_news_table.pack(fill="both", expand=1, padx=8, pady=6)
+    news_cols = ("username", "title", "body", "created_at")
+    news_table = ttk.Treeview(frm_news_table, columns=news_cols, show="headings", selectmode="extended")
+    for c in news_cols:
+        news_table.heading(c, text=c.replace('_', ' ').title())
+        if c == "body":
+            news_table.column(c, width=400)
+        else:
+            news_table.column(c, width=150, anchor="w")
+    for column, text in NEWS_HEADINGS.items():
+        news_table.heading(column, text=text, command=lambda column=column: sort_news(column))
+    show_sort_arrows(news_table, NEWS_HEADINGS, NEWS_DEFAULT_ORDER)
+
+    news_table.pack(side="left", fill="both", expand=1)
+    news_table.bind("<<TreeviewSelect>>", lambda e: on_news_select())
+    scr_n = ttk.Scrollbar(frm_news_table, orient="vertical", command=news_table.yview)
+    news_table.configure(yscrollcommand=on_news_scroll)
+    scr_n.pack(side="right", fill="y")
+
+
+def main():
+    mark("imports")
+    # NEWS_PERF_DUMP=path saves the timings collected during the session on exit.
+    dump_path = os.environ.get("NEWS_PERF_DUMP")
+    if dump_path:
+        atexit.register(perf.dump, dump_path)
+    build_main_window()
+    mark("window_built")
+    root.after_idle(mark, "first_paint")
+    runner.submit(check_schema, key="startup", on_done=startup_done, on_error=startup_failed)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
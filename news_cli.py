@@ -0,0 +1,300 @@
+"""Command-line access to the news blog database, without starting the GUI.
+
+    python news_cli.py init-db
+    python news_cli.py users list --search ali
+    python news_cli.py users list --limit 500 --json
+    python news_cli.py users top --limit 10
+    python news_cli.py users add alice alice@example.com --age 30
+    python news_cli.py users list --sort age --age-min 18 --age-max 30
+    python news_cli.py news list --limit 20 --json
+    python news_cli.py news list --sort title --direction asc --from 2024-01-01
+    python news_cli.py news add alice --title "Hello" --body-file post.txt
+    python news_cli.py search "election results"
+    python news_cli.py changes --since 1200
+    python news_cli.py --sqlite blog.db init-db
+"""
+import argparse
+import json
+import sys
+from datetime import date, datetime
+
+import db
+import news_service as svc
+
+
+USER_COLUMNS = ("user_id", "username", "email", "age", "contact_number", "u_occupation",
+                "post_count", "last_post_at", "body_bytes")
+NEWS_COLUMNS = ("news_id", "user_id", "username", "title", "preview", "created_at")
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat(sep=" ") if isinstance(value, datetime) else value.isoformat()
+    return value
+
+
+def emit(rows, columns, as_json):
+    """Prints row tuples as JSON lines or as tab-separated text."""
+    for row in rows:
+        values = [_plain(v) for v in row]
+        if as_json:
+            print(json.dumps(dict(zip(columns, values)), ensure_ascii=False))
+        else:
+            print("\t".join("" if v is None else str(v).replace("\n", " ") for v in values))
+
+
+def emit_record(record, as_json):
+    """Prints one dict record as JSON or as "key: value" lines."""
+    record = {k: _plain(v) for k, v in record.items()}
+    if as_json:
+        print(json.dumps(record, ensure_ascii=False))
+    else:
+        for key, value in record.items():
+            print(f"{key}: {'' if value is None else value}")
+
+
+def read_body(args):
+    if args.body_file == "-":
+        return sys.stdin.read()
+    if args.body_file:
+        with open(args.body_file, encoding="utf-8") as f:
+            return f.read()
+    return args.body
+
+
+def require_user(username):
+    user = svc.get_user(svc.require_user_id(username))
+    if user is None:
+        raise LookupError(f"User '{username}' does not exist.")
+    return user
+
+
+def require_news(news_id):
+    news = svc.get_news(news_id)
+    if news is None:
+        raise LookupError(f"News post {news_id} does not exist.")
+    return news
+
+
+def cmd_init_db(args):
+    applied = svc.ensure_tables_exist()
+    print(f"Applied migrations: {', '.join(map(str, applied))}." if applied else "Schema is up to date.")
+
+
+def cmd_users_list(args):
+    filters = svc.clean_user_filters(age_min=args.age_min, age_max=args.age_max)
+    order = (args.sort, args.direction == "desc")
+    if args.search:
+        emit(svc.fetch_users(args.search, order, filters)[:args.limit], USER_COLUMNS, args.json)
+        return
+    # Keyset pages, printed as they arrive, so memory stays flat however many users there are.
+    after, left = None, args.limit
+    while left is None or left > 0:
+        rows, more = svc.fetch_users_page(order, filters, after, min(left or svc.USERS_PAGE_SIZE, svc.USERS_PAGE_SIZE))
+        emit(rows, USER_COLUMNS, args.json)
+        if not more:
+            break
+        after = svc.sort_key(rows[-1], svc.USER_SORTS, order)
+        left = None if left is None else left - len(rows)
+
+
+def cmd_users_top(args):
+    emit(svc.top_authors(args.limit), USER_COLUMNS, args.json)
+
+
+def cmd_users_show(args):
+    emit_record(require_user(args.username), args.json)
+
+
+def cmd_users_add(args):
+    fields = svc.clean_user_fields(args.username, args.email, args.age, args.occupation, args.contact)
+    emit([svc.fetch_user_row(svc.insert_user(*fields))], USER_COLUMNS, args.json)
+
+
+def cmd_users_update(args):
+    user = require_user(args.username)
+
+    def pick(new, old):
+        return old if new is None else new
+
+    fields = svc.clean_user_fields(
+        pick(args.new_username, user["username"]),
+        pick(args.email, user["email"]),
+        pick(args.age, "" if user["age"] is None else user["age"]),
+        pick(args.occupation, user["u_occupation"]),
+        pick(args.contact, user["contact_number"]),
+    )
+    svc.update_user(user["user_id"], *fields)
+    emit([svc.fetch_user_row(user["user_id"])], USER_COLUMNS, args.json)
+
+
+def cmd_users_delete(args):
+    user = require_user(args.username)
+    svc.delete_user(user["user_id"])
+    print(f"Deleted user '{args.username}' and their news posts.")
+
+
+def cmd_news_list(args):
+    if args.user:
+        svc.require_user_id(args.user)
+    filters = svc.clean_news_filters(args.user, args.date_from, args.date_to)
+    rows, _ = svc.fetch_news_page(limit=args.limit, order=(args.sort, args.direction == "desc"), filters=filters)
+    emit(rows, NEWS_COLUMNS, args.json)
+
+
+def cmd_news_show(args):
+    emit_record(require_news(args.news_id), args.json)
+
+
+def cmd_news_add(args):
+    user_id = svc.require_user_id(args.username)
+    title, body = svc.clean_news_fields(args.title, read_body(args) or "")
+    emit([svc.fetch_news_row(svc.insert_news(user_id, title, body))], NEWS_COLUMNS, args.json)
+
+
+def cmd_news_update(args):
+    news = require_news(args.news_id)
+    body = read_body(args)
+    title, body = svc.clean_news_fields(
+        news["title"] if args.title is None else args.title,
+        news["body"] if body is None else body,
+    )
+    user_id = svc.require_user_id(args.author) if args.author else None
+    svc.update_news_post(args.news_id, title, body, user_id=user_id)
+    emit([svc.fetch_news_row(args.news_id)], NEWS_COLUMNS, args.json)
+
+
+def cmd_news_delete(args):
+    if len(args.news_id) == 1:
+        require_news(args.news_id[0])
+    deleted = svc.delete_news_posts(args.news_id)
+    print(f"Deleted {deleted} news post(s).")
+
+
+def cmd_search(args):
+    if not args.news_only:
+        emit(svc.search_users(args.term, args.limit), USER_COLUMNS, args.json)
+    emit(svc.search_news(args.term, args.limit), NEWS_COLUMNS, args.json)
+
+
+def cmd_changes(args):
+    changes = svc.fetch_changes(args.since)
+    if changes["reset"]:
+        print(f"Too many changes since version {args.since}; reload everything. Current version: {changes['version']}",
+              file=sys.stderr)
+        return
+    emit(changes["users"], USER_COLUMNS, args.json)
+    emit(changes["news"], NEWS_COLUMNS, args.json)
+    emit([("user", u) for u in changes["deleted_users"]] + [("news", n) for n in changes["deleted_news"]],
+         ("deleted", "id"), args.json)
+    print(f"Version: {changes['version']}", file=sys.stderr)
+
+
+def cmd_prune_tombstones(args):
+    print(f"Pruned {svc.prune_tombstones(args.days)} deletion record(s).")
+
+
+def _body_args(parser):
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--body")
+    group.add_argument("--body-file", help="read the body from a file, or '-' for stdin")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Manage the news blog database from the command line.")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per line")
+    parser.add_argument("--sqlite", metavar="PATH", help="use the SQLite database at PATH instead of MySQL")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("init-db", help="create missing tables and indexes").set_defaults(func=cmd_init_db)
+
+    users = sub.add_parser("users", help="list and edit users").add_subparsers(dest="action", required=True)
+    p = users.add_parser("list")
+    p.add_argument("--search", help="only usernames starting with this text")
+    p.add_argument("--sort", choices=sorted(svc.USER_SORTS), default=svc.USER_DEFAULT_ORDER[0])
+    p.add_argument("--direction", choices=("asc", "desc"), default="asc")
+    p.add_argument("--age-min", default="")
+    p.add_argument("--age-max", default="")
+    p.add_argument("--limit", type=int, default=None, help="print at most this many users (default: all)")
+    p.set_defaults(func=cmd_users_list)
+    p = users.add_parser("top", help="users with the most posts")
+    p.add_argument("--limit", type=int, default=10)
+    p.set_defaults(func=cmd_users_top)
+    p = users.add_parser("show")
+    p.add_argument("username")
+    p.set_defaults(func=cmd_users_show)
+    p = users.add_parser("add")
+    p.add_argument("username")
+    p.add_argument("email")
+    p.add_argument("--age", default="")
+    p.add_argument("--occupation", default="")
+    p.add_argument("--contact", default="")
+    p.set_defaults(func=cmd_users_add)
+    p = users.add_parser("update", help="change only the fields given")
+    p.add_argument("username")
+    p.add_argument("--new-username")
+    p.add_argument("--email")
+    p.add_argument("--age")
+    p.add_argument("--occupation")
+    p.add_argument("--contact")
+    p.set_defaults(func=cmd_users_update)
+    p = users.add_parser("delete", help="delete a user and all their posts")
+    p.add_argument("username")
+    p.set_defaults(func=cmd_users_delete)
+
+    news = sub.add_parser("news", help="list and edit news posts").add_subparsers(dest="action", required=True)
+    p = news.add_parser("list", help="newest posts first unless --sort says otherwise, body previews only")
+    p.add_argument("--user", help="only posts by this username")
+    p.add_argument("--from", dest="date_from", default="", help="posts created on or after YYYY-MM-DD")
+    p.add_argument("--to", dest="date_to", default="", help="posts created on or before YYYY-MM-DD")
+    p.add_argument("--sort", choices=sorted(svc.NEWS_SORTS), default=svc.NEWS_DEFAULT_ORDER[0])
+    p.add_argument("--direction", choices=("asc", "desc"), default="desc")
+    p.add_argument("--limit", type=int, default=svc.NEWS_PAGE_SIZE)
+    p.set_defaults(func=cmd_news_list)
+    p = news.add_parser("show", help="one post with its full body")
+    p.add_argument("news_id", type=int)
+    p.set_defaults(func=cmd_news_show)
+    p = news.add_parser("add")
+    p.add_argument("username")
+    p.add_argument("--title", required=True)
+    _body_args(p)
+    p.set_defaults(func=cmd_news_add)
+    p = news.add_parser("update", help="change only the fields given")
+    p.add_argument("news_id", type=int)
+    p.add_argument("--title")
+    p.add_argument("--author", help="move the post to this username")
+    _body_args(p)
+    p.set_defaults(func=cmd_news_update)
+    p = news.add_parser("delete", help="delete one or more posts in one transaction")
+    p.add_argument("news_id", type=int, nargs="+")
+    p.set_defaults(func=cmd_news_delete)
+
+    p = sub.add_parser("search", help="search usernames and news titles/bodies")
+    p.add_argument("term")
+    p.add_argument("--limit", type=int, default=svc.SEARCH_LIMIT)
+    p.add_argument("--news-only", action="store_true")
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("changes", help="users and posts changed or deleted after a change version")
+    p.add_argument("--since", type=int, default=0)
+    p.set_defaults(func=cmd_changes)
+    p = sub.add_parser("prune-tombstones", help="forget deletions older than --days")
+    p.add_argument("--days", type=int, default=svc.TOMBSTONE_DAYS)
+    p.set_defaults(func=cmd_prune_tombstones)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.sqlite:
+        db.use_backend("sqlite", args.sqlite)
+    try:
+        args.func(args)
+    except (db.Error, OSError, LookupError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
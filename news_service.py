@@ -0,0 +1,964 @@
+"""Data access and validation for the news blog, with no Tk dependency.
+
+Every function here borrows a pooled connection from db.py and raises
+db.Error (mysql.connector.Error) on database failures, so it can be called from
+the GUI's background workers, from news_cli.py or from any script. The queries
+are MySQL's; db.py adapts them for the SQLite backend and snapshot.
+"""
+from datetime import datetime, timedelta
+import functools
+import re
+
+import db
+import perf
+import schema
+import snapshot
+from cache import entities, searches
+
+
+NEWS_PAGE_SIZE = 100        # default rows per keyset page of the news list
+NEWS_PREVIEW_CHARS = schema.NEWS_PREVIEW_CHARS  # body characters in the stored News.preview column
+USER_NEWS_PAGE_SIZE = 50    # posts per page in a user's profile
+USERS_PAGE_SIZE = 200       # rows per keyset page of the users list
+BATCH_IN_LIMIT = 1000       # ids per IN (...) list in batch operations
+
+CHANGES_LIMIT = 5000        # most changed rows fetch_changes returns before asking for a full reload
+TOMBSTONE_DAYS = 30         # deletions older than this are pruned by prune_tombstones
+
+SEARCH_LIMIT = 200          # most results a search returns per table
+FULLTEXT_MIN_TOKEN = 3      # matches InnoDB's default innodb_ft_min_token_size
+
+# Counters shown next to the timings in perf.snapshot() and the diagnostics window.
+perf.register_source("pool", lambda: db.get_pool().snapshot())
+perf.register_source("entity_cache", entities.snapshot)
+perf.register_source("search_cache", searches.snapshot)
+
+
+def queue_offline(fn):
+    """Write decorator: while db reads from the snapshot, the call is queued for snapshot.replay() instead."""
+    @functools.wraps(fn)
+    def inner(*args, **kwargs):
+        if db.offline():
+            snapshot.queue_write(fn.__name__, args, kwargs, db.snapshot_path())
+            raise db.Offline(msg="The database server is unreachable. The change was queued "
+                                 "and will be saved when the connection is back.")
+        return fn(*args, **kwargs)
+    return inner
+
+
+def ensure_tables_exist():
+    """Brings the schema up to date (see schema.py) and returns the migration versions applied."""
+    return schema.migrate()
+
+
+USER_FIELDS = "user_id, username, email, age, contact_number, u_occupation"
+NEWS_FIELDS = "news_id, user_id, title, body, created_at"
+# User list rows: the record plus its materialized post statistics (see schema.add_user_stats).
+USER_ROW_FIELDS = USER_FIELDS + ", post_count, last_post_at, body_bytes"
+
+# Sortable list columns: name -> (SQL column, position of its value in a list row). Every one
+# has an index ending in the row id (see schema.py), so ORDER BY column, id LIMIT n reads a range.
+# An order is a (name, descending) pair.
+USER_SORTS = {
+    "user_id": ("user_id", 0),
+    "username": ("username", 1),
+    "email": ("email", 2),
+    "age": ("age", 3),
+    "post_count": ("post_count", 6),
+    "last_post_at": ("last_post_at", 7),
+    "body_bytes": ("body_bytes", 8),
+}
+NEWS_SORTS = {
+    "created_at": ("N.created_at", 5),
+    "title": ("N.title", 3),
+}
+USER_DEFAULT_ORDER = ("user_id", False)
+NEWS_DEFAULT_ORDER = ("created_at", True)
+
+def get_user_id_by_username(username):
+    """Utility to look up user_id based on username (served from the entity cache when possible)."""
+    u_id = entities.user_id_for(username)
+    if u_id is not None:
+        return u_id
+    with db.cursor(dictionary=True) as cur:
+        cur.execute(f"SELECT {USER_FIELDS} FROM User WHERE username = %s", (username,))
+        user = cur.fetchone()
+    if user is None:
+        return None
+    entities.put("user", user["user_id"], user)
+    return user["user_id"]
+
+@perf.timed("svc.get_user")
+def get_user(user_id):
+    """Returns the full User record as a dict, from the entity cache when possible."""
+    user = entities.get("user", user_id)
+    if user is None:
+        with db.cursor(dictionary=True) as cur:
+            cur.execute(f"SELECT {USER_FIELDS} FROM User WHERE user_id = %s", (user_id,))
+            user = cur.fetchone()
+        if user is not None:
+            entities.put("user", user_id, user)
+    return user
+
+@perf.timed("svc.get_news")
+def get_news(news_id):
+    """Returns the full News record as a dict, from the entity cache when possible."""
+    news = entities.get("news", news_id)
+    if news is None:
+        with db.cursor(dictionary=True) as cur:
+            cur.execute(f"SELECT {NEWS_FIELDS} FROM News WHERE news_id = %s", (news_id,))
+            news = cur.fetchone()
+        if news is not None:
+            entities.put("news", news_id, news)
+    return news
+
+
+
+def fulltext_query(search_term):
+    """Turns free text into a BOOLEAN MODE query requiring every word as a prefix.
+
+    Returns None when no word is long enough for the FULLTEXT index to match.
+    """
+    words = [w for w in re.findall(r"\w+", search_term) if len(w) >= FULLTEXT_MIN_TOKEN]
+    if not words:
+        return None
+    return " ".join("+" + w + "*" for w in words)
+
+def fts_query(search_term):
+    """Turns free text into an FTS5 MATCH expression requiring every word as a prefix, or None if it has no words."""
+    words = re.findall(r"\w+", search_term)
+    if not words:
+        return None
+    return " ".join('"' + w + '"*' for w in words)
+
+def match_query(search_term):
+    """The full-text query for the current database, or None when search_news has to use LIKE."""
+    return fulltext_query(search_term) if db.dialect() == "mysql" else fts_query(search_term)
+
+def like_prefix(search_term):
+    """Escapes LIKE wildcards so search_term only matches as a literal prefix (use with ESCAPE '!')."""
+    escaped = search_term.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+    return escaped + "%"
+
+@perf.timed("svc.search_users")
+def search_users(search_term, limit=SEARCH_LIMIT):
+    """Finds users whose username starts with search_term, exact match first, then shortest."""
+    with db.cursor() as cur:
+        cur.execute(f"""
+            SELECT {USER_ROW_FIELDS} FROM User
+            WHERE username LIKE %s ESCAPE '!'
+            ORDER BY username = %s DESC, CHAR_LENGTH(username), username
+            LIMIT %s
+        """, (like_prefix(search_term), search_term, limit))
+        return cur.fetchall()
+
+@perf.timed("svc.search_news")
+def search_news(search_term, limit=SEARCH_LIMIT, within=None):
+    """Ranks news by full-text relevance on title/body, plus posts by authors whose username starts with the term.
+
+    MySQL ranks with its FULLTEXT index and SQLite with bm25() over News_fts.
+    Terms with no word the index can match fall back to a bounded LIKE scan.
+    within, a collection of news_ids, restricts the search to those posts.
+    """
+    if within is not None and not within:
+        return []
+    ids = list(within or ())
+    scope = f" AND {{}} IN ({', '.join(['%s'] * len(ids))})" if ids else ""
+    ft_query = match_query(search_term)
+    if ft_query is None:
+        query = f"""
+            SELECT N.news_id, N.user_id, U.username, N.title, N.preview, N.created_at
+            FROM News N
+            LEFT JOIN User U ON N.user_id = U.user_id
+            WHERE (N.title LIKE %s OR N.body LIKE %s OR U.username LIKE %s){scope.format("N.news_id")}
+            ORDER BY N.created_at DESC, N.news_id DESC
+            LIMIT %s
+        """
+        params = ["%" + search_term + "%"] * 3 + ids + [limit]
+    elif db.dialect() == "sqlite":
+        # bm25() is lower for better matches, so author matches (0) rank after every text match.
+        query = f"""
+            SELECT N.news_id, N.user_id, U.username, N.title, N.preview, N.created_at
+            FROM (
+                SELECT news_id, MIN(score) AS score FROM (
+                    SELECT * FROM (
+                        SELECT rowid AS news_id, bm25(News_fts) AS score
+                        FROM News_fts
+                        WHERE News_fts MATCH %s{scope.format("rowid")}
+                        ORDER BY score LIMIT %s)
+                    UNION ALL
+                    SELECT * FROM (
+                        SELECT AN.news_id, 0 AS score
+                        FROM User AU JOIN News AN ON AN.user_id = AU.user_id
+                        WHERE AU.username LIKE %s ESCAPE '!'{scope.format("AN.news_id")}
+                        ORDER BY AN.created_at DESC LIMIT %s)
+                )
+                GROUP BY news_id
+            ) hits
+            JOIN News N ON N.news_id = hits.news_id
+            LEFT JOIN User U ON N.user_id = U.user_id
+            ORDER BY hits.score, N.created_at DESC, N.news_id DESC
+            LIMIT %s
+        """
+        params = ([ft_query] + ids + [limit, like_prefix(search_term)]
+                  + ids + [limit, limit])
+    else:
+        query = f"""
+            SELECT N.news_id, N.user_id, U.username, N.title, N.preview, N.created_at
+            FROM (
+                SELECT news_id, MAX(score) AS score FROM (
+                    (SELECT news_id, MATCH(title, body) AGAINST (%s IN BOOLEAN MODE) AS score
+                     FROM News
+                     WHERE MATCH(title, body) AGAINST (%s IN BOOLEAN MODE){scope.format("News.news_id")}
+                     ORDER BY score DESC LIMIT %s)
+                    UNION ALL
+                    (SELECT AN.news_id, 0 AS score
+                     FROM User AU JOIN News AN ON AN.user_id = AU.user_id
+                     WHERE AU.username LIKE %s ESCAPE '!'{scope.format("AN.news_id")}
+                     ORDER BY AN.created_at DESC LIMIT %s)
+                ) ranked
+                GROUP BY news_id
+            ) hits
+            JOIN News N ON N.news_id = hits.news_id
+            LEFT JOIN User U ON N.user_id = U.user_id
+            ORDER BY hits.score DESC, N.created_at DESC, N.news_id DESC
+            LIMIT %s
+        """
+        params = ([ft_query, ft_query] + ids + [limit, like_prefix(search_term)]
+                  + ids + [limit, limit])
+    with db.cursor() as cur:
+        cur.execute(query, tuple(params))
+        return cur.fetchall()
+
+def search_key(search_term):
+    """Normalizes a search term for the search cache (MySQL compares case-insensitively)."""
+    return search_term.strip().lower()
+
+def narrows(old_term, new_term):
+    """True when every match of new_term is guaranteed to be a match of old_term.
+
+    Appending characters only tightens a LIKE '%term%' or username prefix match,
+    and only adds or lengthens the required full-text word prefixes; switching
+    between the LIKE fallback and full-text changes the rules, so it does not count.
+    """
+    return (new_term.startswith(old_term)
+            and (match_query(old_term) is None) == (match_query(new_term) is None))
+
+def filter_users(rows, search_term):
+    """Applies search_users' prefix match and ordering to already fetched user rows."""
+    term = search_term.lower()
+    matches = [r for r in rows if r[1].lower().startswith(term)]
+    matches.sort(key=lambda r: (r[1].lower() != term, len(r[1]), r[1].lower()))
+    return matches
+
+def cached_user_search(search_term):
+    """Answers a username search from the search cache without touching MySQL, or returns None.
+
+    A longer term is answered by filtering the complete result of a shorter one.
+    """
+    term = search_key(search_term)
+    rows = searches.get("users", term)
+    if rows is not None:
+        return rows
+    found = searches.superset("users", term, lambda old, new: new.startswith(old))
+    if found is None:
+        return None
+    rows = filter_users(found[1], term)
+    searches.put("users", term, rows, True)
+    return rows
+
+def cached_news_search(search_term):
+    """Returns the cached news search result for exactly this term, or None."""
+    return searches.get("news", search_key(search_term))
+
+@perf.timed("svc.find_news")
+def find_news(search_term, limit=SEARCH_LIMIT):
+    """search_news through the search cache; a narrower term only re-checks the cached superset's posts."""
+    term = search_key(search_term)
+    rows = searches.get("news", term)
+    if rows is not None:
+        return rows
+    found = searches.superset("news", term, narrows)
+    rows = search_news(term, limit, within=[r[0] for r in found[1]] if found else None)
+    searches.put("news", term, rows, found is not None or len(rows) < limit)
+    return rows
+
+def keyset_after(column, id_column, descending, key):
+    """Returns (sql, params) for rows past key = (value, id) in ORDER BY column, id_column.
+
+    NULLs sort first ascending and last descending (as MySQL orders them),
+    so a NULL sort value needs its own branch.
+    """
+    value, row_id = key
+    op = "<" if descending else ">"
+    if value is None:
+        sql = f"({column} IS NULL AND {id_column} {op} %s)"
+        return (sql if descending else f"({sql} OR {column} IS NOT NULL)"), [row_id]
+    sql = f"({column} {op} %s OR ({column} = %s AND {id_column} {op} %s)"
+    if descending:
+        sql += f" OR {column} IS NULL"
+    return sql + ")", [value, value, row_id]
+
+def _sorted_query(query, params, clauses, column, id_column, descending, after=None, limit=None):
+    """Adds WHERE clauses, an optional keyset condition, ORDER BY column, id_column and LIMIT limit + 1."""
+    clauses, params = list(clauses), list(params)
+    if after is not None:
+        sql, extra = keyset_after(column, id_column, descending, after)
+        clauses.append(sql)
+        params.extend(extra)
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    direction = "DESC" if descending else "ASC"
+    query += f" ORDER BY {column} {direction}, {id_column} {direction}"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit + 1)
+    return query, tuple(params)
+
+def sort_key(row, sorts, order):
+    """The keyset key (sort value, id) of a list row under order."""
+    return (row[sorts[order[0]][1]], row[0])
+
+def order_rows(rows, sorts, order):
+    """Sorts already fetched list rows (e.g. search results) the way the paged queries order them."""
+    position = sorts[order[0]][1]
+
+    def key(row):
+        value = row[position]
+        if isinstance(value, str):
+            value = value.casefold()
+        return (value is not None, value if value is not None else 0, row[0])
+
+    return sorted(rows, key=key, reverse=order[1])
+
+def user_filter_sql(filters):
+    """WHERE clauses and params for a clean_user_filters dict."""
+    clauses, params = [], []
+    if filters.get("username"):
+        clauses.append("username = %s")
+        params.append(filters["username"])
+    if filters.get("age_min") is not None:
+        clauses.append("age >= %s")
+        params.append(filters["age_min"])
+    if filters.get("age_max") is not None:
+        clauses.append("age <= %s")
+        params.append(filters["age_max"])
+    return clauses, params
+
+def user_matches(row, filters):
+    """Applies a clean_user_filters dict to an already fetched user row."""
+    age = row[3]
+    if filters.get("username") and row[1] != filters["username"]:
+        return False
+    if filters.get("age_min") is not None and (age is None or age < filters["age_min"]):
+        return False
+    if filters.get("age_max") is not None and (age is None or age > filters["age_max"]):
+        return False
+    return True
+
+def news_filter_sql(filters):
+    """WHERE clauses and params for a clean_news_filters dict, or None if its author does not exist."""
+    clauses, params = [], []
+    if filters.get("username"):
+        user_id = get_user_id_by_username(filters["username"])
+        if user_id is None:
+            return None
+        clauses.append("N.user_id = %s")
+        params.append(user_id)
+    if filters.get("date_from"):
+        clauses.append("N.created_at >= %s")
+        params.append(filters["date_from"])
+    if filters.get("date_to"):
+        clauses.append("N.created_at < %s")
+        params.append(filters["date_to"] + timedelta(days=1))
+    return clauses, params
+
+def news_matches(row, filters):
+    """Applies a clean_news_filters dict to an already fetched news list row."""
+    created = row[5].date() if isinstance(row[5], datetime) else row[5]
+    if filters.get("username") and row[2] != filters["username"]:
+        return False
+    if filters.get("date_from") and (created is None or created < filters["date_from"]):
+        return False
+    if filters.get("date_to") and (created is None or created > filters["date_to"]):
+        return False
+    return True
+
+@perf.timed("svc.fetch_users")
+def fetch_users(search_term, order=None, filters=None):
+    """Returns the user rows (USER_ROW_FIELDS) matching search_term and filters, sorted by order.
+
+    At most SEARCH_LIMIT rows; the unsearched list is read a page at a time with fetch_users_page.
+    """
+    order, filters = order or USER_DEFAULT_ORDER, filters or {}
+    rows = cached_user_search(search_term)
+    if rows is None:
+        rows = search_users(search_key(search_term))
+        searches.put("users", search_key(search_term), rows, len(rows) < SEARCH_LIMIT)
+    return order_rows([r for r in rows if user_matches(r, filters)], USER_SORTS, order)
+
+@perf.timed("svc.fetch_users_page")
+def fetch_users_page(order=None, filters=None, after=None, limit=USERS_PAGE_SIZE):
+    """Fetches one keyset page of users as (rows, has_more); after is the sort_key of the previous page's last row."""
+    order, filters = order or USER_DEFAULT_ORDER, filters or {}
+    clauses, params = user_filter_sql(filters)
+    query, params = _sorted_query(f"SELECT {USER_ROW_FIELDS} FROM User", params, clauses,
+                                  USER_SORTS[order[0]][0], "user_id", order[1], after, limit)
+    with db.cursor() as cur:
+        cur.execute(query, params)
+        rows = cur.fetchall()
+    return rows[:limit], len(rows) > limit
+
+@perf.timed("svc.top_authors")
+def top_authors(limit=10):
+    """Returns the users with the most posts, read in order from idx_user_post_count."""
+    with db.cursor() as cur:
+        cur.execute(f"SELECT {USER_ROW_FIELDS} FROM User ORDER BY post_count DESC, user_id DESC LIMIT %s",
+                    (limit,))
+        return cur.fetchall()
+
+@perf.timed("svc.fetch_news_for_user")
+def fetch_news_for_user(user_id, after=None, limit=USER_NEWS_PAGE_SIZE):
+    """Returns one page of a user's posts as (rows, has_more), newest first, body previews only.
+
+    Rows are (news_id, title, body preview, created_at); after is the
+    (created_at, news_id) key of the last row of the previous page.
+    """
+    query = """
+        SELECT N.news_id, N.title, N.preview, N.created_at
+        FROM News N
+        WHERE N.user_id = %s
+    """
+    params = [user_id]
+    if after is not None:
+        query += " AND (N.created_at < %s OR (N.created_at = %s AND N.news_id < %s))"
+        params.extend([after[0], after[0], after[1]])
+    query += " ORDER BY N.created_at DESC, N.news_id DESC LIMIT %s"
+    params.append(limit + 1)
+    with db.cursor() as cur:
+        cur.execute(query, tuple(params))
+        rows = cur.fetchall()
+    return rows[:limit], len(rows) > limit
+
+@perf.timed("svc.fetch_user_profile")
+def fetch_user_profile(user_id, limit=USER_NEWS_PAGE_SIZE):
+    """Fetches a user's record and the first page of their posts in one query.
+
+    Returns (user, (rows, has_more)) shaped like get_user and fetch_news_for_user,
+    or (None, ([], False)) when the user no longer exists.
+    """
+    with db.cursor() as cur:
+        cur.execute("""
+            SELECT U.user_id, U.username, U.email, U.age, U.contact_number, U.u_occupation,
+                   P.news_id, P.title, P.preview, P.created_at
+            FROM User U
+            LEFT JOIN (
+                SELECT news_id, user_id, title, preview, created_at
+                FROM News
+                WHERE user_id = %s
+                ORDER BY created_at DESC, news_id DESC
+                LIMIT %s
+            ) P ON P.user_id = U.user_id
+            WHERE U.user_id = %s
+            ORDER BY P.created_at DESC, P.news_id DESC
+        """, (user_id, limit + 1, user_id))
+        result = cur.fetchall()
+    if not result:
+        return None, ([], False)
+    user = dict(zip(USER_FIELDS.split(", "), result[0][:6]))
+    entities.put("user", user["user_id"], user)
+    rows = [r[6:] for r in result if r[6] is not None]
+    return user, (rows[:limit], len(rows) > limit)
+
+@perf.timed("svc.fetch_news_page")
+def fetch_news_page(after=None, before=None, limit=NEWS_PAGE_SIZE, order=None, filters=None):
+    """Fetches one page of news, keyset-paged on (sort column, news_id); newest first by default.
+
+    after/before are sort_key()s of the row the page continues from. order is a
+    (NEWS_SORTS name, descending) pair and filters a clean_news_filters dict.
+    Returns (rows, has_more) where has_more says whether rows exist past this page.
+    Rows carry only the first NEWS_PREVIEW_CHARS of the body; see get_news for the full text.
+    """
+    order = order or NEWS_DEFAULT_ORDER
+    where = news_filter_sql(filters or {})
+    if where is None:
+        return [], False
+    descending = order[1]
+    if before is not None:
+        # Walk backwards from the key, then flip the page back into order below.
+        descending = not descending
+    query, params = _sorted_query("""
+        SELECT N.news_id, N.user_id, U.username, N.title, N.preview, N.created_at
+        FROM News N
+        LEFT JOIN User U ON N.user_id = U.user_id
+    """, where[1], where[0], NEWS_SORTS[order[0]][0], "N.news_id", descending,
+        after if before is None else before, limit)
+
+    with db.cursor() as cur:
+        cur.execute(query, params)
+        rows = cur.fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if before is not None:
+        rows.reverse()
+    return rows, has_more
+
+@perf.timed("svc.fetch_news_post")
+def fetch_news_post(news_id):
+    """Returns (title, body) of one post, or None if it no longer exists."""
+    news = get_news(news_id)
+    return (news["title"], news["body"]) if news else None
+
+@perf.timed("svc.fetch_user_row")
+def fetch_user_row(user_id):
+    """Returns one user in the same shape as fetch_users rows, or None if it is gone."""
+    with db.cursor() as cur:
+        cur.execute(f"SELECT {USER_ROW_FIELDS} FROM User WHERE user_id = %s", (user_id,))
+        return cur.fetchone()
+
+@perf.timed("svc.fetch_news_row")
+def fetch_news_row(news_id):
+    """Returns one post in the same shape as fetch_news_page rows (body preview only), or None if it is gone."""
+    with db.cursor() as cur:
+        cur.execute("""
+            SELECT N.news_id, N.user_id, U.username, N.title, N.preview, N.created_at
+            FROM News N
+            LEFT JOIN User U ON N.user_id = U.user_id
+            WHERE N.news_id = %s
+        """, (news_id,))
+        return cur.fetchone()
+
+def _id_chunks(ids):
+    """Splits ids into BATCH_IN_LIMIT-sized lists, each with its IN (...) placeholder string."""
+    ids = [int(i) for i in ids]
+    for start in range(0, len(ids), BATCH_IN_LIMIT):
+        chunk = ids[start:start + BATCH_IN_LIMIT]
+        yield chunk, ", ".join(["%s"] * len(chunk))
+
+@perf.timed("svc.fetch_news_rows")
+def fetch_news_rows(news_ids):
+    """Returns fetch_news_row-shaped rows for many posts in one query per BATCH_IN_LIMIT ids."""
+    rows = []
+    with db.cursor() as cur:
+        for chunk, placeholders in _id_chunks(news_ids):
+            cur.execute(f"""
+                SELECT N.news_id, N.user_id, U.username, N.title, N.preview, N.created_at
+                FROM News N
+                LEFT JOIN User U ON N.user_id = U.user_id
+                WHERE N.news_id IN ({placeholders})
+            """, tuple(chunk))
+            rows.extend(cur.fetchall())
+    return rows
+
+def iter_news_listing(batch=NEWS_PAGE_SIZE * 10):
+    """Yields every post in batches, oldest first, through one unbuffered cursor.
+
+    Rows are (news_id, user_id, username, title, body preview, created_at,
+    row_version): the fetch_news_page shape plus the version of the last write.
+    """
+    with db.connection() as conn:
+        cur = conn.cursor(buffered=False)
+        cur.execute("""
+            SELECT N.news_id, N.user_id, U.username, N.title, N.preview, N.created_at, N.row_version
+            FROM News N
+            LEFT JOIN User U ON N.user_id = U.user_id
+            ORDER BY N.created_at, N.news_id
+        """)
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                break
+            yield rows
+
+@perf.timed("svc.fetch_news_records")
+def fetch_news_records(news_ids):
+    """Returns full News records (get_news dicts) for many posts in one query per BATCH_IN_LIMIT ids.
+
+    Unlike get_news the records bypass the entity cache, since bulk readers
+    would only evict the records the GUI is working with.
+    """
+    records = []
+    with db.cursor(dictionary=True) as cur:
+        for chunk, placeholders in _id_chunks(news_ids):
+            cur.execute(f"SELECT {NEWS_FIELDS} FROM News WHERE news_id IN ({placeholders})", tuple(chunk))
+            records.extend(cur.fetchall())
+    return records
+
+@perf.timed("svc.fetch_user_rows")
+def fetch_user_rows(user_ids):
+    """Returns fetch_user_row-shaped rows for many users in one query per BATCH_IN_LIMIT ids."""
+    rows = []
+    with db.cursor() as cur:
+        for chunk, placeholders in _id_chunks(user_ids):
+            cur.execute(f"SELECT {USER_ROW_FIELDS} FROM User WHERE user_id IN ({placeholders})", chunk)
+            rows.extend(cur.fetchall())
+    return rows
+
+def _post_totals(cur, news_ids, lock=False):
+    """Returns {user_id: (posts, body bytes)} over the given posts; lock=True holds them until commit."""
+    totals = {}
+    for chunk, placeholders in _id_chunks(news_ids):
+        cur.execute(f"""
+            SELECT user_id, COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM News
+            WHERE news_id IN ({placeholders}) GROUP BY user_id{" FOR UPDATE" if lock else ""}
+        """, chunk)
+        for user_id, posts, nbytes in cur.fetchall():
+            totals[user_id] = (posts, int(nbytes))
+    return totals
+
+def _next_version(cur):
+    """Takes the next change version for the current transaction.
+
+    The counter row stays locked until commit, so versions become visible in
+    the order they were handed out and fetch_changes never skips one.
+    """
+    cur.execute("UPDATE change_counter SET version = version + 1 WHERE id = 1")
+    cur.execute("SELECT version FROM change_counter WHERE id = 1")
+    return cur.fetchone()[0]
+
+def _add_tombstones(cur, version, kind, chunk, placeholders, column=None):
+    """Records the rows about to be deleted; column selects News rows by another column (e.g. user_id)."""
+    if kind == "user":
+        cur.execute(f"""
+            INSERT INTO Tombstone (version, kind, row_id)
+            SELECT %s, 'user', user_id FROM User WHERE user_id IN ({placeholders})
+        """, (version, *chunk))
+    else:
+        cur.execute(f"""
+            INSERT INTO Tombstone (version, kind, row_id)
+            SELECT %s, 'news', news_id FROM News WHERE {column or "news_id"} IN ({placeholders})
+        """, (version, *chunk))
+
+def _adjust_user_stats(cur, before, after, version):
+    """Applies the change between two _post_totals results to the authors' materialized statistics."""
+    for user_id in set(before) | set(after):
+        old_posts, old_bytes = before.get(user_id, (0, 0))
+        new_posts, new_bytes = after.get(user_id, (0, 0))
+        if (old_posts, old_bytes) == (new_posts, new_bytes):
+            continue
+        # MAX(created_at) is a single probe of idx_news_user_created.
+        cur.execute("""
+            UPDATE User SET post_count = post_count + %s, body_bytes = body_bytes + %s,
+                last_post_at = (SELECT MAX(created_at) FROM News WHERE user_id = %s), row_version = %s
+            WHERE user_id = %s
+        """, (new_posts - old_posts, new_bytes - old_bytes, user_id, version, user_id))
+
+@perf.timed("svc.rebuild_user_stats")
+def rebuild_user_stats(user_ids=None):
+    """Recomputes the post statistics of user_ids (default: every user) from News; returns how many changed.
+
+    The given users are stamped with a new change version; a full rebuild is a
+    repair and leaves versions alone.
+    """
+    changed = 0
+    with db.cursor(commit=True) as cur:
+        if user_ids is None:
+            changed = schema.rebuild_user_stats(cur)
+        else:
+            version = _next_version(cur)
+            for chunk, placeholders in _id_chunks(user_ids):
+                changed += schema.rebuild_user_stats(cur, f" WHERE user_id IN ({placeholders})", chunk)
+                cur.execute(f"UPDATE User SET row_version = %s WHERE user_id IN ({placeholders})", (version, *chunk))
+    return changed
+
+@perf.timed("svc.stamp_unversioned")
+def stamp_unversioned():
+    """Gives rows inserted outside this module (bulk_io imports) a change version; returns how many."""
+    stamped = 0
+    with db.cursor(commit=True) as cur:
+        version = _next_version(cur)
+        for table in ("User", "News"):
+            cur.execute(f"UPDATE {table} SET row_version = %s WHERE row_version = 0", (version,))
+            stamped += cur.rowcount
+    return stamped
+
+@perf.timed("svc.current_version")
+def current_version():
+    """The latest change version; pass it to fetch_changes later to get what changed since."""
+    with db.cursor() as cur:
+        cur.execute("SELECT version FROM change_counter WHERE id = 1")
+        return cur.fetchone()[0]
+
+@perf.timed("svc.fetch_changes")
+def fetch_changes(since, limit=CHANGES_LIMIT):
+    """Returns what changed after version since, in the row shapes of the list queries.
+
+    The result is a dict with the new "version" to pass next time, "users" and
+    "news" rows (fetch_user_row / fetch_news_row shapes) that were inserted or
+    updated, and the ids in "deleted_users" and "deleted_news". When more than
+    limit rows changed, or the tombstones for since were already pruned,
+    "reset" is True and the caller should reload instead.
+    """
+    changes = {"version": since, "reset": False, "users": [], "news": [], "deleted_users": [], "deleted_news": []}
+    with db.connection() as conn:
+        # One transaction, so every query below reads the same consistent snapshot.
+        conn.start_transaction(consistent_snapshot=True, readonly=True)
+        cur = conn.cursor()
+        cur.execute("SELECT version, pruned_through FROM change_counter WHERE id = 1")
+        version, pruned_through = cur.fetchone()
+        changes["version"] = version
+        if since < pruned_through:
+            changes["reset"] = True
+            return changes
+        cur.execute(f"SELECT {USER_ROW_FIELDS} FROM User WHERE row_version > %s ORDER BY row_version LIMIT %s",
+                    (since, limit + 1))
+        changes["users"] = cur.fetchall()
+        cur.execute("""
+            SELECT N.news_id, N.user_id, U.username, N.title, N.preview, N.created_at
+            FROM News N
+            LEFT JOIN User U ON N.user_id = U.user_id
+            WHERE N.row_version > %s ORDER BY N.row_version LIMIT %s
+        """, (since, limit + 1))
+        changes["news"] = cur.fetchall()
+        cur.execute("SELECT kind, row_id FROM Tombstone WHERE version > %s ORDER BY version LIMIT %s",
+                    (since, limit + 1))
+        for kind, row_id in cur.fetchall():
+            changes["deleted_users" if kind == "user" else "deleted_news"].append(row_id)
+    total = sum(len(changes[k]) for k in ("users", "news", "deleted_users", "deleted_news"))
+    if total > limit:
+        changes.update(reset=True, users=[], news=[], deleted_users=[], deleted_news=[])
+    return changes
+
+@perf.timed("svc.prune_tombstones")
+def prune_tombstones(days=TOMBSTONE_DAYS):
+    """Drops deletion records older than days; returns how many. Callers behind them get "reset" from fetch_changes."""
+    cutoff = datetime.now() - timedelta(days=days)
+    with db.cursor(commit=True) as cur:
+        cur.execute("SELECT MAX(version) FROM Tombstone WHERE deleted_at < %s", (cutoff,))
+        through = cur.fetchone()[0]
+        if through is None:
+            return 0
+        cur.execute("DELETE FROM Tombstone WHERE version <= %s", (through,))
+        pruned = cur.rowcount
+        cur.execute("UPDATE change_counter SET pruned_through = GREATEST(pruned_through, %s) WHERE id = 1",
+                    (through,))
+    return pruned
+
+@perf.timed("svc.insert_user")
+@queue_offline
+def insert_user(name, email, age, occupation, contact):
+    """Inserts a user and returns its new user_id."""
+    with db.cursor(commit=True) as cur:
+        version = _next_version(cur)
+        cur.execute("""
+            INSERT INTO User (username, email, age, u_occupation, contact_number, row_version)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (name, email, age, occupation, contact, version))
+        new_id = cur.lastrowid
+    searches.clear()
+    return new_id
+
+@perf.timed("svc.update_user")
+@queue_offline
+def update_user(user_id, name, email, age, occupation, contact):
+    with db.cursor(commit=True) as cur:
+        version = _next_version(cur)
+        cur.execute("""
+            UPDATE User SET username=%s, email=%s, age=%s, u_occupation=%s, contact_number=%s, row_version=%s
+            WHERE user_id=%s
+        """, (name, email, age, occupation, contact, version, user_id))
+    entities.invalidate("user", user_id)
+    searches.clear()
+
+@perf.timed("svc.delete_user")
+@queue_offline
+def delete_user(user_id):
+    with db.cursor(commit=True) as cur:
+        version = _next_version(cur)
+        _add_tombstones(cur, version, "news", [user_id], "%s", column="user_id")
+        _add_tombstones(cur, version, "user", [user_id], "%s")
+        cur.execute("DELETE FROM User WHERE user_id=%s", (user_id,))
+    entities.invalidate("user", user_id)
+    entities.invalidate_where("news", lambda news: news["user_id"] == int(user_id))
+    searches.clear()
+
+@perf.timed("svc.insert_news")
+@queue_offline
+def insert_news(user_id, title, body):
+    """Inserts a post stamped with the current time and returns its new news_id."""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with db.cursor(commit=True) as cur:
+        version = _next_version(cur)
+        cur.execute("INSERT INTO News (user_id, title, body, created_at, row_version) VALUES (%s, %s, %s, %s, %s)",
+                    (user_id, title, body, now, version))
+        new_id = cur.lastrowid
+        _adjust_user_stats(cur, {}, _post_totals(cur, [new_id]), version)
+    searches.clear()
+    return new_id
+
+@perf.timed("svc.update_news_post")
+@queue_offline
+def update_news_post(news_id, title, body, user_id=None):
+    """Updates a post's title and body, and moves it to user_id when one is given."""
+    with db.cursor(commit=True) as cur:
+        version = _next_version(cur)
+        before = _post_totals(cur, [news_id], lock=True)
+        if user_id is None:
+            cur.execute("UPDATE News SET title=%s, body=%s, row_version=%s WHERE news_id=%s",
+                        (title, body, version, news_id))
+        else:
+            cur.execute("UPDATE News SET user_id=%s, title=%s, body=%s, row_version=%s WHERE news_id=%s",
+                        (user_id, title, body, version, news_id))
+        _adjust_user_stats(cur, before, _post_totals(cur, [news_id]), version)
+    entities.invalidate("news", news_id)
+    searches.clear()
+
+@perf.timed("svc.delete_news_post")
+@queue_offline
+def delete_news_post(news_id):
+    with db.cursor(commit=True) as cur:
+        version = _next_version(cur)
+        before = _post_totals(cur, [news_id], lock=True)
+        _add_tombstones(cur, version, "news", [news_id], "%s")
+        cur.execute("DELETE FROM News WHERE news_id=%s", (news_id,))
+        _adjust_user_stats(cur, before, {}, version)
+    entities.invalidate("news", news_id)
+    searches.clear()
+
+@perf.timed("svc.delete_news_posts")
+@queue_offline
+def delete_news_posts(news_ids):
+    """Deletes many posts in one transaction and returns how many were removed."""
+    deleted = 0
+    with db.cursor(commit=True) as cur:
+        version = _next_version(cur)
+        before = _post_totals(cur, news_ids, lock=True)
+        for chunk, placeholders in _id_chunks(news_ids):
+            _add_tombstones(cur, version, "news", chunk, placeholders)
+            cur.execute(f"DELETE FROM News WHERE news_id IN ({placeholders})", chunk)
+            deleted += cur.rowcount
+        _adjust_user_stats(cur, before, {}, version)
+    for news_id in news_ids:
+        entities.invalidate("news", news_id)
+    searches.clear()
+    return deleted
+
+@perf.timed("svc.reassign_news_posts")
+@queue_offline
+def reassign_news_posts(news_ids, user_id):
+    """Moves many posts to user_id in one transaction and returns how many changed."""
+    changed = 0
+    with db.cursor(commit=True) as cur:
+        version = _next_version(cur)
+        before = _post_totals(cur, news_ids, lock=True)
+        for chunk, placeholders in _id_chunks(news_ids):
+            cur.execute(f"""
+                UPDATE News SET user_id = %s, row_version = %s
+                WHERE news_id IN ({placeholders}) AND user_id <> %s
+            """, (user_id, version, *chunk, user_id))
+            changed += cur.rowcount
+        _adjust_user_stats(cur, before, _post_totals(cur, news_ids), version)
+    for news_id in news_ids:
+        entities.invalidate("news", news_id)
+    searches.clear()
+    return changed
+
+@perf.timed("svc.replace_in_news_posts")
+@queue_offline
+def replace_in_news_posts(news_ids, find, replace):
+    """Replaces text in the titles and bodies of many posts in one transaction; returns how many changed."""
+    if not find:
+        raise ValueError("Enter the text to find.")
+    changed = 0
+    with db.cursor(commit=True) as cur:
+        version = _next_version(cur)
+        before = _post_totals(cur, news_ids, lock=True)
+        for chunk, placeholders in _id_chunks(news_ids):
+            # REPLACE() matches case-sensitively; only rows it actually changes get the new version.
+            cur.execute(f"""
+                UPDATE News SET title = REPLACE(title, %s, %s), body = REPLACE(body, %s, %s), row_version = %s
+                WHERE news_id IN ({placeholders}) AND (INSTR(BINARY title, %s) > 0 OR INSTR(BINARY body, %s) > 0)
+            """, (find, replace, find, replace, version, *chunk, find, find))
+            changed += cur.rowcount
+        _adjust_user_stats(cur, before, _post_totals(cur, news_ids), version)
+    for news_id in news_ids:
+        entities.invalidate("news", news_id)
+    searches.clear()
+    return changed
+
+@perf.timed("svc.delete_users")
+@queue_offline
+def delete_users(user_ids):
+    """Deletes many users (and, by cascade, their posts) in one transaction; returns how many were removed."""
+    deleted = 0
+    with db.cursor(commit=True) as cur:
+        version = _next_version(cur)
+        for chunk, placeholders in _id_chunks(user_ids):
+            _add_tombstones(cur, version, "news", chunk, placeholders, column="user_id")
+            _add_tombstones(cur, version, "user", chunk, placeholders)
+            cur.execute(f"DELETE FROM User WHERE user_id IN ({placeholders})", chunk)
+            deleted += cur.rowcount
+    doomed = {int(u) for u in user_ids}
+    for user_id in doomed:
+        entities.invalidate("user", user_id)
+    entities.invalidate_where("news", lambda news: news["user_id"] in doomed)
+    searches.clear()
+    return deleted
+
+def require_user_id(username):
+    """Looks up user_id for username, raising LookupError when there is no such user."""
+    u_id = get_user_id_by_username(username)
+    if u_id is None:
+        raise LookupError(f"User '{username}' does not exist.")
+    return u_id
+
+
+def validate_email(email):
+    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    return re.match(pattern, email) is not None
+
+def clean_user_fields(name, email, age_text, occupation, contact):
+    """Validates user form input and returns (name, email, age, occupation, contact).
+
+    Raises ValueError with a message meant for the person who typed the input.
+    """
+    name = name.strip()
+    email = email.strip()
+    age_text = str(age_text).strip() if age_text is not None else ""
+    if not name or not email:
+        raise ValueError("Name and Email are required.")
+    if not validate_email(email):
+        raise ValueError("Invalid email address.")
+    try:
+        age_val = int(age_text) if age_text != "" else None
+    except ValueError:
+        raise ValueError("Age must be an integer.")
+    return name, email, age_val, (occupation or "").strip(), (contact or "").strip()
+
+def clean_news_fields(title, body):
+    """Validates a post's title and body, returning them trimmed the way the forms store them."""
+    title = title.strip()
+    body = body.rstrip("\n")
+    if not title or not body:
+        raise ValueError("Title and body are required.")
+    return title, body
+
+def _parse_date(text, label):
+    try:
+        return datetime.strptime(text, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"{label} must be a date like 2024-06-01.")
+
+def clean_user_filters(username="", age_min="", age_max=""):
+    """Validates the users list filter fields; returns a filters dict (empty fields are left out)."""
+    filters = {}
+    if username and username.strip():
+        filters["username"] = username.strip()
+    for key, text in (("age_min", age_min), ("age_max", age_max)):
+        text = str(text or "").strip()
+        if text:
+            if not text.isdigit():
+                raise ValueError("Age filters must be whole numbers.")
+            filters[key] = int(text)
+    return filters
+
+def clean_news_filters(username="", date_from="", date_to=""):
+    """Validates the news list filter fields (dates as YYYY-MM-DD, both ends inclusive); returns a filters dict."""
+    filters = {}
+    if username and username.strip():
+        filters["username"] = username.strip()
+    if date_from and date_from.strip():
+        filters["date_from"] = _parse_date(date_from.strip(), "From date")
+    if date_to and date_to.strip():
+        filters["date_to"] = _parse_date(date_to.strip(), "To date")
+    return filters
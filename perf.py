@@ -0,0 +1,181 @@
+"""Opt-in timing instrumentation for the database and UI hot paths.
+
+Instrumented code calls timed()/record()/start()/finish(); all of them return
+almost immediately while instrumentation is off, so they can stay in place.
+Turn it on at runtime with enable() (or NEWS_PERF=1 in the environment) and
+read the numbers with snapshot(), dump() or the GUI's diagnostics window.
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+
+BUCKET_BASE_MS = 0.05   # upper bound of the first histogram bucket
+BUCKETS = 24            # each bucket doubles the previous bound (up to ~7 minutes)
+
+enabled = os.environ.get("NEWS_PERF", "") not in ("", "0")
+
+_lock = threading.Lock()
+_metrics = {}
+_sources = {}
+log = logging.getLogger("news_blog.perf")
+
+
+class Histogram:
+    """Log-bucketed latency histogram with running totals for one metric."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.buckets = [0] * (BUCKETS + 1)
+
+    def add(self, ms, rows, nbytes):
+        self.count += 1
+        self.total_ms += ms
+        self.min_ms = ms if self.min_ms is None else min(self.min_ms, ms)
+        self.max_ms = max(self.max_ms, ms)
+        self.rows += rows
+        self.bytes += nbytes
+        bound, index = BUCKET_BASE_MS, 0
+        while ms > bound and index < BUCKETS:
+            bound *= 2
+            index += 1
+        self.buckets[index] += 1
+
+    def percentile(self, fraction):
+        """Upper bucket bound below which fraction of the samples fall (capped at max)."""
+        wanted = fraction * self.count
+        seen, bound = 0, BUCKET_BASE_MS
+        for count in self.buckets:
+            seen += count
+            if seen >= wanted:
+                return min(bound, self.max_ms)
+            bound *= 2
+        return self.max_ms
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "min_ms": round(self.min_ms or 0.0, 3),
+            "p50_ms": round(self.percentile(0.5), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+            "bytes": self.bytes,
+        }
+
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+
+def reset():
+    with _lock:
+        _metrics.clear()
+
+
+def register_source(name, snapshot):
+    """Adds a callable whose dict result (e.g. pool or cache counters) is included in snapshot()."""
+    _sources[name] = snapshot
+
+
+def record(name, seconds, rows=0, nbytes=0):
+    if not enabled:
+        return
+    with _lock:
+        histogram = _metrics.get(name)
+        if histogram is None:
+            histogram = _metrics[name] = Histogram()
+        histogram.add(seconds * 1000, rows, nbytes)
+
+
+def start():
+    """Returns a start time for finish(), or None while instrumentation is off."""
+    return time.perf_counter() if enabled else None
+
+
+def finish(name, started, rows=0, nbytes=0):
+    if started is not None:
+        record(name, time.perf_counter() - started, rows, nbytes)
+
+
+def row_count(result):
+    """Best-effort row count of a data function's result."""
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], list):
+        return len(result[0])  # (rows, has_more) pages
+    if isinstance(result, list):
+        return len(result)
+    return 0 if result is None else 1
+
+
+def payload_size(rows):
+    """Approximate bytes of text/binary data in fetched rows."""
+    size = 0
+    for row in rows:
+        for value in (row.values() if isinstance(row, dict) else row or ()):
+            if isinstance(value, (str, bytes, bytearray)):
+                size += len(value)
+            elif value is not None:
+                size += 8
+    return size
+
+
+def timed(name):
+    """Decorator recording each call's duration and result row count under name."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            result = fn(*args, **kwargs)
+            record(name, time.perf_counter() - started, row_count(result))
+            return result
+        return inner
+    return wrap
+
+
+def snapshot():
+    """Returns every metric's summary plus the registered sources' counters."""
+    with _lock:
+        metrics = {name: h.summary() for name, h in sorted(_metrics.items())}
+    sources = {}
+    for name, source in _sources.items():
+        try:
+            sources[name] = source()
+        except Exception as e:
+            sources[name] = {"error": str(e)}
+    return {"enabled": enabled, "taken_at": datetime.now().isoformat(timespec="seconds"),
+            "metrics": metrics, "sources": sources}
+
+
+def dump(path):
+    """Writes snapshot() to path: pretty JSON, or one appended JSON line if path ends in .log/.jsonl."""
+    data = snapshot()
+    if path.endswith((".log", ".jsonl")):
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(data, default=str) + "\n")
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, default=str)
+    return path
+
+
+def log_summary(logger=None):
+    """Logs one line per metric at INFO level."""
+    logger = logger or log
+    for name, stats in snapshot()["metrics"].items():
+        logger.info("%s count=%d mean=%.3fms p95=%.3fms max=%.3fms rows=%d bytes=%d", name,
+                    stats["count"], stats["mean_ms"], stats["p95_ms"], stats["max_ms"],
+                    stats["rows"], stats["bytes"])
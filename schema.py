@@ -0,0 +1,629 @@
+"""Versioned schema migrations and query-plan checks for the news blog database.
+
+Each migration runs once and is recorded in the schema_version table, so
+upgrading an existing database only applies the steps it is missing. The
+embedded SQLite backend (db.BACKEND = "sqlite") has its own list of steps,
+SQLITE_MIGRATIONS, numbered to match the MySQL schema version it reaches.
+
+    python schema.py migrate
+    python schema.py status
+    python schema.py explain
+    python schema.py rebuild-stats
+    python schema.py storage
+    python schema.py compress
+"""
+import argparse
+import json
+import os
+import sys
+
+import db
+
+
+MIGRATE_LOCK = "usernews_schema_migrate"   # GET_LOCK name so two starting apps don't migrate at once
+MIGRATE_LOCK_TIMEOUT = 30                  # seconds to wait for another process's migration
+NEWS_PREVIEW_CHARS = 160                   # body characters kept in News.preview for the lists
+NEWS_KEY_BLOCK_SIZE = 8                    # KB per compressed News page (see set_news_compression)
+
+# NEWS_COMPRESS=1 makes migrate() store News with InnoDB page compression.
+COMPRESS_NEWS = os.environ.get("NEWS_COMPRESS", "") not in ("", "0")
+
+
+def index_exists(cur, table, index_name):
+    cur.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index_name))
+    return cur.fetchone()[0] > 0
+
+
+def ensure_index(cur, table, index_name, definition):
+    """Adds an index to an existing table unless one with that name is already there."""
+    if not index_exists(cur, table, index_name):
+        cur.execute(f"ALTER TABLE {table} ADD {definition}")
+
+
+def column_exists(cur, table, column):
+    cur.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cur.fetchone()[0] > 0
+
+
+def ensure_column(cur, table, column, definition):
+    """Adds a column to an existing table unless it is already there."""
+    if not column_exists(cur, table, column):
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def create_tables(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS User (
+        user_id INT PRIMARY KEY AUTO_INCREMENT,
+        username VARCHAR(100) UNIQUE NOT NULL,
+        email VARCHAR(100) UNIQUE NOT NULL,
+        age INT,
+        contact_number VARCHAR(20),
+        u_occupation VARCHAR(100)
+    ) ENGINE=InnoDB
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS News (
+        news_id INT PRIMARY KEY AUTO_INCREMENT,
+        user_id INT NOT NULL,
+        title VARCHAR(200),
+        body TEXT,
+        created_at DATETIME,
+        FOREIGN KEY (user_id) REFERENCES User(user_id) ON DELETE CASCADE
+    ) ENGINE=InnoDB
+    """)
+
+
+def add_fulltext_index(cur):
+    ensure_index(cur, "News", "ft_news_title_body", "FULLTEXT INDEX ft_news_title_body (title, body)")
+
+
+def add_listing_indexes(cur):
+    """Indexes matching the news list's keyset order and the per-user post list."""
+    # Keyset paging compares and sorts on (created_at, news_id), which cannot work with NULLs.
+    cur.execute("UPDATE News SET created_at = NOW() WHERE created_at IS NULL")
+    cur.execute("ALTER TABLE News MODIFY created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP")
+    ensure_index(cur, "News", "idx_news_created", "INDEX idx_news_created (created_at, news_id)")
+    ensure_index(cur, "News", "idx_news_user_created", "INDEX idx_news_user_created (user_id, created_at)")
+    # (user_id, created_at) now backs the foreign key, so the implicit single-column index is redundant.
+    if index_exists(cur, "News", "user_id"):
+        cur.execute("ALTER TABLE News DROP INDEX user_id")
+
+
+# Recomputes User's materialized post statistics from News; append a WHERE clause to limit it.
+# Each subquery reads one user's range of idx_news_user_created.
+USER_STATS_SQL = """
+    UPDATE User SET
+        post_count = (SELECT COUNT(*) FROM News WHERE News.user_id = User.user_id),
+        last_post_at = (SELECT MAX(created_at) FROM News WHERE News.user_id = User.user_id),
+        body_bytes = (SELECT COALESCE(SUM(LENGTH(body)), 0) FROM News WHERE News.user_id = User.user_id)
+"""
+
+
+def rebuild_user_stats(cur, where="", params=()):
+    """Recomputes post_count, last_post_at and body_bytes for every user (or those matched by where)."""
+    cur.execute(USER_STATS_SQL + where, params)
+    return cur.rowcount
+
+
+def add_user_stats(cur):
+    """Per-user post statistics kept up to date by news_service's write paths, so lists never GROUP BY News."""
+    ensure_column(cur, "User", "post_count", "INT NOT NULL DEFAULT 0")
+    ensure_column(cur, "User", "last_post_at", "DATETIME NULL")
+    ensure_column(cur, "User", "body_bytes", "BIGINT NOT NULL DEFAULT 0")
+    ensure_index(cur, "User", "idx_user_post_count", "INDEX idx_user_post_count (post_count, user_id)")
+    ensure_index(cur, "User", "idx_user_last_post", "INDEX idx_user_last_post (last_post_at, user_id)")
+    rebuild_user_stats(cur)
+
+
+def add_sort_indexes(cur):
+    """Indexes for the sortable list columns that had none; each ends in the row id for keyset paging."""
+    ensure_index(cur, "User", "idx_user_age", "INDEX idx_user_age (age, user_id)")
+    ensure_index(cur, "News", "idx_news_title", "INDEX idx_news_title (title, news_id)")
+
+
+def add_body_bytes_index(cur):
+    ensure_index(cur, "User", "idx_user_body_bytes", "INDEX idx_user_body_bytes (body_bytes, user_id)")
+
+
+def add_change_tracking(cur):
+    """updated_at and row_version on both tables, a Tombstone table for deletions and the version counter.
+
+    news_service stamps every row it writes with the next value of
+    change_counter.version, so fetch_changes(since) can return only what changed.
+    Rows that existed before this migration all start at version 1.
+    """
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS change_counter (
+        id TINYINT PRIMARY KEY,
+        version BIGINT NOT NULL,
+        pruned_through BIGINT NOT NULL DEFAULT 0
+    ) ENGINE=InnoDB
+    """)
+    cur.execute("INSERT IGNORE INTO change_counter (id, version) VALUES (1, 1)")
+    for table in ("User", "News"):
+        ensure_column(cur, table, "updated_at",
+                      "DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP")
+        ensure_column(cur, table, "row_version", "BIGINT NOT NULL DEFAULT 0")
+        cur.execute(f"UPDATE {table} SET row_version = 1 WHERE row_version = 0")
+        ensure_index(cur, table, f"idx_{table.lower()}_version", f"INDEX idx_{table.lower()}_version (row_version)")
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS Tombstone (
+        version BIGINT NOT NULL,
+        kind VARCHAR(10) NOT NULL,
+        row_id INT NOT NULL,
+        deleted_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (version, kind, row_id),
+        INDEX idx_tombstone_deleted (deleted_at)
+    ) ENGINE=InnoDB
+    """)
+
+
+def add_news_preview(cur):
+    """A stored copy of the first NEWS_PREVIEW_CHARS of each body, kept up to date by MySQL itself.
+
+    The list queries read it instead of LEFT(body, ...), which had to fetch
+    long bodies from their off-page storage only to cut them down again.
+    """
+    ensure_column(cur, "News", "preview",
+                  f"VARCHAR({NEWS_PREVIEW_CHARS}) AS (LEFT(body, {NEWS_PREVIEW_CHARS})) STORED")
+
+
+# (version, description, step) in the order they must run. Append new steps; never renumber.
+MIGRATIONS = [
+    (1, "create User and News tables", create_tables),
+    (2, "FULLTEXT index on News(title, body)", add_fulltext_index),
+    (3, "listing indexes on News(created_at, news_id) and News(user_id, created_at)", add_listing_indexes),
+    (4, "materialized post_count, last_post_at and body_bytes on User", add_user_stats),
+    (5, "sort indexes on User(age, user_id) and News(title, news_id)", add_sort_indexes),
+    (6, "change tracking: updated_at, row_version, Tombstone and change_counter", add_change_tracking),
+    (7, "stored News.preview column for the list queries", add_news_preview),
+    (8, "sort index on User(body_bytes, user_id)", add_body_bytes_index),
+]
+
+
+# --- SQLite -------------------------------------------------------------------
+# The same tables for the embedded backend. Search uses an FTS5 index kept in
+# step with News by triggers instead of a FULLTEXT index; AUTOINCREMENT keeps ids
+# from being reused, which tombstones rely on, and NOCASE mirrors MySQL's
+# case-insensitive collation for usernames, emails and titles.
+
+SQLITE_NOW = "(datetime('now', 'localtime'))"
+
+SQLITE_TABLES = [
+    f"""
+    CREATE TABLE IF NOT EXISTS User (
+        user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL UNIQUE COLLATE NOCASE,
+        email TEXT NOT NULL UNIQUE COLLATE NOCASE,
+        age INTEGER,
+        contact_number TEXT,
+        u_occupation TEXT,
+        post_count INTEGER NOT NULL DEFAULT 0,
+        last_post_at DATETIME,
+        body_bytes INTEGER NOT NULL DEFAULT 0,
+        updated_at DATETIME NOT NULL DEFAULT {SQLITE_NOW},
+        row_version INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS News (
+        news_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL REFERENCES User(user_id) ON DELETE CASCADE,
+        title TEXT COLLATE NOCASE,
+        body TEXT,
+        created_at DATETIME NOT NULL DEFAULT {SQLITE_NOW},
+        updated_at DATETIME NOT NULL DEFAULT {SQLITE_NOW},
+        row_version INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_user_age ON User (age, user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_user_post_count ON User (post_count, user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_user_last_post ON User (last_post_at, user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_user_version ON User (row_version)",
+    "CREATE INDEX IF NOT EXISTS idx_news_created ON News (created_at, news_id)",
+    "CREATE INDEX IF NOT EXISTS idx_news_user_created ON News (user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_news_title ON News (title, news_id)",
+    "CREATE INDEX IF NOT EXISTS idx_news_version ON News (row_version)",
+    """
+    CREATE TABLE IF NOT EXISTS change_counter (
+        id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL,
+        pruned_through INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS Tombstone (
+        version INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        deleted_at DATETIME NOT NULL DEFAULT {SQLITE_NOW},
+        PRIMARY KEY (version, kind, row_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_tombstone_deleted ON Tombstone (deleted_at)",
+]
+
+# ON UPDATE CURRENT_TIMESTAMP; the second condition stops the trigger's own UPDATE from recursing.
+SQLITE_TOUCH_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {table.lower()}_touch AFTER UPDATE ON {table}
+    WHEN NEW.updated_at IS OLD.updated_at AND NEW.updated_at <> {SQLITE_NOW}
+    BEGIN
+        UPDATE {table} SET updated_at = {SQLITE_NOW} WHERE {key} = NEW.{key};
+    END
+    """
+    for table, key in (("User", "user_id"), ("News", "news_id"))
+]
+
+# External-content FTS5 index over News(title, body); also used by the snapshot (see snapshot.py).
+SQLITE_FTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS News_fts USING fts5(
+        title, body, content='News', content_rowid='news_id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_fts_insert AFTER INSERT ON News BEGIN
+        INSERT INTO News_fts (rowid, title, body) VALUES (NEW.news_id, NEW.title, NEW.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_fts_delete AFTER DELETE ON News BEGIN
+        INSERT INTO News_fts (News_fts, rowid, title, body) VALUES ('delete', OLD.news_id, OLD.title, OLD.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_fts_update AFTER UPDATE OF title, body ON News BEGIN
+        INSERT INTO News_fts (News_fts, rowid, title, body) VALUES ('delete', OLD.news_id, OLD.title, OLD.body);
+        INSERT INTO News_fts (rowid, title, body) VALUES (NEW.news_id, NEW.title, NEW.body);
+    END
+    """,
+]
+
+
+def create_sqlite_schema(cur):
+    """Creates the complete schema of MySQL version 6 in an empty SQLite database."""
+    for statement in SQLITE_TABLES + SQLITE_TOUCH_TRIGGERS + SQLITE_FTS:
+        cur.execute(statement)
+    cur.execute("INSERT OR IGNORE INTO change_counter (id, version) VALUES (1, 1)")
+
+
+# SQLite can only add VIRTUAL generated columns to an existing table, so its
+# preview is computed on read; the column is there so the queries stay the same.
+SQLITE_PREVIEW = f"preview TEXT GENERATED ALWAYS AS (substr(body, 1, {NEWS_PREVIEW_CHARS})) VIRTUAL"
+
+
+def add_sqlite_news_preview(cur):
+    cur.execute(f"ALTER TABLE News ADD COLUMN {SQLITE_PREVIEW}")
+
+
+def add_sqlite_body_bytes_index(cur):
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_user_body_bytes ON User (body_bytes, user_id)")
+
+
+# Same contract as MIGRATIONS; each version matches the MySQL schema version it brings SQLite to.
+SQLITE_MIGRATIONS = [
+    (6, "SQLite schema: tables, indexes, FTS5 search index and change tracking", create_sqlite_schema),
+    (7, "News.preview column for the list queries", add_sqlite_news_preview),
+    (8, "sort index on User(body_bytes, user_id)", add_sqlite_body_bytes_index),
+]
+
+
+def migrations():
+    """The migration list for the database db currently talks to."""
+    return SQLITE_MIGRATIONS if db.dialect() == "sqlite" else MIGRATIONS
+
+
+def ensure_version_table(cur):
+    if db.dialect() == "sqlite":
+        cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at DATETIME NOT NULL DEFAULT {SQLITE_NOW}
+        )
+        """)
+        return
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT PRIMARY KEY,
+        description VARCHAR(200) NOT NULL,
+        applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB
+    """)
+
+
+def applied_versions(cur):
+    cur.execute("SELECT version FROM schema_version")
+    return {row[0] for row in cur.fetchall()}
+
+
+def up_to_date(cur):
+    """True if schema_version already records the newest migration; one query, no lock and no DDL."""
+    try:
+        cur.execute("SELECT MAX(version) FROM schema_version")
+    except db.Error:
+        return False
+    return (cur.fetchone()[0] or 0) >= migrations()[-1][0]
+
+
+def migrate_sqlite():
+    """Applies the pending SQLITE_MIGRATIONS in one BEGIN IMMEDIATE transaction.
+
+    SQLite DDL is transactional, and the write lock keeps other processes out
+    until the steps are done.
+    """
+    applied = []
+    with db.cursor(commit=True) as cur:
+        if up_to_date(cur):
+            return applied
+        ensure_version_table(cur)
+        done = applied_versions(cur)
+        for version, description, step in SQLITE_MIGRATIONS:
+            if version not in done:
+                step(cur)
+                cur.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                            (version, description))
+                applied.append(version)
+    return applied
+
+
+def news_row_format(cur):
+    """News's InnoDB ROW_FORMAT ("Dynamic", "Compressed", ...), or None before the table exists."""
+    cur.execute("""
+        SELECT ROW_FORMAT FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'News'
+    """)
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def set_news_compression(cur, on=True):
+    """Rebuilds News with InnoDB page compression on or off; returns False if it already was.
+
+    Compressed pages hold long bodies in about half the disk and buffer-pool
+    space, and MySQL compresses and decompresses them itself, so every query
+    (FULLTEXT search included) works unchanged. The rebuild copies the table.
+    """
+    compressed = (news_row_format(cur) or "").lower() == "compressed"
+    if compressed == on:
+        return False
+    if on:
+        cur.execute(f"ALTER TABLE News ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE={NEWS_KEY_BLOCK_SIZE}")
+    else:
+        cur.execute("ALTER TABLE News ROW_FORMAT=DYNAMIC KEY_BLOCK_SIZE=0")
+    return True
+
+
+def migrate():
+    """Applies every pending migration in order and returns the versions it applied.
+
+    With NEWS_COMPRESS set it also turns on page compression for News (see
+    set_news_compression); it never turns it off, which takes `schema.py compress --off`.
+    """
+    if db.dialect() == "sqlite":
+        return migrate_sqlite()
+    applied = []
+    with db.connection() as conn:
+        cur = conn.cursor()
+        # The common case at startup: nothing to do, so skip the lock and the DDL.
+        if up_to_date(cur) and not (COMPRESS_NEWS and (news_row_format(cur) or "").lower() != "compressed"):
+            return applied
+        cur.execute("SELECT GET_LOCK(%s, %s)", (MIGRATE_LOCK, MIGRATE_LOCK_TIMEOUT))
+        if cur.fetchone()[0] != 1:
+            raise db.Error(msg="Timed out waiting for another process to finish migrating the schema.")
+        try:
+            ensure_version_table(cur)
+            done = applied_versions(cur)
+            for version, description, step in MIGRATIONS:
+                if version in done:
+                    continue
+                # MySQL commits DDL implicitly, so each step is written to be safe to re-run.
+                step(cur)
+                cur.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                            (version, description))
+                conn.commit()
+                applied.append(version)
+            if COMPRESS_NEWS:
+                set_news_compression(cur, True)
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (MIGRATE_LOCK,))
+            cur.fetchall()
+    return applied
+
+
+def storage():
+    """Measures what News takes on disk and what the list queries transfer, as a dict of byte counts.
+
+    body_bytes / preview_bytes are the text a full-body read and a list read
+    would ship for every post; data_bytes / index_bytes are the table's size as
+    stored (compressed pages included), so body_bytes / data_bytes shows roughly
+    what page compression saves.
+    """
+    with db.cursor() as cur:
+        cur.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0), COALESCE(SUM(LENGTH(preview)), 0) FROM News")
+        rows, body_bytes, preview_bytes = cur.fetchone()
+        report = {"rows": rows, "body_bytes": int(body_bytes), "preview_bytes": int(preview_bytes)}
+        if db.dialect() == "sqlite":
+            cur.execute("PRAGMA page_count")
+            pages = cur.fetchone()[0]
+            cur.execute("PRAGMA page_size")
+            report["file_bytes"] = pages * cur.fetchone()[0]
+            return report
+        cur.execute("""
+            SELECT ROW_FORMAT, DATA_LENGTH, INDEX_LENGTH FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'News'
+        """)
+        row_format, data_bytes, index_bytes = cur.fetchone()
+    report.update(row_format=row_format, data_bytes=int(data_bytes), index_bytes=int(index_bytes))
+    return report
+
+
+def status():
+    """Returns (version, description, applied_at or None) for every known migration."""
+    with db.cursor() as cur:
+        ensure_version_table(cur)
+        cur.execute("SELECT version, applied_at FROM schema_version")
+        applied = dict(cur.fetchall())
+    return [(version, description, applied.get(version)) for version, description, _ in migrations()]
+
+
+# Representative forms of the app's hot queries (see news_service.py), with sample parameters.
+EXPLAIN_QUERIES = {
+    "news_first_page": ("""
+        SELECT N.news_id, N.user_id, U.username, N.title, N.preview, N.created_at
+        FROM News N LEFT JOIN User U ON N.user_id = U.user_id
+        ORDER BY N.created_at DESC, N.news_id DESC LIMIT 101
+    """, ()),
+    "news_next_page": ("""
+        SELECT N.news_id, N.user_id, U.username, N.title, N.preview, N.created_at
+        FROM News N LEFT JOIN User U ON N.user_id = U.user_id
+        WHERE (N.created_at < %s OR (N.created_at = %s AND N.news_id < %s))
+        ORDER BY N.created_at DESC, N.news_id DESC LIMIT 101
+    """, ("2024-06-01 00:00:00", "2024-06-01 00:00:00", 1000)),
+    "news_by_title": ("""
+        SELECT N.news_id, N.user_id, U.username, N.title, N.preview, N.created_at
+        FROM News N LEFT JOIN User U ON N.user_id = U.user_id
+        WHERE (N.title > %s OR (N.title = %s AND N.news_id > %s))
+        ORDER BY N.title ASC, N.news_id ASC LIMIT 101
+    """, ("M", "M", 0)),
+    "news_by_author_dates": ("""
+        SELECT N.news_id, N.user_id, U.username, N.title, N.preview, N.created_at
+        FROM News N LEFT JOIN User U ON N.user_id = U.user_id
+        WHERE N.user_id = %s AND N.created_at >= %s AND N.created_at < %s
+        ORDER BY N.created_at DESC, N.news_id DESC LIMIT 101
+    """, (1, "2024-01-01", "2024-07-01")),
+    "users_by_age": ("""
+        SELECT user_id, username, age FROM User
+        WHERE age >= %s AND age <= %s
+        ORDER BY age ASC, user_id ASC LIMIT 201
+    """, (18, 30)),
+    "users_by_body_bytes": ("""
+        SELECT user_id, username, body_bytes FROM User
+        ORDER BY body_bytes DESC, user_id DESC LIMIT 201
+    """, ()),
+    "news_for_user": ("""
+        SELECT N.news_id, N.title, N.preview, N.created_at
+        FROM News N WHERE N.user_id = %s ORDER BY created_at DESC
+    """, (1,)),
+    "top_authors": ("""
+        SELECT user_id, username, post_count FROM User
+        ORDER BY post_count DESC, user_id DESC LIMIT 10
+    """, ()),
+    "changed_news": ("""
+        SELECT N.news_id, N.user_id, U.username, N.title, N.preview, N.created_at
+        FROM News N LEFT JOIN User U ON N.user_id = U.user_id
+        WHERE N.row_version > %s ORDER BY N.row_version LIMIT 5001
+    """, (1,)),
+    "user_by_username": ("SELECT user_id FROM User WHERE username = %s", ("alice",)),
+    "search_users_prefix": ("""
+        SELECT user_id, username FROM User WHERE username LIKE %s
+        ORDER BY username = %s DESC, CHAR_LENGTH(username), username LIMIT 200
+    """, ("ali%", "ali")),
+    "search_news_fulltext": ("""
+        SELECT news_id FROM News
+        WHERE MATCH(title, body) AGAINST (%s IN BOOLEAN MODE) LIMIT 200
+    """, ("+election*",)),
+    "news_by_id": ("SELECT news_id, user_id, title, body, created_at FROM News WHERE news_id = %s", (1,)),
+}
+
+
+def explain(names=None):
+    """Runs EXPLAIN (EXPLAIN QUERY PLAN on SQLite) on the app's queries; returns {name: [plan rows as dicts]}."""
+    plans = {}
+    sqlite = db.dialect() == "sqlite"
+    with db.cursor(dictionary=True) as cur:
+        for name, (sql, params) in EXPLAIN_QUERIES.items():
+            if names and name not in names:
+                continue
+            if sqlite and "AGAINST" in sql:
+                continue  # FULLTEXT syntax; SQLite searches News_fts instead
+            cur.execute(("EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN ") + sql, params)
+            plans[name] = cur.fetchall()
+    return plans
+
+
+def plan_warnings(plan):
+    """Flags full scans and filesorts in one query's EXPLAIN rows."""
+    warnings = []
+    for row in plan:
+        if "detail" in row:
+            # SQLite: "SCAN T" without an index is a full scan, a temp B-tree is its filesort.
+            detail = row["detail"]
+            if detail.startswith("SCAN ") and " INDEX " not in detail:
+                warnings.append(f"full scan: {detail}")
+            if "USE TEMP B-TREE" in detail:
+                warnings.append(f"temporary sort: {detail}")
+            continue
+        extra = row.get("Extra") or ""
+        if row.get("type") == "ALL":
+            warnings.append(f"full scan of {row.get('table')}")
+        if "Using filesort" in extra:
+            warnings.append(f"filesort on {row.get('table')}")
+        if "Using temporary" in extra:
+            warnings.append(f"temporary table for {row.get('table')}")
+    return warnings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Schema migrations and query plans for the news blog database.")
+    parser.add_argument("action", choices=("migrate", "status", "explain", "rebuild-stats", "storage", "compress"))
+    parser.add_argument("queries", nargs="*", help="explain only these queries")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--off", action="store_true", help="compress: turn News page compression off again")
+    parser.add_argument("--sqlite", metavar="PATH", help="use the SQLite database at PATH instead of MySQL")
+    args = parser.parse_args(argv)
+    if args.sqlite:
+        db.use_backend("sqlite", args.sqlite)
+
+    try:
+        if args.action == "migrate":
+            applied = migrate()
+            print(f"Applied migrations: {', '.join(map(str, applied))}." if applied else "Schema is up to date.")
+        elif args.action == "rebuild-stats":
+            with db.cursor(commit=True) as cur:
+                changed = rebuild_user_stats(cur)
+            print(f"Rebuilt post statistics; {changed} user(s) were out of date.")
+        elif args.action == "storage":
+            print(json.dumps(storage(), indent=2))
+        elif args.action == "compress":
+            if db.dialect() == "sqlite":
+                print("Page compression is a MySQL (InnoDB) feature; nothing to do on SQLite.")
+                return 0
+            with db.cursor() as cur:
+                changed = set_news_compression(cur, not args.off)
+            state = "off" if args.off else "on"
+            print(f"News page compression turned {state}." if changed else f"News page compression was already {state}.")
+        elif args.action == "status":
+            for version, description, applied_at in status():
+                print(f"{version:>3}  {'applied ' + str(applied_at) if applied_at else 'pending':<28} {description}")
+        else:
+            plans = explain(args.queries)
+            if args.json:
+                print(json.dumps(plans, indent=2, default=str))
+                return 0
+            for name, plan in plans.items():
+                print(name)
+                for row in plan:
+                    if "detail" in row:
+                        print(f"  {row['detail']}")
+                        continue
+                    print(f"  {row.get('table')}: type={row.get('type')} key={row.get('key')} "
+                          f"rows={row.get('rows')} extra={row.get('Extra') or ''}")
+                for warning in plan_warnings(plan):
+                    print(f"  ! {warning}")
+    except db.Error as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""Local read-only replica of the User and News tables in an SQLite file.
+
+The GUI keeps the snapshot fresh in the background and falls back to it when
+MySQL is unreachable (see db.use_snapshot). Writes made while offline are
+queued here and replayed once the server is back.
+
+    python snapshot.py sync
+    python snapshot.py status
+    python snapshot.py replay
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import db
+import schema
+
+
+SNAPSHOT_PATH = os.environ.get("NEWS_SNAPSHOT", "usernews_snapshot.db")
+SYNC_BATCH = 2000       # rows per streamed batch
+
+USER_COLUMNS = ("user_id", "username", "email", "age", "contact_number", "u_occupation",
+                "post_count", "last_post_at", "body_bytes")
+NEWS_COLUMNS = ("news_id", "user_id", "title", "body", "created_at")
+
+# Mirrors the MySQL tables (see schema.py) closely enough for news_service's read queries;
+# search uses the same FTS5 index as the SQLite backend (schema.SQLITE_FTS).
+SNAPSHOT_DDL = f"""
+CREATE TABLE IF NOT EXISTS User (
+    user_id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    email TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    age INTEGER,
+    contact_number TEXT,
+    u_occupation TEXT,
+    post_count INTEGER NOT NULL DEFAULT 0,
+    last_post_at DATETIME,
+    body_bytes INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_user_age ON User (age, user_id);
+CREATE INDEX IF NOT EXISTS idx_user_post_count ON User (post_count, user_id);
+CREATE INDEX IF NOT EXISTS idx_user_last_post ON User (last_post_at, user_id);
+CREATE INDEX IF NOT EXISTS idx_user_body_bytes ON User (body_bytes, user_id);
+CREATE TABLE IF NOT EXISTS News (
+    news_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    title TEXT COLLATE NOCASE,
+    body TEXT,
+    created_at DATETIME NOT NULL,
+    {schema.SQLITE_PREVIEW}
+);
+CREATE INDEX IF NOT EXISTS idx_news_created ON News (created_at, news_id);
+CREATE INDEX IF NOT EXISTS idx_news_user_created ON News (user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_news_title ON News (title, news_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS pending_writes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    args TEXT NOT NULL,
+    queued_at TEXT NOT NULL
+);
+"""
+
+
+def open_snapshot(path=SNAPSHOT_PATH):
+    """Opens (creating if needed) the snapshot database for writing."""
+    conn = db.open_sqlite(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    indexed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'News_fts'").fetchone()
+    conn.executescript(SNAPSHOT_DDL + ";\n".join(schema.SQLITE_FTS) + ";")
+    if "preview" not in {row[1] for row in conn.execute("PRAGMA table_xinfo(News)")}:
+        conn.execute(f"ALTER TABLE News ADD COLUMN {schema.SQLITE_PREVIEW}")
+    if not indexed:
+        # Snapshots written before the search index existed index their posts once.
+        with conn:
+            conn.execute("INSERT INTO News_fts (News_fts) VALUES ('rebuild')")
+    return conn
+
+
+def exists(path=SNAPSHOT_PATH):
+    """True if path holds a snapshot that has been synced at least once."""
+    return os.path.exists(path) and last_sync(path) is not None
+
+
+def last_sync(path=SNAPSHOT_PATH):
+    conn = open_snapshot(path)
+    try:
+        value = _state(conn, "last_sync")
+    finally:
+        conn.close()
+    return datetime.fromisoformat(value) if value else None
+
+
+def _state(local, name):
+    row = local.execute("SELECT value FROM sync_state WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_state(local, name, value):
+    local.execute("INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)", (name, str(value)))
+
+
+def _stream(conn, query, params=()):
+    """Yields batches of SYNC_BATCH rows from MySQL with an unbuffered cursor on conn."""
+    cur = conn.cursor(buffered=False)
+    cur.execute(query, params)
+    while True:
+        rows = cur.fetchmany(SYNC_BATCH)
+        if not rows:
+            break
+        yield rows
+
+
+def _copy(conn, local, table, columns, where="", params=()):
+    """Streams rows of table from MySQL into the snapshot, replacing local rows with the same id; returns the count."""
+    count = 0
+    insert = f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    for rows in _stream(conn, f"SELECT {', '.join(columns)} FROM {table}{where}", params):
+        local.executemany(insert, rows)
+        count += len(rows)
+    return count
+
+
+def sync(path=SNAPSHOT_PATH):
+    """Brings the snapshot up to date with MySQL and returns counters.
+
+    After the first full copy only rows whose row_version is past the last
+    synced version travel, and deletions come from the Tombstone table (see
+    news_service.fetch_changes). A snapshot whose version predates the pruned
+    tombstones is copied in full again.
+    """
+    started = time.perf_counter()
+    stats = {"full": False, "users": 0, "news": 0, "deleted_users": 0, "deleted_news": 0}
+    local = open_snapshot(path)
+    try:
+        with db.get_pool().connection() as conn, local:
+            # Every query reads the same consistent MySQL snapshot, taken together with the version.
+            conn.start_transaction(consistent_snapshot=True, readonly=True)
+            cur = conn.cursor()
+            cur.execute("SELECT version, pruned_through FROM change_counter WHERE id = 1")
+            version, pruned_through = cur.fetchone()
+            since = _state(local, "version")
+            since = None if since is None else int(since)
+            if since is None or since < pruned_through:
+                stats["full"] = True
+                local.execute("DELETE FROM News")
+                local.execute("DELETE FROM User")
+                stats["users"] = _copy(conn, local, "User", USER_COLUMNS)
+                stats["news"] = _copy(conn, local, "News", NEWS_COLUMNS)
+            else:
+                changed = " WHERE row_version > %s"
+                stats["users"] = _copy(conn, local, "User", USER_COLUMNS, changed, (since,))
+                stats["news"] = _copy(conn, local, "News", NEWS_COLUMNS, changed, (since,))
+                for rows in _stream(conn, "SELECT kind, row_id FROM Tombstone WHERE version > %s", (since,)):
+                    for kind, table, counter in (("user", "User", "deleted_users"), ("news", "News", "deleted_news")):
+                        ids = [(row_id,) for k, row_id in rows if k == kind]
+                        local.executemany(f"DELETE FROM {table} WHERE {kind}_id = ?", ids)
+                        stats[counter] += len(ids)
+            _set_state(local, "version", version)
+            _set_state(local, "last_sync", datetime.now().isoformat(sep=" ", timespec="seconds"))
+    finally:
+        local.close()
+    stats["version"] = version
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def queue_write(name, args, kwargs, path=SNAPSHOT_PATH):
+    """Records a news_service write call to be replayed when MySQL is reachable again."""
+    local = open_snapshot(path)
+    try:
+        with local:
+            local.execute("INSERT INTO pending_writes (name, args, queued_at) VALUES (?, ?, ?)",
+                          (name, json.dumps({"args": list(args), "kwargs": kwargs}),
+                           datetime.now().isoformat(sep=" ", timespec="seconds")))
+    finally:
+        local.close()
+
+
+def pending_count(path=SNAPSHOT_PATH):
+    local = open_snapshot(path)
+    try:
+        return local.execute("SELECT COUNT(*) FROM pending_writes").fetchone()[0]
+    finally:
+        local.close()
+
+
+def replay(path=SNAPSHOT_PATH):
+    """Runs the queued writes against MySQL in order; returns (replayed, [failure messages]).
+
+    A write that is no longer valid (e.g. its user was deleted meanwhile, or
+    its username was taken) is dropped and reported; only an error meaning the
+    server is unreachable again stops the replay, keeping that write and the rest.
+    """
+    import news_service
+
+    local = open_snapshot(path)
+    replayed, failures = 0, []
+    try:
+        for write_id, name, payload in local.execute(
+                "SELECT id, name, args FROM pending_writes ORDER BY id").fetchall():
+            call = json.loads(payload)
+            try:
+                getattr(news_service, name)(*call["args"], **call["kwargs"])
+                replayed += 1
+            except (LookupError, ValueError) as e:
+                failures.append(f"{name}: {e}")
+            except db.Error as e:
+                if db.unreachable(e):
+                    raise
+                failures.append(f"{name}: {e}")
+            with local:
+                local.execute("DELETE FROM pending_writes WHERE id = ?", (write_id,))
+    finally:
+        local.close()
+    return replayed, failures
+
+
+def reconnect(path=SNAPSHOT_PATH):
+    """Switches db back to MySQL if it answers, replays queued writes and resyncs; raises Error if still down."""
+    with db.get_pool().cursor() as cur:
+        cur.execute("SELECT 1")
+        cur.fetchall()
+    db.use_snapshot(None)
+    try:
+        replayed, failures = replay(path)
+    except db.Error:
+        db.use_snapshot(path)
+        raise
+    stats = sync(path)
+    stats.update(replayed=replayed, failures=failures)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local SQLite snapshot of the news blog database.")
+    parser.add_argument("action", choices=("sync", "status", "replay"))
+    parser.add_argument("--path", default=SNAPSHOT_PATH)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.action == "sync":
+            print(json.dumps(sync(args.path)))
+        elif args.action == "status":
+            synced = last_sync(args.path) if os.path.exists(args.path) else None
+            print(f"Last sync: {synced or 'never'}")
+            print(f"Queued writes: {pending_count(args.path) if synced else 0}")
+        else:
+            replayed, failures = replay(args.path)
+            print(f"Replayed {replayed} queued write(s).")
+            for failure in failures:
+                print(f"  dropped {failure}", file=sys.stderr)
+    except db.Error as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+"""Publishes the news posts as a static site with RSS and Atom feeds.
+
+    python static_site.py --output site --base-url https://news.example.com
+    python static_site.py --output site --workers 4
+    python static_site.py --output site --full
+
+The site has index.html (the newest posts), page/<n>.html, one
+news/<news_id>.html per post, users/<user_id>/index.html and <n>.html
+archives per author, and feed.xml (RSS) / atom.xml. Pages are numbered from
+the oldest post, so a new post only changes the newest pages instead of
+shifting every page by one.
+
+Each run reads the post list without bodies and hashes what every page is
+built from (a post's row_version and author, or a list page's rows). Only
+pages whose hash differs from the manifest of the last run, or whose file is
+missing, are rendered; pages that no longer exist are deleted. Rendering is
+spread over a process pool, each worker fetching the bodies of its own batch
+of posts and writing the pages straight to disk.
+"""
+import argparse
+import hashlib
+import html
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from email.utils import format_datetime
+
+import db
+import news_service as svc
+
+
+SITE_DIR = "site"
+MANIFEST_NAME = ".manifest.json"
+TEMPLATE_VERSION = 1    # bump when the templates below change, so every page is rendered again
+INDEX_PAGE_SIZE = 50    # posts per index and archive page
+FEED_ITEMS = 20         # newest posts in feed.xml and atom.xml
+RENDER_BATCH = 200      # pages per worker task; post pages fetch their bodies in one query per batch
+
+STYLE = ("body{font-family:sans-serif;max-width:46em;margin:2em auto;padding:0 1em;line-height:1.5}"
+         "article{margin-bottom:1.5em}small{color:#666}nav a{margin-right:1em}")
+
+
+def page_hash(data):
+    """Content hash of everything a page is built from."""
+    raw = json.dumps([TEMPLATE_VERSION, data], default=str, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def load_manifest(output):
+    try:
+        with open(os.path.join(output, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(output, manifest):
+    path = os.path.join(output, MANIFEST_NAME)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def write_page(output, path, chunks):
+    """Writes the text chunks to output/path through a temporary file, so readers never see half a page."""
+    target = os.path.join(output, path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target + ".tmp", "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(target + ".tmp", target)
+
+
+# --- templates -------------------------------------------------------------
+# Each yields the page in pieces; root is the relative path back to the site root.
+
+def _head(title, root):
+    yield ('<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+           f"<title>{html.escape(title)}</title><style>{STYLE}</style>"
+           f'<link rel="alternate" type="application/rss+xml" href="{root}feed.xml">'
+           f'<link rel="alternate" type="application/atom+xml" href="{root}atom.xml">'
+           f'</head><body><nav><a href="{root}index.html">Home</a><a href="{root}feed.xml">RSS</a></nav>\n')
+
+
+def _date(value):
+    return value.strftime("%Y-%m-%d %H:%M") if isinstance(value, datetime) else str(value)
+
+
+def render_post(record, username, root="../"):
+    yield from _head(record["title"] or "Untitled", root)
+    yield f"<article><h1>{html.escape(record['title'] or 'Untitled')}</h1><p><small>"
+    yield f'{_date(record["created_at"])} by <a href="{root}users/{record["user_id"]}/index.html">'
+    yield f"{html.escape(username or 'unknown')}</a></small></p>\n"
+    for paragraph in (record["body"] or "").split("\n\n"):
+        if paragraph.strip():
+            yield f"<p>{html.escape(paragraph.strip()).replace(chr(10), '<br>')}</p>\n"
+    yield "</article></body></html>\n"
+
+
+def render_list(title, rows, older, newer, root):
+    """A list page: rows newest first, with links to the older and newer pages (or None)."""
+    yield from _head(title, root)
+    yield f"<h1>{html.escape(title)}</h1>\n"
+    for news_id, user_id, username, post_title, preview, created_at in rows:
+        yield (f'<article><h2><a href="{root}news/{news_id}.html">{html.escape(post_title or "Untitled")}</a></h2>'
+               f'<small>{_date(created_at)} by <a href="{root}users/{user_id}/index.html">'
+               f"{html.escape(username or 'unknown')}</a></small><p>{html.escape(preview or '')}</p></article>\n")
+    yield "<nav>"
+    if newer:
+        yield f'<a href="{newer}">Newer posts</a>'
+    if older:
+        yield f'<a href="{older}">Older posts</a>'
+    yield "</nav></body></html>\n"
+
+
+def render_rss(rows, base_url):
+    yield ('<?xml version="1.0" encoding="utf-8"?>\n<rss version="2.0"><channel><title>News</title>'
+           f"<link>{html.escape(base_url)}/index.html</link><description>Latest news posts</description>\n")
+    for news_id, _, username, title, preview, created_at in rows:
+        link = html.escape(f"{base_url}/news/{news_id}.html")
+        yield (f"<item><title>{html.escape(title or 'Untitled')}</title><link>{link}</link>"
+               f'<guid isPermaLink="true">{link}</guid><author>{html.escape(username or "")}</author>'
+               f"<pubDate>{format_datetime(created_at.astimezone())}</pubDate>"
+               f"<description>{html.escape(preview or '')}</description></item>\n")
+    yield "</channel></rss>\n"
+
+
+def render_atom(rows, base_url):
+    updated = rows[0][5].astimezone().isoformat() if rows else datetime.now().astimezone().isoformat()
+    yield ('<?xml version="1.0" encoding="utf-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom"><title>News</title>'
+           f'<id>{html.escape(base_url)}/</id><link href="{html.escape(base_url)}/index.html"/>'
+           f"<updated>{updated}</updated>\n")
+    for news_id, _, username, title, preview, created_at in rows:
+        link = html.escape(f"{base_url}/news/{news_id}.html")
+        yield (f"<entry><title>{html.escape(title or 'Untitled')}</title><id>{link}</id>"
+               f'<link href="{link}"/><updated>{created_at.astimezone().isoformat()}</updated>'
+               f"<author><name>{html.escape(username or 'unknown')}</name></author>"
+               f"<summary>{html.escape(preview or '')}</summary></entry>\n")
+    yield "</feed>\n"
+
+
+# --- planning --------------------------------------------------------------
+
+def _paged(pages, title, rows, prefix, index):
+    """Adds the numbered pages prefix<n>.html for rows (oldest first) and the index page with the newest rows."""
+    root = "../" * prefix.count("/")
+    chunks = [rows[i:i + INDEX_PAGE_SIZE] for i in range(0, len(rows), INDEX_PAGE_SIZE)]
+    for number, chunk in enumerate(chunks, 1):
+        older = f"{root}{prefix}{number - 1}.html" if number > 1 else None
+        newer = f"{root}{prefix}{number + 1}.html" if number < len(chunks) else f"{root}{index}"
+        pages[f"{prefix}{number}.html"] = ("list", (f"{title}, page {number}", chunk[::-1], older, newer, root))
+    # The index overlaps the newest numbered page, so "older" skips to the one before it.
+    index_root = "../" * index.count("/")
+    older = f"{index_root}{prefix}{len(chunks) - 1}.html" if len(chunks) > 1 else None
+    pages[index] = ("list", (title, rows[-INDEX_PAGE_SIZE:][::-1], older, None, index_root))
+
+
+def plan(base_url):
+    """Returns {path: (kind, data)} for every page of the site, from the post list without bodies."""
+    pages, everything, by_user = {}, [], {}
+    for batch in svc.iter_news_listing():
+        for news_id, user_id, username, title, preview, created_at, row_version in batch:
+            row = (news_id, user_id, username, title, preview, created_at)
+            pages[f"news/{news_id}.html"] = ("post", (news_id, row_version, username))
+            everything.append(row)
+            by_user.setdefault(user_id, []).append(row)
+
+    for user_id, rows in by_user.items():
+        _paged(pages, f"Posts by {rows[-1][2] or 'unknown'}", rows, f"users/{user_id}/", f"users/{user_id}/index.html")
+    _paged(pages, "News", everything, "page/", "index.html")
+    feed = everything[-FEED_ITEMS:][::-1]
+    pages["feed.xml"] = ("rss", (feed, base_url))
+    pages["atom.xml"] = ("atom", (feed, base_url))
+    return pages
+
+
+# --- rendering -------------------------------------------------------------
+
+def _init_worker(backend, sqlite_path, config):
+    db.configure(**config)
+    db.use_backend(backend, sqlite_path)
+
+
+def render_batch(output, jobs):
+    """Renders and writes a list of (path, kind, data) pages; returns the paths written."""
+    posts = [data[0] for _, kind, data in jobs if kind == "post"]
+    records = {r["news_id"]: r for r in svc.fetch_news_records(posts)} if posts else {}
+    written = []
+    for path, kind, data in jobs:
+        if kind == "post":
+            record = records.get(data[0])
+            if record is None:
+                continue  # deleted since the listing; the next run drops the page
+            chunks = render_post(record, data[2])
+        elif kind == "list":
+            chunks = render_list(*data)
+        elif kind == "rss":
+            chunks = render_rss(*data)
+        else:
+            chunks = render_atom(*data)
+        write_page(output, path, chunks)
+        written.append(path)
+    return written
+
+
+def build(output=SITE_DIR, base_url="", workers=None, full=False):
+    """Brings the site in output up to date and returns counters."""
+    started = time.perf_counter()
+    base_url = base_url.rstrip("/")
+    pages = plan(base_url)
+    # Loaded even for a full run: it lists the pages of removed posts to delete.
+    old = load_manifest(output)
+    hashes = {path: page_hash([kind, data]) for path, (kind, data) in pages.items()}
+    todo = [(path, kind, data) for path, (kind, data) in pages.items()
+            if full or old.get(path) != hashes[path] or not os.path.exists(os.path.join(output, path))]
+    # Post pages first, grouped by id, so each batch fetches neighbouring rows.
+    todo.sort(key=lambda job: (job[1] != "post", job[0] if job[1] != "post" else job[2][0]))
+    batches = [todo[i:i + RENDER_BATCH] for i in range(0, len(todo), RENDER_BATCH)]
+
+    manifest = {path: digest for path, digest in old.items() if path in pages}
+    rendered = 0
+    try:
+        if workers == 1 or len(batches) <= 1:
+            for batch in batches:
+                for path in render_batch(output, batch):
+                    manifest[path] = hashes[path]
+                    rendered += 1
+        else:
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_worker,
+                                     initargs=(db.BACKEND, db.SQLITE_PATH, dict(db.DB_CONFIG))) as pool:
+                for future in as_completed([pool.submit(render_batch, output, batch) for batch in batches]):
+                    for path in future.result():
+                        manifest[path] = hashes[path]
+                        rendered += 1
+    finally:
+        os.makedirs(output, exist_ok=True)
+        save_manifest(output, manifest)
+
+    removed = 0
+    for path in old:
+        if path not in pages and os.path.exists(os.path.join(output, path)):
+            os.remove(os.path.join(output, path))
+            removed += 1
+    return {"pages": len(pages), "rendered": rendered, "removed": removed,
+            "seconds": round(time.perf_counter() - started, 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish the news posts as static HTML pages and feeds.")
+    parser.add_argument("--output", default=SITE_DIR)
+    parser.add_argument("--base-url", default="", help="absolute site URL used in the feeds' links")
+    parser.add_argument("--workers", type=int, default=None, help="rendering processes (default: one per CPU)")
+    parser.add_argument("--full", action="store_true", help="ignore the manifest and render every page")
+    parser.add_argument("--sqlite", metavar="PATH", help="use the SQLite database at PATH instead of MySQL")
+    args = parser.parse_args(argv)
+    if args.sqlite:
+        db.use_backend("sqlite", args.sqlite)
+
+    try:
+        print(json.dumps(build(args.output, args.base_url, args.workers, args.full)))
+    except (db.Error, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+import schema  # noqa: E402
+from cache import entities, searches  # noqa: E402
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """A migrated SQLite database of its own for the test; yields its path."""
+    path = str(tmp_path / "news.db")
+    db.use_backend("sqlite", path)
+    schema.migrate()
+    entities.clear()
+    searches.clear()
+    yield path
+    db.use_snapshot(None)
+    db.use_backend("sqlite", path)  # closes the pool's connections
+    entities.clear()
+    searches.clear()
@@ -0,0 +1,38 @@
+import pytest
+
+import bulk_io
+import news_service as svc
+
+
+def test_import_news_skips_unknown_authors(sqlite_db):
+    alice = svc.insert_user("alice", "alice@example.com", 30, "", "")
+    since = svc.current_version()
+    records = [
+        {"username": "alice", "title": "By name", "body": "one"},
+        {"user_id": str(alice), "title": "By id", "body": "two"},
+        {"user_id": "9999", "title": "Nobody", "body": "three"},
+        {"user_id": "x", "title": "Bad id", "body": "four"},
+        {"username": "ghost", "title": "Ghost", "body": "five"},
+    ]
+    stats = bulk_io.import_news(records)
+    assert stats["inserted"] == 2 and stats["skipped"] == 3
+
+    changes = svc.fetch_changes(since)
+    assert sorted(row[3] for row in changes["news"]) == ["By id", "By name"]
+    assert svc.fetch_user_row(alice)[6] == 2
+
+
+def test_aborted_import_stamps_committed_batches(sqlite_db):
+    alice = svc.insert_user("alice", "alice@example.com", 30, "", "")
+    since = svc.current_version()
+
+    def records():
+        yield {"username": "alice", "title": "Kept", "body": "one"}
+        raise OSError("file truncated")
+
+    with pytest.raises(OSError):
+        bulk_io.import_news(records(), batch_size=1, commit_every=1)
+
+    changes = svc.fetch_changes(since)
+    assert [row[3] for row in changes["news"]] == ["Kept"]
+    assert svc.fetch_user_row(alice)[6] == 1
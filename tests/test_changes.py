@@ -0,0 +1,40 @@
+import news_service as svc
+
+
+def test_changes_since_a_version(sqlite_db):
+    alice = svc.insert_user("alice", "alice@example.com", 30, "", "")
+    bob = svc.insert_user("bob", "bob@example.com", None, "", "")
+    first = svc.insert_news(alice, "First", "one")
+    second = svc.insert_news(bob, "Second", "two")
+    since = svc.current_version()
+
+    svc.update_news_post(first, "First, edited", "one")
+    svc.delete_user(bob)
+
+    changes = svc.fetch_changes(since)
+    assert not changes["reset"]
+    assert changes["version"] == svc.current_version() > since
+    assert [row[0] for row in changes["news"]] == [first]
+    assert changes["news"][0][3] == "First, edited"
+    assert changes["deleted_users"] == [bob]
+    assert changes["deleted_news"] == [second]
+    assert svc.fetch_changes(changes["version"])["news"] == []
+
+
+def test_too_many_changes_ask_for_a_reset(sqlite_db):
+    since = svc.current_version()
+    alice = svc.insert_user("alice", "alice@example.com", 30, "", "")
+    svc.insert_news(alice, "First", "one")
+    changes = svc.fetch_changes(since, limit=1)
+    assert changes["reset"]
+    assert changes["users"] == [] and changes["news"] == []
+    assert not svc.fetch_changes(since, limit=2)["reset"]
+
+
+def test_pruned_tombstones_ask_for_a_reset(sqlite_db):
+    alice = svc.insert_user("alice", "alice@example.com", 30, "", "")
+    since = svc.current_version()
+    svc.delete_user(alice)
+    assert svc.prune_tombstones(days=-1) == 1
+    assert svc.fetch_changes(since)["reset"]
+    assert not svc.fetch_changes(svc.current_version())["reset"]
@@ -0,0 +1,65 @@
+import news_service as svc
+from cache import EntityCache, record_size
+
+
+def user(user_id, username):
+    return {"user_id": user_id, "username": username, "email": f"{username}@example.com"}
+
+
+def test_get_put_and_username_index():
+    cache = EntityCache()
+    cache.put("user", "3", user(3, "alice"))
+    assert cache.get("user", 3)["username"] == "alice"
+    assert cache.user_id_for("alice") == 3
+    assert cache.get("news", 3) is None
+    assert cache.snapshot()["hits"] == 2 and cache.snapshot()["misses"] == 1
+
+    cache.put("user", 3, user(3, "alicia"))
+    assert cache.user_id_for("alice") is None
+    assert cache.user_id_for("alicia") == 3
+
+
+def test_expired_records_are_misses():
+    cache = EntityCache(ttl=-1)
+    cache.put("user", 1, user(1, "alice"))
+    assert cache.get("user", 1) is None
+    assert cache.user_id_for("alice") is None
+    assert cache.snapshot()["expired"] == 1 and cache.snapshot()["entries"] == 0
+
+
+def test_least_recently_used_records_are_evicted():
+    records = [user(i, f"user{i}") for i in range(3)]
+    cache = EntityCache(max_bytes=sum(record_size(r) for r in records[:2]))
+    cache.put("user", 0, records[0])
+    cache.put("user", 1, records[1])
+    cache.get("user", 0)
+    cache.put("user", 2, records[2])
+    assert cache.get("user", 1) is None
+    assert cache.get("user", 0) and cache.get("user", 2)
+    assert cache.snapshot()["evictions"] == 1
+    assert cache.snapshot()["bytes"] <= cache.max_bytes
+
+
+def test_invalidation():
+    cache = EntityCache()
+    cache.put("user", 1, user(1, "alice"))
+    for news_id, user_id in ((10, 1), (11, 2), (12, 1)):
+        cache.put("news", news_id, {"news_id": news_id, "user_id": user_id})
+    cache.invalidate("user", "1")
+    cache.invalidate_where("news", lambda news: news["user_id"] == 1)
+    assert cache.user_id_for("alice") is None
+    assert [cache.get("news", i) is not None for i in (10, 11, 12)] == [False, True, False]
+
+
+def test_service_writes_invalidate_cached_records(sqlite_db):
+    alice = svc.insert_user("alice", "alice@example.com", 30, "", "")
+    news_id = svc.insert_news(alice, "First", "one")
+    assert svc.get_news(news_id)["title"] == "First"
+    assert svc.entities.get("news", news_id) is not None
+
+    svc.update_news_post(news_id, "Edited", "one")
+    assert svc.get_news(news_id)["title"] == "Edited"
+
+    svc.delete_user(alice)
+    assert svc.get_news(news_id) is None
+    assert svc.get_user(alice) is None
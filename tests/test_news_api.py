@@ -0,0 +1,96 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+import news_api
+import news_service as svc
+
+
+@pytest.fixture
+def api(sqlite_db, monkeypatch):
+    monkeypatch.setattr(news_api, "VERSION_CHECK_SECONDS", 0)
+    news_api._version.update(value=None, checked=0.0)
+    news_api.responses.clear()
+    alice = svc.insert_user("alice", "alice@example.com", 30, "", "")
+    return [svc.insert_news(alice, f"Post {i}", f"body {i}") for i in range(5)]
+
+
+@pytest.mark.parametrize("key", [
+    (datetime(2024, 5, 1, 12, 30, 15), 7),
+    ("Café", 3),
+    (None, 11),
+])
+def test_cursor_round_trip(key):
+    column = "created_at" if isinstance(key[0], datetime) else "title"
+    assert news_api.decode_cursor(news_api.encode_cursor(key), column) == key
+
+
+def raw_cursor(value, row_id):
+    return base64.urlsafe_b64encode(json.dumps([value, row_id]).encode()).decode()
+
+
+@pytest.mark.parametrize("text, column", [
+    ("not a cursor", "created_at"),
+    ("", "created_at"),
+    (raw_cursor("x", 1), "created_at"),
+    (raw_cursor(None, 1), "created_at"),
+    (raw_cursor(20240501, 1), "created_at"),
+    (raw_cursor("2024-05-01", "1"), "created_at"),
+    (raw_cursor(["a"], 1), "title"),
+    (raw_cursor({"a": 1}, 1), "title"),
+    (raw_cursor("a", 1.5), "title"),
+    (raw_cursor("a", True), "title"),
+    (raw_cursor("a", None), "title"),
+])
+def test_invalid_cursor(text, column):
+    with pytest.raises(news_api.ApiError) as e:
+        news_api.decode_cursor(text, column)
+    assert e.value.status == 400
+
+
+def test_render_caches_until_the_data_changes(api):
+    status, body, etag, modified = news_api.render("/news?limit=2")
+    assert status == 200 and etag
+    hits = news_api.responses.stats["hits"]
+    assert news_api.render("/news?limit=2") == (status, body, etag, modified)
+    assert news_api.responses.stats["hits"] == hits + 1
+
+    svc.update_news_post(api[-1], "Edited", "body")
+    status, new_body, new_etag, _ = news_api.render("/news?limit=2")
+    assert new_etag != etag and b"Edited" in new_body
+
+
+def test_errors_and_user_paging(api):
+    assert news_api.render("/news/999999")[0] == 404
+    assert news_api.render("/news?after=garbage")[0] == 400
+    assert news_api.render(f"/news?sort=title&after={raw_cursor([1, 2], 1)}")[0] == 400
+    assert news_api.render(f"/users/alice/news?after={raw_cursor(7, 1)}")[0] == 400
+    assert news_api.render("/users/nobody/news")[0] == 404
+
+    seen, target = [], "/users/alice/news?limit=2"
+    while True:
+        status, body, _, _ = news_api.render(target)
+        document = json.loads(body)
+        seen.extend(item["news_id"] for item in document["items"])
+        if not document["next"]:
+            break
+        target = f"/users/alice/news?limit=2&after={document['next']}"
+    assert seen == sorted(api, reverse=True)
+
+
+def test_not_modified():
+    etag, modified = '"abc"', datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    assert news_api.not_modified({"If-None-Match": '"abc"'}, etag, modified)
+    assert news_api.not_modified({"If-None-Match": 'W/"xyz", W/"abc"'}, etag, modified)
+    assert news_api.not_modified({"If-None-Match": "*"}, etag, modified)
+    # If-None-Match wins over If-Modified-Since when both are sent.
+    assert not news_api.not_modified({"If-None-Match": '"xyz"',
+                                      "If-Modified-Since": format_datetime(modified, usegmt=True)}, etag, modified)
+    assert news_api.not_modified({"If-Modified-Since": format_datetime(modified, usegmt=True)}, etag, modified)
+    earlier = format_datetime(modified - timedelta(seconds=1), usegmt=True)
+    assert not news_api.not_modified({"If-Modified-Since": earlier}, etag, modified)
+    assert not news_api.not_modified({"If-Modified-Since": "yesterday"}, etag, modified)
+    assert not news_api.not_modified({}, etag, modified)
@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+import news_cli
+import news_service as svc
+
+
+@pytest.fixture
+def users(sqlite_db, monkeypatch):
+    monkeypatch.setattr(svc, "USERS_PAGE_SIZE", 3)
+    return [svc.insert_user(f"user{i:02d}", f"user{i:02d}@example.com", 20 + i % 4, "", "") for i in range(8)]
+
+
+def listed(capsys, *argv):
+    assert news_cli.main(["--json", "users", "list", *argv]) == 0
+    return [json.loads(line)["user_id"] for line in capsys.readouterr().out.splitlines()]
+
+
+def test_users_list_pages_through_every_user(users, capsys, monkeypatch):
+    calls = []
+    fetch_users_page = svc.fetch_users_page
+    monkeypatch.setattr(svc, "fetch_users_page", lambda *args: calls.append(args[3]) or fetch_users_page(*args))
+    assert listed(capsys) == users
+    assert calls == [3, 3, 3]
+    expected = [r[0] for r in svc.order_rows([svc.fetch_user_row(u) for u in users], svc.USER_SORTS, ("age", True))]
+    assert listed(capsys, "--sort", "age", "--direction", "desc") == expected
+
+
+def test_users_list_limit_and_search(users, capsys):
+    assert listed(capsys, "--limit", "4") == users[:4]
+    assert listed(capsys, "--limit", "2", "--direction", "desc") == users[::-1][:2]
+    assert listed(capsys, "--search", "user0", "--limit", "5") == users[:5]
+    assert listed(capsys, "--age-min", "22") == [u for i, u in enumerate(users) if i % 4 >= 2]
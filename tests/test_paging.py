@@ -0,0 +1,68 @@
+import pytest
+
+import news_service as svc
+
+
+@pytest.fixture
+def users(sqlite_db):
+    ages = [30, None, 25, 30, None, 41, 25, None, 19, 30, 52]
+    return [svc.insert_user(f"user{i:02d}", f"user{i:02d}@example.com", age, "", "") for i, age in enumerate(ages)]
+
+
+@pytest.fixture
+def posts(users):
+    titles = ["beta", None, "Alpha", "beta", "gamma", None, "delta", "alpha", None, "Beta", "epsilon"]
+    return [svc.insert_news(users[i % 3], title, f"body {i}") for i, title in enumerate(titles)]
+
+
+def walk_users(order, limit):
+    rows, after = [], None
+    while True:
+        page, more = svc.fetch_users_page(order=order, after=after, limit=limit)
+        rows.extend(page)
+        if not more:
+            return rows
+        after = svc.sort_key(page[-1], svc.USER_SORTS, order)
+
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("limit", [1, 2, 4])
+def test_user_pages_with_null_ages(users, descending, limit):
+    order = ("age", descending)
+    everything, _ = svc.fetch_users_page(order=order, limit=100)
+    expected = svc.order_rows(everything, svc.USER_SORTS, order)
+    assert [r[0] for r in walk_users(order, limit)] == [r[0] for r in expected]
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_user_pages_by_post_statistics(posts, descending):
+    user05 = svc.get_user_id_by_username("user05")
+    svc.insert_news(user05, "Long", "é" * 50)
+    assert svc.fetch_user_row(user05)[8] == 100
+    for column in ("post_count", "last_post_at", "body_bytes"):
+        order = (column, descending)
+        everything, _ = svc.fetch_users_page(order=order, limit=100)
+        expected = svc.order_rows(everything, svc.USER_SORTS, order)
+        assert [r[0] for r in walk_users(order, 2)] == [r[0] for r in expected]
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_news_pages_forward_and_back(posts, descending):
+    order, limit = ("title", descending), 3
+    pages, after = [], None
+    while True:
+        page, more = svc.fetch_news_page(after=after, limit=limit, order=order)
+        pages.append(page)
+        if not more:
+            break
+        after = svc.sort_key(page[-1], svc.NEWS_SORTS, order)
+
+    walked = [row[0] for page in pages for row in page]
+    everything, _ = svc.fetch_news_page(limit=100, order=order)
+    assert walked == [r[0] for r in svc.order_rows(everything, svc.NEWS_SORTS, order)]
+    assert sorted(walked) == sorted(posts)
+
+    for previous, page in zip(pages, pages[1:]):
+        back, more = svc.fetch_news_page(before=svc.sort_key(page[0], svc.NEWS_SORTS, order), limit=limit, order=order)
+        assert back == previous
+        assert more == (previous is not pages[0])
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+import perf
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    monkeypatch.setattr(perf, "enabled", True)
+    perf.reset()
+    yield
+    perf.reset()
+
+
+def test_histogram_buckets_and_percentiles():
+    histogram = perf.Histogram()
+    for ms in (0.01, 0.04, 0.3, 0.3, 12.0):
+        histogram.add(ms, 1, 10)
+    assert histogram.buckets[0] == 2            # up to BUCKET_BASE_MS
+    assert histogram.buckets[3] == 2            # 0.2 < 0.3 <= 0.4
+    summary = histogram.summary()
+    assert summary["count"] == 5 and summary["rows"] == 5 and summary["bytes"] == 50
+    assert summary["min_ms"] == 0.01 and summary["max_ms"] == 12.0
+    assert summary["p50_ms"] == 0.4
+    assert summary["p95_ms"] == 12.0            # the bucket bound is capped at the slowest sample
+    assert perf.Histogram().summary()["mean_ms"] == 0.0
+
+
+def test_huge_samples_land_in_the_last_bucket():
+    histogram = perf.Histogram()
+    histogram.add(10 ** 9, 0, 0)
+    assert histogram.buckets[-1] == 1
+
+
+def test_timed_records_calls_and_row_counts(metrics):
+    @perf.timed("test.rows")
+    def rows(n):
+        return [(i,) for i in range(n)]
+
+    @perf.timed("test.page")
+    def page():
+        return [(1,), (2,)], True
+
+    assert rows(3) == [(0,), (1,), (2,)]
+    rows(2)
+    page()
+    stats = perf.snapshot()["metrics"]
+    assert stats["test.rows"]["count"] == 2 and stats["test.rows"]["rows"] == 5
+    assert stats["test.page"]["rows"] == 2
+
+
+def test_nothing_is_recorded_while_disabled(monkeypatch):
+    monkeypatch.setattr(perf, "enabled", False)
+    perf.reset()
+    perf.timed("test.off")(lambda: None)()
+    perf.record("test.off", 1.0)
+    perf.finish("test.off", perf.start())
+    assert perf.snapshot()["metrics"] == {}
+
+
+def test_snapshot_includes_sources_and_dumps(metrics, tmp_path, monkeypatch):
+    monkeypatch.setitem(perf._sources, "test_source", lambda: {"hits": 1})
+    monkeypatch.setitem(perf._sources, "test_broken", lambda: 1 / 0)
+    perf.record("test.io", 0.002, rows=4, nbytes=100)
+    data = perf.snapshot()
+    assert data["sources"]["test_source"] == {"hits": 1}
+    assert "error" in data["sources"]["test_broken"]
+
+    perf.dump(str(tmp_path / "perf.jsonl"))
+    perf.dump(str(tmp_path / "perf.jsonl"))
+    lines = (tmp_path / "perf.jsonl").read_text().splitlines()
+    assert len(lines) == 2 and json.loads(lines[0])["metrics"]["test.io"]["rows"] == 4
+    perf.dump(str(tmp_path / "perf.json"))
+    assert json.loads((tmp_path / "perf.json").read_text())["metrics"]["test.io"]["bytes"] == 100
+
+
+def test_payload_size_and_row_count():
+    assert perf.payload_size([(1, "abc", None), {"body": b"xy"}]) == 8 + 3 + 2
+    assert perf.row_count(None) == 0
+    assert perf.row_count({"user_id": 1}) == 1
@@ -0,0 +1,163 @@
+import threading
+
+import pytest
+
+import db
+
+
+class FakeCursor:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    """Stands in for a mysql.connector connection; fail_* make the named call raise db.Error."""
+
+    def __init__(self):
+        self.in_transaction = False
+        self.cursors = []
+        self.calls = []
+        self.fail_ping = self.fail_reconnect = self.fail_rollback = False
+
+    def cursor(self, **kwargs):
+        self.in_transaction = True
+        self.cursors.append(FakeCursor())
+        return self.cursors[-1]
+
+    def commit(self):
+        self.calls.append("commit")
+        self.in_transaction = False
+
+    def rollback(self):
+        self.calls.append("rollback")
+        if self.fail_rollback:
+            raise db.Error(msg="Lost connection")
+        self.in_transaction = False
+
+    def ping(self, reconnect=False):
+        self.calls.append("ping")
+        if self.fail_ping:
+            raise db.Error(msg="MySQL server has gone away")
+
+    def reconnect(self, attempts=1, delay=0):
+        self.calls.append("reconnect")
+        if self.fail_reconnect:
+            raise db.Error(msg="Can't connect")
+
+    def close(self):
+        self.calls.append("close")
+
+
+@pytest.fixture
+def connector(monkeypatch):
+    """Replaces mysql.connector.connect; returns the list of connections it opened."""
+    opened = []
+
+    def connect(**config):
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    monkeypatch.setattr(db.mysql.connector, "connect", connect)
+    return opened
+
+
+def test_idle_connections_are_reused(connector):
+    pool = db.ConnectionPool({}, size=2)
+    with pool.connection():
+        pass
+    with pool.connection():
+        pass
+    assert len(connector) == 1
+    assert pool.snapshot()["checkouts"] == 2 and pool.snapshot()["idle"] == 1
+
+
+def test_release_closes_cursors_and_rolls_back(connector):
+    pool = db.ConnectionPool({}, size=1)
+    with pool.cursor() as cur:
+        pass
+    assert cur.closed
+    assert connector[0].calls == ["rollback"]
+
+    with pool.cursor(commit=True):
+        pass
+    assert connector[0].calls == ["rollback", "commit"]
+
+    with pytest.raises(ZeroDivisionError):
+        with pool.cursor(commit=True):
+            1 / 0
+    assert connector[0].calls == ["rollback", "commit", "rollback"]
+
+
+def test_failed_rollback_discards_the_connection(connector):
+    pool = db.ConnectionPool({}, size=1)
+    with pool.cursor():
+        connector[0].fail_rollback = True
+    assert pool.snapshot()["open"] == 0 and pool.snapshot()["discarded"] == 1
+    with pool.connection():
+        pass
+    assert len(connector) == 2
+
+
+def test_stale_connections_are_pinged_and_reconnected(connector):
+    pool = db.ConnectionPool({}, size=1, ping_after=0)
+    with pool.connection():
+        pass
+    with pool.connection():
+        pass
+    assert connector[0].calls == ["ping"]
+
+    connector[0].fail_ping = True
+    with pool.connection():
+        pass
+    assert connector[0].calls[-2:] == ["ping", "reconnect"]
+    assert pool.snapshot()["reconnects"] == 1
+
+    connector[0].fail_reconnect = True
+    with pytest.raises(db.Error):
+        pool.acquire()
+    assert pool.snapshot()["open"] == 0
+    assert connector[0].calls[-1] == "close"
+
+
+def test_failed_connect_frees_its_slot(monkeypatch):
+    def connect(**config):
+        raise db.Error(msg="Access denied")
+
+    monkeypatch.setattr(db.mysql.connector, "connect", connect)
+    pool = db.ConnectionPool({}, size=1)
+    with pytest.raises(db.Error):
+        pool.acquire()
+    assert pool.snapshot()["open"] == 0
+
+
+def test_full_pool_waits_then_times_out(connector):
+    pool = db.ConnectionPool({}, size=1, timeout=0.05)
+    held = pool.acquire()
+    with pytest.raises(db.PoolTimeout):
+        pool.acquire()
+    assert pool.snapshot()["waits"] == 1
+
+    pool.timeout = 5
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    waiter.start()
+    held.close()
+    waiter.join(5)
+    assert got and got[0]._conn is connector[0]
+    assert len(connector) == 1
+
+
+def test_closed_pool(connector):
+    pool = db.ConnectionPool({}, size=2)
+    idle, borrowed = pool.acquire(), pool.acquire()
+    idle.close()
+    pool.close()
+    assert connector[0].calls[-1] == "close"
+    borrowed.close()
+    assert connector[1].calls[-1] == "close"
+    assert pool.snapshot()["open"] == 0
+    with pytest.raises(db.Error):
+        pool.acquire()
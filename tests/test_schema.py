@@ -0,0 +1,49 @@
+import pytest
+
+import db
+import schema
+
+
+def sqlite_index_exists(name):
+    with db.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND name = %s", (name,))
+        return cur.fetchone()[0] > 0
+
+
+def test_migrate_applies_pending_versions_once(sqlite_db):
+    assert schema.migrate() == []
+    status = schema.status()
+    assert [row[0] for row in status] == [version for version, _, _ in schema.SQLITE_MIGRATIONS]
+    assert all(applied_at is not None for _, _, applied_at in status)
+
+
+def test_new_migration_runs_on_an_existing_database(sqlite_db, monkeypatch):
+    def add_index(cur):
+        cur.execute("CREATE INDEX idx_user_email_test ON User (email)")
+
+    version = schema.SQLITE_MIGRATIONS[-1][0] + 1
+    monkeypatch.setattr(schema, "SQLITE_MIGRATIONS", schema.SQLITE_MIGRATIONS + [(version, "test index", add_index)])
+    with db.cursor() as cur:
+        assert not schema.up_to_date(cur)
+    assert schema.migrate() == [version]
+    assert schema.migrate() == []
+    assert sqlite_index_exists("idx_user_email_test")
+
+
+def test_failed_migration_rolls_back(sqlite_db, monkeypatch):
+    def broken(cur):
+        cur.execute("CREATE INDEX idx_user_email_test ON User (email)")
+        cur.execute("CREATE INDEX idx_broken ON NoSuchTable (x)")
+
+    version = schema.SQLITE_MIGRATIONS[-1][0] + 1
+    monkeypatch.setattr(schema, "SQLITE_MIGRATIONS", schema.SQLITE_MIGRATIONS + [(version, "broken", broken)])
+    with pytest.raises(db.Error):
+        schema.migrate()
+    assert schema.status()[-1][2] is None
+    assert not sqlite_index_exists("idx_user_email_test")
+
+
+@pytest.mark.parametrize("name", ["news_first_page", "news_next_page", "news_by_title", "users_by_age", "users_by_body_bytes",
+                                  "news_for_user", "top_authors", "changed_news"])
+def test_listing_queries_use_indexes(sqlite_db, name):
+    assert schema.plan_warnings(schema.explain([name])[name]) == []
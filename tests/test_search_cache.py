@@ -0,0 +1,43 @@
+from cache import SearchCache
+
+
+def usable(prefix, term):
+    return term.startswith(prefix)
+
+
+def test_superset_prefers_longest_complete_prefix():
+    cache = SearchCache()
+    cache.put("news", "py", ["a", "b", "c"], True)
+    cache.put("news", "pyt", ["a", "b"], True)
+    cache.put("news", "pyth", ["a"], False)  # hit the limit, so not every match of "python" is in it
+    assert cache.superset("news", "python", usable) == ("pyt", ["a", "b"])
+    assert cache.stats["narrowed"] == 1
+
+
+def test_superset_respects_kind_and_usable():
+    cache = SearchCache()
+    cache.put("users", "py", ["u"], True)
+    assert cache.superset("news", "python", usable) is None
+    assert cache.superset("users", "python", lambda prefix, term: False) is None
+    assert cache.superset("users", "py", usable) is None  # a term is not its own superset
+
+
+def test_get_counts_hits_and_misses():
+    cache = SearchCache()
+    cache.put("news", "py", ["a"], True)
+    assert cache.get("news", "py") == ["a"]
+    assert cache.get("news", "go") is None
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+
+def test_expired_and_evicted_entries_are_not_used():
+    cache = SearchCache(ttl=-1)
+    cache.put("news", "py", ["a"], True)
+    assert cache.get("news", "py") is None
+    assert cache.superset("news", "python", usable) is None
+
+    cache = SearchCache(max_entries=2)
+    for term in ("a", "ab", "abc"):
+        cache.put("news", term, [term], True)
+    assert cache.get("news", "a") is None
+    assert cache.superset("news", "abcd", usable) == ("abc", ["abc"])
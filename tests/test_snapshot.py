@@ -0,0 +1,60 @@
+import pytest
+
+import db
+import news_service as svc
+import snapshot
+
+
+@pytest.fixture
+def queue(sqlite_db, tmp_path):
+    return str(tmp_path / "snapshot.db")
+
+
+def test_replay_drops_invalid_writes_and_applies_the_rest(queue):
+    svc.insert_user("alice", "alice@example.com", 30, "", "")
+    snapshot.queue_write("insert_user", ("alice", "other@example.com", 31, "", ""), {}, queue)
+    snapshot.queue_write("insert_user", ("bob", "bob@example.com", None, "", ""), {}, queue)
+    assert snapshot.pending_count(queue) == 2
+
+    replayed, failures = snapshot.replay(queue)
+    assert replayed == 1
+    assert len(failures) == 1 and failures[0].startswith("insert_user:")
+    assert snapshot.pending_count(queue) == 0
+    assert svc.get_user_id_by_username("bob") is not None
+
+
+def test_replay_stops_and_keeps_writes_while_unreachable(queue, monkeypatch):
+    def unreachable(*args, **kwargs):
+        raise db.PoolTimeout(msg="no connection available")
+
+    snapshot.queue_write("insert_user", ("bob", "bob@example.com", None, "", ""), {}, queue)
+    monkeypatch.setattr(svc, "insert_user", unreachable)
+    with pytest.raises(db.PoolTimeout):
+        snapshot.replay(queue)
+    assert snapshot.pending_count(queue) == 1
+
+    monkeypatch.undo()
+    assert snapshot.replay(queue) == (1, [])
+    assert snapshot.pending_count(queue) == 0
+
+
+def test_writes_are_queued_while_offline(queue):
+    db.use_snapshot(queue)
+    with pytest.raises(db.Offline):
+        svc.insert_user("carol", "carol@example.com", 40, "", "")
+    assert snapshot.pending_count(queue) == 1
+
+
+@pytest.mark.parametrize("error, expected", [
+    (db.PoolTimeout(msg="no connection available"), True),
+    (db.mysql.connector.errors.InterfaceError(msg="Can't connect", errno=2003), True),
+    (db.mysql.connector.errors.OperationalError(msg="Lost connection", errno=2013), True),
+    (db.mysql.connector.errors.DatabaseError(msg="Can't connect", errno=2003), True),
+    (db.mysql.connector.errors.DatabaseError(msg="Too many connections", errno=1040), True),
+    (db.mysql.connector.errors.DatabaseError(msg="Lock wait timeout exceeded", errno=1205), False),
+    (db.mysql.connector.errors.IntegrityError(msg="Duplicate entry", errno=1062), False),
+    (db.mysql.connector.errors.ProgrammingError(msg="Access denied", errno=1045), False),
+    (db.Error(msg="no such table: News"), False),
+])
+def test_unreachable(error, expected):
+    assert db.unreachable(error) is expected
@@ -0,0 +1,33 @@
+import pytest
+
+import db
+
+
+@pytest.mark.parametrize("mysql, sqlite", [
+    ("SELECT LEFT(body, %s) FROM News", "SELECT LEFT_CHARS(body, ?) FROM News"),
+    ("INSERT IGNORE INTO User (username) VALUES (%s)", "INSERT OR IGNORE INTO User (username) VALUES (?)"),
+    ("SET pruned_through = GREATEST(pruned_through, %s)", "SET pruned_through = MAX(pruned_through, ?)"),
+    ("WHERE INSTR(BINARY title, %s) > 0", "WHERE INSTR(title, ?) > 0"),
+    ("SELECT user_id FROM User WHERE user_id = %s FOR UPDATE", "SELECT user_id FROM User WHERE user_id = ?"),
+    ("SUM(LENGTH(N.body))", "SUM(LENGTH(CAST(N.body AS BLOB)))"),
+    ("CHAR_LENGTH(username)", "CHAR_LENGTH(username)"),
+])
+def test_translate(mysql, sqlite):
+    assert db.SqliteCursor.translate(mysql) == sqlite
+
+
+def test_rewritten_functions_match_mysql(sqlite_db):
+    with db.cursor(commit=True) as cur:
+        cur.execute("INSERT INTO User (username, email) VALUES (%s, %s)", ("héllo", "h@example.com"))
+        cur.execute("SELECT LEFT(username, 2), LENGTH(username), CHAR_LENGTH(username), GREATEST(1, 3, 2) FROM User")
+        assert cur.fetchone() == ("hé", 6, 5, 3)
+
+
+def test_insert_ignore_and_errors(sqlite_db):
+    with db.cursor(commit=True) as cur:
+        cur.execute("INSERT INTO User (username, email) VALUES (%s, %s)", ("alice", "a@example.com"))
+        cur.execute("INSERT IGNORE INTO User (username, email) VALUES (%s, %s)", ("ALICE", "b@example.com"))
+        assert cur.rowcount == 0
+    with pytest.raises(db.Error):
+        with db.cursor(commit=True) as cur:
+            cur.execute("INSERT INTO User (username, email) VALUES (%s, %s)", ("bob", "A@example.com"))
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+import news_service as svc
+import static_site
+
+
+@pytest.fixture
+def site(sqlite_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(static_site, "INDEX_PAGE_SIZE", 2)
+    alice = svc.insert_user("alice", "alice@example.com", 30, "", "")
+    bob = svc.insert_user("bob", "bob@example.com", 41, "", "")
+    posts = [svc.insert_news(alice if i % 2 else bob, f"Post {i}", f"Body {i}\n\nMore") for i in range(5)]
+    return str(tmp_path / "site"), posts
+
+
+def build(output, full=False):
+    return static_site.build(output, "https://news.example.com", workers=1, full=full)
+
+
+def test_build_writes_every_page(site):
+    output, posts = site
+    stats = build(output)
+    assert stats["rendered"] == stats["pages"] and stats["removed"] == 0
+    for path in ["index.html", "page/1.html", "page/3.html", "feed.xml", "atom.xml"] + \
+                [f"news/{news_id}.html" for news_id in posts]:
+        assert os.path.exists(os.path.join(output, path)), path
+    with open(os.path.join(output, f"news/{posts[0]}.html"), encoding="utf-8") as f:
+        assert "<p>Body 0</p>" in f.read()
+    manifest = static_site.load_manifest(output)
+    assert sorted(manifest) == sorted(static_site.plan("https://news.example.com"))
+
+
+def test_rebuild_renders_only_changed_pages(site):
+    output, posts = site
+    build(output)
+    assert build(output)["rendered"] == 0
+
+    svc.update_news_post(posts[0], "Post 0, edited", "Body")
+    with open(os.path.join(output, f"news/{posts[0]}.html"), encoding="utf-8") as f:
+        assert "edited" not in f.read()
+    stats = build(output)
+    # The post, the list pages showing it (page/1.html and bob's users/<id>/1.html) and both feeds.
+    assert stats["rendered"] == 5
+    with open(os.path.join(output, f"news/{posts[0]}.html"), encoding="utf-8") as f:
+        assert "edited" in f.read()
+
+    os.remove(os.path.join(output, "atom.xml"))
+    assert build(output)["rendered"] == 1
+
+
+def test_pages_of_deleted_posts_are_removed(site):
+    output, posts = site
+    build(output)
+    svc.delete_news_post(posts[-1])
+    stats = build(output)
+    # The post's page, and the last numbered page of the site and of bob's archive (2 posts per page).
+    assert stats["removed"] == 3
+    for path in (f"news/{posts[-1]}.html", "page/3.html", f"users/{svc.get_user_id_by_username('bob')}/2.html"):
+        assert not os.path.exists(os.path.join(output, path))
+    assert f"news/{posts[-1]}.html" not in static_site.load_manifest(output)
+
+
+def test_full_build_renders_everything_and_removes_stale_pages(site):
+    output, posts = site
+    build(output)
+    svc.delete_news_post(posts[0])
+    stats = build(output, full=True)
+    assert stats["rendered"] == stats["pages"]
+    assert stats["removed"] == 3
+    assert not os.path.exists(os.path.join(output, f"news/{posts[0]}.html"))